@@ -10,8 +10,9 @@ from celery.schedules import crontab
 from dotenv import load_dotenv
 from flask import Flask, Response
 from flask_cors import CORS  # type: ignore[import-untyped]
-from flask_migrate import Migrate
+from flask_migrate import Migrate, stamp, upgrade
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -25,6 +26,11 @@ celery = Celery(
 )
 celery.set_default()
 
+# Schema migrations ship next to the app package (and are bundled alongside it in PyInstaller builds)
+MIGRATIONS_DIR = str(Path(__file__).resolve().parent.parent / "migrations")
+# The schema db.create_all() built before migrations were introduced
+BASELINE_REVISION = "0001"
+
 
 def _get_config_dir() -> Path:
     """Get the platform-specific configuration directory.
@@ -47,6 +53,20 @@ def _get_config_dir() -> Path:
     return Path(base) / "arma_server_manager"
 
 
+def upgrade_database() -> None:
+    """Bring the database schema up to date with the migrations.
+
+    Databases created by db.create_all() before migrations were introduced
+    have tables but no migration history; they're stamped with the baseline
+    revision first, so only the changes since then are applied. Must be
+    called within an application context.
+    """
+    tables = inspect(db.engine).get_table_names()
+    if "alembic_version" not in tables and "mods" in tables:
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
+
 def create_app(config_name: str | None = None) -> Flask:
     """Create and configure Flask application.
 
@@ -92,16 +112,57 @@ def create_app(config_name: str | None = None) -> Flask:
 
     # Initialize extensions with app
     db.init_app(app)
-    migrate.init_app(app, db)
+    # batch mode lets SQLite (which can't alter most column properties in place) rebuild tables when migrating
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
     cors_origins = app.config.get("CORS_ORIGINS", ["*"])
     CORS(app, origins=cors_origins, supports_credentials=(cors_origins != ["*"]))
 
+    # Outbound requests share one pooled client per process
+    from .utils.http_client import configure_http_client
+
+    configure_http_client(app.config.get("HTTP_CLIENT", {}))
+
     # Apply Flask config's Celery settings (if any)
     celery_config = app.config.get("CELERY", {})
     celery.conf.broker_url = celery_config.get("broker_url", celery.conf.broker_url)
     celery.conf.result_backend = celery_config.get(
         "result_backend", celery.conf.result_backend
     )
+    # control actions run on their own queue, so they start within seconds however long the bulk transfers (mod
+    # downloads, updates and other long file work) queued behind each other take. Preview images are fetched on
+    # their own queue so slow CDN downloads never delay other work; everything else uses the default "celery" queue
+    celery.conf.task_routes = {
+        **{
+            f"app.tasks.background.{name}": {"queue": "control"}
+            for name in [
+                "server_start",
+                "server_stop",
+                "server_restart",
+                "headless_client_start",
+                "headless_client_stop",
+                "check_for_server_death",
+                "task_kickoff",
+                "task_trigger",
+                "advance_download_queue",
+            ]
+        },
+        **{
+            f"app.tasks.background.{name}": {"queue": "bulk"}
+            for name in [
+                "download_arma3_mod",
+                "download_arma3_mods",
+                "update_arma3_mod",
+                "mod_update",
+                "server_update",
+                "rollback_arma3_mod",
+                "verify_arma3_mods",
+                "dedup_arma3_mods",
+            ]
+        },
+        "app.tasks.background.fetch_mod_preview_image": {"queue": "images"},
+    }
+    # a worker only takes a task when it's free to start it, rather than holding one back behind a long transfer
+    celery.conf.worker_prefetch_multiplier = 1
     # set up a kick-off job to launch other scheduled activities
     celery.conf.beat_schedule = {
         "every_hour": {
@@ -129,6 +190,26 @@ def create_app(config_name: str | None = None) -> Flask:
             "schedule": crontab(minute=0, hour="*"),  # hourly
             "args": [],
         },
+        "backfill_mod_images": {
+            "task": "app.tasks.background.backfill_mod_preview_images",
+            "schedule": crontab(minute="*/30"),
+            "args": [],
+        },
+        "reconcile_mod_directory_index": {
+            "task": "app.tasks.background.reconcile_mod_directory_index",
+            "schedule": crontab(minute="*/10"),
+            "args": [],
+        },
+        "advance_download_queue": {
+            "task": "app.tasks.background.advance_download_queue",
+            "schedule": crontab(minute="*/5"),
+            "args": [],
+        },
+        "prune_tombstones": {
+            "task": "app.tasks.background.prune_tombstones",
+            "schedule": crontab(minute=30, hour=6),  # daily
+            "args": [],
+        },
         "check_server_death": {
             "task": "app.tasks.background.check_for_server_death",
             "schedule": 90,  # every 90 seconds - for rapid detection without running _all the time_
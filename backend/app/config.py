@@ -5,10 +5,13 @@ import os
 from app.utils.helpers import (
     Arma3ModManager,
     Arma3ServerHelper,
+    DiskAdmissionHelper,
+    DownloadQueueHelper,
     ScheduleHelper,
     SteamAPI,
     TaskHelper,
 )
+from app.utils.image_store import build_image_store
 
 
 class Config:
@@ -46,6 +49,92 @@ class Config:
         or os.path.join(os.getcwd(), "temp", "backups"),
         "ARMA3_INSTALL_DIR": os.environ.get("ARMA3_INSTALL_DIR")
         or os.path.join(os.getcwd(), "arma3"),
+        # number of workshop items downloaded per steamcmd invocation
+        "DOWNLOAD_BATCH_SIZE": int(
+            os.environ.get("STEAMCMD_DOWNLOAD_BATCH_SIZE") or 25
+        ),
+        # number of steamcmd sessions run concurrently, each with its own staging subdirectory
+        "DOWNLOAD_WORKERS": int(os.environ.get("STEAMCMD_DOWNLOAD_WORKERS") or 1),
+        # minimum seconds between download progress updates published to the task state
+        "PROGRESS_INTERVAL": float(os.environ.get("STEAMCMD_PROGRESS_INTERVAL") or 2),
+        # threads copying downloaded mods out of staging when it's on a different filesystem to the mods
+        "TRANSFER_WORKERS": int(os.environ.get("MOD_TRANSFER_WORKERS") or 4),
+        # threads hashing installed mod files when verifying them
+        "VERIFY_WORKERS": int(
+            os.environ.get("MOD_VERIFY_WORKERS") or os.cpu_count() or 1
+        ),
+        # number of snapshots kept of each mod's previous versions in MOD_BACKUP_DIR (0 disables snapshots)
+        "SNAPSHOT_RETENTION": int(os.environ.get("MOD_SNAPSHOT_RETENTION") or 3),
+        # snapshots older than this many days are deleted, apart from each mod's newest (0 keeps them regardless)
+        "SNAPSHOT_MAX_AGE_DAYS": int(os.environ.get("MOD_SNAPSHOT_MAX_AGE_DAYS") or 0),
+    }
+
+    # Steam web API settings
+    STEAM_API = {
+        # number of workshop items requested per GetPublishedFileDetails call
+        "DETAILS_CHUNK_SIZE": int(
+            os.environ.get("STEAM_API_DETAILS_CHUNK_SIZE") or 100
+        ),
+    }
+
+    # Outbound HTTP client settings (Steam web API, preview images, webhooks)
+    # Per-host timeouts are set with HTTP_HOST_TIMEOUTS, e.g. "api.steampowered.com=15,discord.com=5"
+    _host_timeouts_env = os.environ.get("HTTP_HOST_TIMEOUTS", "")
+    HTTP_CLIENT = {
+        "HTTP2": (os.environ.get("HTTP2") or "true").lower() == "true",
+        "MAX_CONNECTIONS": int(os.environ.get("HTTP_MAX_CONNECTIONS") or 20),
+        "MAX_KEEPALIVE_CONNECTIONS": int(
+            os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS") or 10
+        ),
+        "KEEPALIVE_EXPIRY": float(os.environ.get("HTTP_KEEPALIVE_EXPIRY") or 30),
+        "TIMEOUT": float(os.environ.get("HTTP_TIMEOUT") or 10),
+        "HOST_TIMEOUTS": {
+            host.strip(): float(timeout)
+            for host, timeout in (
+                entry.split("=", 1) for entry in _host_timeouts_env.split(",") if entry
+            )
+        },
+    }
+
+    # Mod preview image storage: "filesystem" (content-addressed files plus thumbnails) or "database" (blobs)
+    # Thumbnails require the optional "pillow" package
+    IMAGE_STORE = {
+        "BACKEND": os.environ.get("IMAGE_STORE_BACKEND") or "filesystem",
+        "DIR": os.environ.get("IMAGE_STORE_DIR")
+        or os.path.join(os.getcwd(), "temp", "images"),
+        "THUMBNAIL_SIZES": [
+            int(size)
+            for size in (os.environ.get("IMAGE_THUMBNAIL_SIZES") or "64,256").split(",")
+            if size
+        ],
+    }
+
+    # Download admission control: downloads reserve the disk space they need, and wait (or fail) if it isn't free
+    DISK_ADMISSION = {
+        # free space always left on the staging and install filesystems
+        "HEADROOM_MB": int(os.environ.get("DOWNLOAD_DISK_HEADROOM_MB") or 1024),
+        # seconds before a download deferred for lack of space tries again
+        "RETRY_SECONDS": int(os.environ.get("DOWNLOAD_DEFER_RETRY_SECONDS") or 300),
+        # how long a download may wait for space before it fails
+        "MAX_WAIT_MINUTES": int(os.environ.get("DOWNLOAD_DEFER_MAX_MINUTES") or 360),
+    }
+
+    # Download queue: downloads (and updates) wait their turn, by priority, with each mod queued at most once
+    DOWNLOAD_QUEUE = {
+        # how many downloads may run at once
+        "CONCURRENCY": int(os.environ.get("DOWNLOAD_QUEUE_CONCURRENCY") or 1),
+    }
+
+    # Celery queues main.py starts a worker for, mapped to how many tasks each worker runs at once. Control actions
+    # (server and headless client start/stop, health checks) have their own so they never wait behind bulk transfers
+    # (mod downloads, updates and other long file work); see the task routes in create_app
+    CELERY_WORKERS = {
+        "control": int(os.environ.get("CELERY_CONTROL_CONCURRENCY") or 2),
+        "celery": int(os.environ.get("CELERY_DEFAULT_CONCURRENCY") or 1),
+        "bulk": int(
+            os.environ.get("CELERY_BULK_CONCURRENCY") or DOWNLOAD_QUEUE["CONCURRENCY"]
+        ),
+        "images": int(os.environ.get("CELERY_IMAGES_CONCURRENCY") or 1),
     }
 
     # Classes to actually subscribe, download, etc. mods
@@ -55,6 +144,22 @@ class Config:
             STEAMCMD["STEAMCMD_USER"],
             STEAMCMD["MOD_STAGING_DIR"],
             STEAMCMD["MOD_INSTALL_DIR"],
+            steam_api_details_chunk_size=STEAM_API["DETAILS_CHUNK_SIZE"],
+            directory_index_refresh_interval=float(
+                os.environ.get("MOD_DIRECTORY_INDEX_REFRESH_SECONDS") or 30
+            ),
+            tombstone_retention_days=int(
+                os.environ.get("TOMBSTONE_RETENTION_DAYS") or 30
+            ),
+            image_store=build_image_store(IMAGE_STORE),
+            download_batch_size=STEAMCMD["DOWNLOAD_BATCH_SIZE"],
+            download_workers=STEAMCMD["DOWNLOAD_WORKERS"],
+            progress_interval=STEAMCMD["PROGRESS_INTERVAL"],
+            transfer_workers=STEAMCMD["TRANSFER_WORKERS"],
+            verify_workers=STEAMCMD["VERIFY_WORKERS"],
+            backup_dir=STEAMCMD["MOD_BACKUP_DIR"],
+            snapshot_retention=STEAMCMD["SNAPSHOT_RETENTION"],
+            snapshot_max_age_days=STEAMCMD["SNAPSHOT_MAX_AGE_DAYS"],
         ),
     }
     SCHEDULE_HELPER = ScheduleHelper()
@@ -63,8 +168,16 @@ class Config:
         STEAMCMD["STEAMCMD_USER"],
         STEAMCMD["ARMA3_INSTALL_DIR"],
     )
-    STEAM_API_HELPER = SteamAPI()
+    STEAM_API_HELPER = SteamAPI(STEAM_API["DETAILS_CHUNK_SIZE"])
     TASK_HELPER = TaskHelper()
+    DISK_ADMISSION_HELPER = DiskAdmissionHelper(
+        headroom_bytes=DISK_ADMISSION["HEADROOM_MB"] * 1048576,
+        retry_seconds=DISK_ADMISSION["RETRY_SECONDS"],
+        max_wait_seconds=DISK_ADMISSION["MAX_WAIT_MINUTES"] * 60,
+    )
+    DOWNLOAD_QUEUE_HELPER = DownloadQueueHelper(
+        concurrency=DOWNLOAD_QUEUE["CONCURRENCY"]
+    )
 
 
 class DevelopmentConfig(Config):
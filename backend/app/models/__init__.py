@@ -1,18 +1,34 @@
 """Database models for Arma Server Manager."""
 
 from .collection import Collection
+from .disk_reservation import DiskReservation
+from .download_queue_entry import DownloadQueueEntry
 from .mod import Mod, ModType
 from .mod_collection_entry import ModCollectionEntry
+from .mod_directory_entry import ModDirectoryEntry
+from .mod_file_link import ModFileLink
 from .mod_image import ModImage
+from .mod_manifest import ModManifest
+from .mod_snapshot import ModSnapshot
+from .resource_version import ResourceVersion
 from .server_config import ServerConfig
 from .task_log import TaskLogEntry
+from .tombstone import Tombstone
 
 __all__ = [
     "Mod",
     "ModType",
     "ModImage",
+    "ModManifest",
+    "ModSnapshot",
     "Collection",
+    "DiskReservation",
+    "DownloadQueueEntry",
     "ModCollectionEntry",
+    "ModDirectoryEntry",
+    "ModFileLink",
+    "ResourceVersion",
     "ServerConfig",
     "TaskLogEntry",
+    "Tombstone",
 ]
@@ -37,7 +37,7 @@ class Collection(db.Model):  # type: ignore[name-defined]
         DateTime, default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=func.now(), onupdate=func.now(), nullable=False
+        DateTime, default=func.now(), onupdate=func.now(), nullable=False, index=True
     )
 
     # Relationships
@@ -0,0 +1,83 @@
+"""Disk reservation model for download admission control and the download queue."""
+
+import enum
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, DateTime, Enum, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .. import db
+
+
+class ReservationState(enum.Enum):
+    """Enumeration for disk reservation states."""
+
+    queued = "queued"  # waiting its turn in the download queue; dispatched again when it comes
+    deferred = "deferred"  # waiting for space; holds its place in line, and its task retries it later
+    active = "active"  # admitted, and downloading
+
+
+class DiskReservation(db.Model):  # type: ignore[name-defined]
+    """Disk space set aside for a queued or in-flight download.
+
+    Reservations double as the jobs of the download queue: waiting ones start
+    in priority order, oldest first within a priority, and hold the task (and
+    arguments) to dispatch once their turn comes.
+
+    Attributes:
+        id: Primary key identifier (also the reservation's place in line within its priority)
+        task_type: The kind of task the space is for, e.g. "mod_download"
+        task_name: The task to dispatch when the download's turn comes, e.g. "download_arma3_mods"
+        args: The positional arguments to dispatch the task with
+        priority: How urgent the download is; higher priorities start first
+        mod_ids: The mods being downloaded
+        space: A directory on each filesystem the download writes to, mapped to the bytes it needs there
+        state: Whether the download is waiting its turn, waiting for space or running
+        attempts: How many times the download has been considered for admission
+        created_at: When the download first asked for space
+        updated_at: When the reservation was last considered or admitted
+    """
+
+    __tablename__ = "disk_reservations"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    task_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    task_name: Mapped[str | None] = mapped_column(String(100))
+    args: Mapped[list | None] = mapped_column(JSON)
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    mod_ids: Mapped[list[int]] = mapped_column(JSON, nullable=False)
+    space: Mapped[dict[str, int]] = mapped_column(JSON, nullable=False)
+    state: Mapped[ReservationState] = mapped_column(
+        Enum(ReservationState), default=ReservationState.deferred, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert disk reservation to dictionary representation.
+
+        Returns:
+            Dictionary containing disk reservation data
+        """
+        return {
+            "id": self.id,
+            "task_type": self.task_type,
+            "priority": self.priority,
+            "mod_ids": self.mod_ids,
+            "space": self.space,
+            "state": self.state.value,
+            "attempts": self.attempts,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+    def __repr__(self) -> str:
+        """String representation of DiskReservation instance."""
+        return f"<DiskReservation {self.id} {self.state.value} mods={self.mod_ids}>"
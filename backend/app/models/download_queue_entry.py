@@ -0,0 +1,60 @@
+"""Download queue entry model, keeping each mod in the download queue at most once."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .. import db
+
+
+class DownloadQueueEntry(db.Model):  # type: ignore[name-defined]
+    """A mod waiting to be, or being, downloaded (or updated) by a queued download.
+
+    Each mod is queued at most once, so asking for a mod which is already
+    queued or in flight merges the request into that download rather than
+    starting a second one racing it.
+
+    Attributes:
+        id: Primary key identifier
+        mod_id: Foreign key to the mod (unique)
+        reservation_id: Foreign key to the download (its disk reservation) the mod is queued under
+        created_at: When the mod was queued
+    """
+
+    __tablename__ = "download_queue"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mod_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("mods.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    reservation_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("disk_reservations.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), nullable=False
+    )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert download queue entry to dictionary representation.
+
+        Returns:
+            Dictionary containing download queue entry data
+        """
+        return {
+            "id": self.id,
+            "mod_id": self.mod_id,
+            "reservation_id": self.reservation_id,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    def __repr__(self) -> str:
+        """String representation of DownloadQueueEntry instance."""
+        return (
+            f"<DownloadQueueEntry mod={self.mod_id} reservation={self.reservation_id}>"
+        )
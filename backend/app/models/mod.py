@@ -4,14 +4,18 @@ import enum
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import Boolean, DateTime, Enum, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Enum, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
 
 from .. import db
 
 if TYPE_CHECKING:
     from .mod_collection_entry import ModCollectionEntry
+    from .mod_file_link import ModFileLink
     from .mod_image import ModImage
+    from .mod_manifest import ModManifest
+    from .mod_snapshot import ModSnapshot
 
 
 class ModType(enum.Enum):
@@ -34,6 +38,9 @@ class ModStatus(enum.Enum):
         "uninstall_failed"  # an uninstall of the mod was requested, but failed
     )
     update_requested = "update_requested"  # essentially, a reinstall was requested
+    corrupt = (
+        "corrupt"  # verification found the mod's files missing, truncated or altered
+    )
 
 
 class Mod(db.Model):  # type: ignore[name-defined]
@@ -58,16 +65,23 @@ class Mod(db.Model):  # type: ignore[name-defined]
         steam_last_updated: When mod was last updated on Steam
         should_update If this mod should be kept up-to-date when update operations are run
         status: The current state of the mod
+        preview_url: Steam CDN URL of the mod's preview image
+        image_pending: Whether the preview image is still waiting to be fetched in the background
+        updated_at: When the mod's record was last modified
     """
 
     __tablename__ = "mods"
+    __table_args__ = (
+        # keyset pagination when listing mods sorted by name
+        Index("ix_mods_name_id", "name", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     steam_id: Mapped[int | None] = mapped_column(Integer, unique=True, index=True)
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     mod_type: Mapped[ModType] = mapped_column(
-        Enum(ModType), default=ModType.mod, nullable=False
+        Enum(ModType), default=ModType.mod, nullable=False, index=True
     )
     local_path: Mapped[str | None] = mapped_column(String(500))
     arguments: Mapped[str | None] = mapped_column(Text)
@@ -77,7 +91,12 @@ class Mod(db.Model):  # type: ignore[name-defined]
     steam_last_updated: Mapped[datetime | None] = mapped_column(DateTime)
     should_update: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     status: Mapped[ModStatus] = mapped_column(
-        Enum(ModStatus), default=ModStatus.not_installed, nullable=False
+        Enum(ModStatus), default=ModStatus.not_installed, nullable=False, index=True
+    )
+    preview_url: Mapped[str | None] = mapped_column(String(500))
+    image_pending: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), onupdate=func.now(), nullable=False, index=True
     )
 
     # Relationships
@@ -87,6 +106,18 @@ class Mod(db.Model):  # type: ignore[name-defined]
     collection_entries: Mapped[list["ModCollectionEntry"]] = relationship(
         "ModCollectionEntry", back_populates="mod", cascade="all, delete-orphan"
     )
+    manifest: Mapped["ModManifest | None"] = relationship(
+        "ModManifest", back_populates="mod", cascade="all, delete-orphan"
+    )
+    file_links: Mapped[list["ModFileLink"]] = relationship(
+        "ModFileLink", back_populates="mod", cascade="all, delete-orphan"
+    )
+    snapshots: Mapped[list["ModSnapshot"]] = relationship(
+        "ModSnapshot",
+        back_populates="mod",
+        cascade="all, delete-orphan",
+        order_by="ModSnapshot.id",
+    )
 
     def to_dict(self) -> dict[str, Any]:
         """Convert mod instance to dictionary representation.
@@ -111,6 +142,8 @@ class Mod(db.Model):  # type: ignore[name-defined]
             ),
             "should_update": self.should_update,
             "status": self.status.value,
+            "image_pending": self.image_pending,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
     def __repr__(self) -> str:
@@ -26,6 +26,7 @@ class ModCollectionEntry(db.Model):  # type: ignore[name-defined]
         mod_id: Foreign key to mod
         load_order: The order in which to load the mod on the server
         added_at: When mod was added to collection
+        updated_at: When the entry was last modified (e.g. re-ordered)
     """
 
     __tablename__ = "mod_collection_entries"
@@ -44,6 +45,9 @@ class ModCollectionEntry(db.Model):  # type: ignore[name-defined]
     added_at: Mapped[datetime] = mapped_column(
         DateTime, default=func.now(), nullable=False
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), onupdate=func.now(), nullable=False, index=True
+    )
 
     # Relationships
     collection: Mapped["Collection"] = relationship(
@@ -66,6 +70,7 @@ class ModCollectionEntry(db.Model):  # type: ignore[name-defined]
             "mod_id": self.mod_id,
             "load_order": self.load_order,
             "added_at": self.added_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
         }
 
         if include_mod_details and self.mod:
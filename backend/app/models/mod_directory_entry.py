@@ -0,0 +1,54 @@
+"""Mod directory entry model backing the filesystem state index."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .. import db
+
+
+class ModDirectoryEntry(db.Model):  # type: ignore[name-defined]
+    """Entry directly beneath an indexed mod directory.
+
+    Rows mirror what exists in MOD_INSTALL_DIR and its mpmissions folder so
+    request handlers can check installation state without touching the disk.
+    Each indexed root is stored as an entry too; a missing root row means that
+    directory has not been scanned yet.
+
+    Attributes:
+        id: Primary key identifier
+        path: Normalized absolute path of the file or directory
+        is_dir: Whether the entry is a directory
+        scanned_at: When the entry was last seen on disk
+    """
+
+    __tablename__ = "mod_directory_entries"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    path: Mapped[str] = mapped_column(
+        String(1000), nullable=False, unique=True, index=True
+    )
+    is_dir: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    scanned_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), nullable=False
+    )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert directory entry to dictionary representation.
+
+        Returns:
+            Dictionary containing directory entry data
+        """
+        return {
+            "id": self.id,
+            "path": self.path,
+            "is_dir": self.is_dir,
+            "scanned_at": self.scanned_at.isoformat(),
+        }
+
+    def __repr__(self) -> str:
+        """String representation of ModDirectoryEntry instance."""
+        return f"<ModDirectoryEntry {self.path}>"
@@ -0,0 +1,58 @@
+"""Mod file link model tracking installed files deduplicated into hardlinks."""
+
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .. import db
+
+if TYPE_CHECKING:
+    from .mod import Mod
+
+
+class ModFileLink(db.Model):  # type: ignore[name-defined]
+    """An installed mod file sharing its contents (as a hardlink) with files of other mods.
+
+    Files with the same content hash make up a link group. Updates replace a
+    mod's files by renaming new copies into place, which only detaches that
+    mod's file from the group; its link is then forgotten.
+
+    Attributes:
+        id: Primary key identifier
+        mod_id: Foreign key to the mod the file belongs to
+        path: File path relative to the mod directory
+        content_hash: BLAKE2b hash of the contents, identifying the link group
+        size: Size of the file in bytes
+    """
+
+    __tablename__ = "mod_file_links"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mod_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("mods.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    path: Mapped[str] = mapped_column(String(500), nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # Relationships
+    mod: Mapped["Mod"] = relationship("Mod", back_populates="file_links")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert mod file link to dictionary representation.
+
+        Returns:
+            Dictionary containing mod file link data
+        """
+        return {
+            "id": self.id,
+            "mod_id": self.mod_id,
+            "path": self.path,
+            "content_hash": self.content_hash,
+            "size": self.size,
+        }
+
+    def __repr__(self) -> str:
+        """String representation of ModFileLink instance."""
+        return f"<ModFileLink mod={self.mod_id} path={self.path}>"
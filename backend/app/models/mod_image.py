@@ -16,14 +16,17 @@ if TYPE_CHECKING:
 class ModImage(db.Model):  # type: ignore[name-defined]
     """Model for storing mod preview images.
 
-    This model stores image data (as blobs) associated with mods
-    for display in the web interface.
+    This model stores image data associated with mods for display in the
+    web interface. The bytes live in the configured image store: either in
+    image_data (as a blob) or in a content-addressed file on disk.
 
     Attributes:
         id: Primary key identifier
         mod_id: Foreign key to associated mod
-        image_data: Binary image data
+        image_data: Binary image data (only for images in the database store)
         content_type: MIME type of the image
+        content_hash: SHA-256 of the image, used as its ETag, cache-busting version and file name on disk
+        storage: Name of the image store holding the bytes ("database" or "filesystem")
         created_at: When image was stored
     """
 
@@ -33,8 +36,11 @@ class ModImage(db.Model):  # type: ignore[name-defined]
     mod_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("mods.id", ondelete="CASCADE"), nullable=False, index=True
     )
-    image_data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # deferred so listing/joining images never pulls the blob unless it is explicitly accessed
+    image_data: Mapped[bytes | None] = mapped_column(LargeBinary, deferred=True)
     content_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    content_hash: Mapped[str | None] = mapped_column(String(64), index=True)
+    storage: Mapped[str] = mapped_column(String(20), default="database", nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=func.now(), nullable=False
     )
@@ -55,7 +61,9 @@ class ModImage(db.Model):  # type: ignore[name-defined]
             "id": self.id,
             "mod_id": self.mod_id,
             "content_type": self.content_type,
-            "size_bytes": len(self.image_data),
+            "content_hash": self.content_hash,
+            "storage": self.storage,
+            "size_bytes": len(self.image_data) if self.image_data is not None else None,
             "created_at": self.created_at.isoformat(),
         }
 
@@ -0,0 +1,76 @@
+"""Mod manifest model recording the files of an installed mod."""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
+
+from .. import db
+
+if TYPE_CHECKING:
+    from .mod import Mod
+
+
+class ModManifest(db.Model):  # type: ignore[name-defined]
+    """Content manifest of an installed mod directory.
+
+    Lists every file in the installed copy so an update only has to replace
+    the files which changed (and delete the ones which were removed), rather
+    than the whole mod. Kept in its own table so mod listings never load it.
+
+    Attributes:
+        id: Primary key identifier
+        mod_id: Foreign key to the mod
+        files: Relative file path to [size in bytes, mtime in nanoseconds, BLAKE2b hash]
+        file_count: Number of files in the mod
+        total_size: Combined size of the files, in bytes
+        updated_at: When the manifest was last recorded
+    """
+
+    __tablename__ = "mod_manifests"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mod_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("mods.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+        index=True,
+    )
+    files: Mapped[dict[str, list]] = mapped_column(JSON, nullable=False)
+    file_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_size: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    # Relationships
+    mod: Mapped["Mod"] = relationship("Mod", back_populates="manifest")
+
+    def to_dict(self, include_files: bool = False) -> dict[str, Any]:
+        """Convert mod manifest to dictionary representation.
+
+        Args:
+            include_files: Whether to include the per-file entries
+
+        Returns:
+            Dictionary containing mod manifest data
+        """
+        result = {
+            "id": self.id,
+            "mod_id": self.mod_id,
+            "file_count": self.file_count,
+            "total_size": self.total_size,
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+        if include_files:
+            result["files"] = self.files
+
+        return result
+
+    def __repr__(self) -> str:
+        """String representation of ModManifest instance."""
+        return f"<ModManifest mod={self.mod_id} files={self.file_count}>"
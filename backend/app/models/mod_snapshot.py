@@ -0,0 +1,74 @@
+"""Mod snapshot model recording a backed-up version of an installed mod."""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
+
+from .. import db
+
+if TYPE_CHECKING:
+    from .mod import Mod
+
+
+class ModSnapshot(db.Model):  # type: ignore[name-defined]
+    """Backup of one version of an installed mod directory.
+
+    Snapshots live under MOD_BACKUP_DIR. Files which haven't changed since the
+    mod's previous snapshot are hardlinks to that snapshot's copy, so only the
+    files a version actually changed take up additional disk space.
+
+    Attributes:
+        id: Primary key identifier
+        mod_id: Foreign key to the mod
+        path: Directory holding the snapshot's files
+        files: Relative file path to [size in bytes, mtime in nanoseconds, BLAKE2b hash]
+        file_count: Number of files in the snapshot
+        total_size: Combined size of the files, in bytes
+        copied_size: Bytes copied for this snapshot (the rest are hardlinks to the previous one)
+        mod_last_updated: When the snapshotted version of the mod was installed
+        created_at: When the snapshot was taken
+    """
+
+    __tablename__ = "mod_snapshots"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mod_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("mods.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    path: Mapped[str] = mapped_column(String(500), nullable=False)
+    files: Mapped[dict[str, list]] = mapped_column(JSON, nullable=False)
+    file_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_size: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    copied_size: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    mod_last_updated: Mapped[datetime | None] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), nullable=False
+    )
+
+    # Relationships
+    mod: Mapped["Mod"] = relationship("Mod", back_populates="snapshots")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert mod snapshot to dictionary representation.
+
+        Returns:
+            Dictionary containing mod snapshot data
+        """
+        return {
+            "id": self.id,
+            "mod_id": self.mod_id,
+            "file_count": self.file_count,
+            "total_size": self.total_size,
+            "copied_size": self.copied_size,
+            "mod_last_updated": (
+                self.mod_last_updated.isoformat() if self.mod_last_updated else None
+            ),
+            "created_at": self.created_at.isoformat(),
+        }
+
+    def __repr__(self) -> str:
+        """String representation of ModSnapshot instance."""
+        return f"<ModSnapshot mod={self.mod_id} id={self.id}>"
@@ -0,0 +1,123 @@
+"""Resource version counters used to validate cached API responses."""
+
+from typing import Any
+
+from sqlalchemy import Integer, String, event, inspect, update
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from .. import db
+from .collection import Collection
+from .mod import Mod
+from .mod_collection_entry import ModCollectionEntry
+from .mod_image import ModImage
+from .notification import Notification
+from .schedule import Schedule
+from .server_config import ServerConfig
+from .task_log import TaskLogEntry
+
+
+class ResourceVersion(db.Model):  # type: ignore[name-defined]
+    """Monotonic version counter for a group of API resources.
+
+    Every change to the columns of a model listed in RESOURCE_DEPENDENCIES
+    bumps the counters of the resources whose API representation includes that
+    model, in the same transaction as the write. Flushes touching nothing an
+    ETag is derived from leave the counters alone. Read endpoints derive their
+    ETags from these counters, so checking If-None-Match costs a single
+    primary-key lookup.
+
+    Attributes:
+        name: Resource name, e.g. "mods"
+        version: Incremented on every change to the resource
+    """
+
+    __tablename__ = "resource_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert resource version to dictionary representation.
+
+        Returns:
+            Dictionary containing resource version data
+        """
+        return {
+            "name": self.name,
+            "version": self.version,
+        }
+
+    def __repr__(self) -> str:
+        """String representation of ResourceVersion instance."""
+        return f"<ResourceVersion {self.name}={self.version}>"
+
+
+# which ETag-serving API resources embed each model, e.g. collections (and the servers using them) include mod
+# details, and mod listings include each mod's image hash. Models no such resource includes (e.g. manifests, snapshots
+# or download bookkeeping) are left out, so writing them never invalidates cached responses
+RESOURCE_DEPENDENCIES: dict[type, tuple[str, ...]] = {
+    Mod: ("mods", "collections", "servers"),
+    ModImage: ("mods",),
+    Collection: ("collections", "servers"),
+    ModCollectionEntry: ("collections", "servers"),
+    ServerConfig: ("servers",),
+    Schedule: ("schedules",),
+    TaskLogEntry: ("schedules",),
+    Notification: ("notifications",),
+}
+RESOURCES = sorted({name for names in RESOURCE_DEPENDENCIES.values() for name in names})
+
+
+def _bump(session: Session, resources: set[str]) -> None:
+    """Increment the counters of the given resources."""
+    if resources:
+        session.connection().execute(
+            update(ResourceVersion.__table__)
+            .where(ResourceVersion.__table__.c.name.in_(sorted(resources)))
+            .values(version=ResourceVersion.__table__.c.version + 1)
+        )
+
+
+def _columns_changed(obj: Any) -> bool:
+    """Whether any column of a persistent object has changed, ignoring changes to its relationships alone."""
+    # e.g. a mod's manifest or snapshots, which each bump (or don't bump) resources as models of their own
+    state = inspect(obj)
+    return any(
+        state.attrs[column.key].history.has_changes()
+        for column in state.mapper.column_attrs
+    )
+
+
+@event.listens_for(ResourceVersion.__table__, "after_create")
+def _seed_resource_versions(target: Any, connection: Any, **kwargs: Any) -> None:
+    """Create a counter row for every resource alongside the table."""
+    connection.execute(
+        target.insert(), [{"name": name, "version": 0} for name in RESOURCES]
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_flushed_resources(
+    session: Session, flush_context: Any, instances: Any
+) -> None:
+    """Bump the counters of every resource whose representation the pending flush changes."""
+    resources: set[str] = set()
+    for obj in [*session.new, *session.deleted]:
+        resources.update(RESOURCE_DEPENDENCIES.get(type(obj), ()))
+    for obj in session.dirty:
+        if type(obj) in RESOURCE_DEPENDENCIES and _columns_changed(obj):
+            resources.update(RESOURCE_DEPENDENCIES[type(obj)])
+    _bump(session, resources)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_bulk_resources(orm_execute_state: Any) -> None:
+    """Bump the counters for bulk UPDATE/DELETE statements, which bypass the flush."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        _bump(
+            orm_execute_state.session,
+            set(RESOURCE_DEPENDENCIES.get(mapper.class_, ())),
+        )
@@ -21,6 +21,8 @@ class ScheduleAction(enum.Enum):
     server_stop = "server_stop"
     server_restart = "server_restart"
     mod_update = "mod_update"
+    mod_verify = "mod_verify"
+    mod_dedup = "mod_dedup"
 
 
 class ScheduleName(enum.Enum):
@@ -0,0 +1,77 @@
+"""Tombstone model recording deleted rows for incremental sync."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Integer, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .. import db
+from .collection import Collection
+from .mod import Mod
+from .mod_collection_entry import ModCollectionEntry
+
+
+class Tombstone(db.Model):  # type: ignore[name-defined]
+    """Record of a deleted mod, collection or collection entry.
+
+    Clients polling for changes use tombstones to learn which rows they
+    should drop. Rows are written automatically whenever a tracked model is
+    deleted through the ORM (including cascaded deletes).
+
+    Attributes:
+        id: Primary key identifier
+        table_name: Table the deleted row belonged to
+        record_id: Primary key of the deleted row
+        deleted_at: When the row was deleted
+    """
+
+    __tablename__ = "tombstones"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(64), nullable=False)
+    record_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), nullable=False, index=True
+    )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert tombstone to dictionary representation.
+
+        Returns:
+            Dictionary containing tombstone data
+        """
+        return {
+            "id": self.id,
+            "table_name": self.table_name,
+            "record_id": self.record_id,
+            "deleted_at": self.deleted_at.isoformat(),
+        }
+
+    def __repr__(self) -> str:
+        """String representation of Tombstone instance."""
+        return f"<Tombstone {self.table_name} {self.record_id}>"
+
+
+# models whose deletions are reported to clients polling for changes
+TRACKED_MODELS = (Mod, Collection, ModCollectionEntry)
+
+
+def _record_tombstone(mapper: Any, connection: Any, target: Any) -> None:
+    """Write a tombstone for a row deleted through the ORM.
+
+    Runs inside the flush, so the tombstone is committed (or rolled back)
+    together with the delete itself.
+    """
+    connection.execute(
+        Tombstone.__table__.insert().values(
+            table_name=target.__tablename__,
+            record_id=target.id,
+            deleted_at=func.now(),
+        )
+    )
+
+
+for _model in TRACKED_MODELS:
+    event.listen(_model, "after_delete", _record_tombstone)
@@ -6,6 +6,8 @@ from celery.result import AsyncResult
 from flask import Blueprint, current_app, request
 
 from app.tasks.background import task_trigger
+from app.utils.etag import conditional_get
+from app.utils.helpers import TaskStatus
 
 api_bp = Blueprint("api", __name__)
 
@@ -35,6 +37,13 @@ def async_status(job_id: str) -> tuple[dict[str, str], int]:
                 "status": result.status,
                 "message": "Completed successfully",
             }, HTTPStatus.OK
+        elif result.state == TaskStatus.progress and isinstance(result.info, dict):
+            # downloads publish byte counts, throughput and ETA while they run
+            return {
+                "status": result.status,
+                "message": result.info.get("message", ""),
+                "progress": result.info,
+            }, HTTPStatus.OK
         else:
             return {
                 "status": result.status,
@@ -48,6 +57,7 @@ def async_status(job_id: str) -> tuple[dict[str, str], int]:
 
 
 @api_bp.route("/schedules", methods=["GET"])
+@conditional_get("schedules")
 def get_schedules() -> tuple[dict[str, str], int]:
     """
     Retrieves all user-defined schedules
@@ -80,6 +90,7 @@ def get_schedule_404() -> tuple[dict[str, str], int]:
 
 
 @api_bp.route("/schedule/results", methods=["GET"])
+@conditional_get("schedules")
 def get_all_schedule_results() -> tuple[dict[str, str], int]:
     """
     Retrieve results of all scheduled tasks
@@ -131,6 +142,7 @@ def create_schedule() -> tuple[dict[str, str], int]:
 
 
 @api_bp.route("/schedule/<int:schedule_id>", methods=["GET"])
+@conditional_get("schedules")
 def get_schedule(schedule_id: int) -> tuple[dict[str, str], int]:
     """
     Retrieves information about a specific schedule
@@ -189,6 +201,7 @@ def delete_schedule(schedule_id: int) -> tuple[dict[str, str], int]:
 
 
 @api_bp.route("/schedule/<int:schedule_id>results", methods=["GET"])
+@conditional_get("schedules")
 def get_single_schedule_results(schedule_id: int) -> tuple[dict[str, str], int]:
     """
     Retrieve results of a specific scheduled task
@@ -233,6 +246,7 @@ def trigger_schedule(schedule_id: int) -> tuple[dict[str, str], int]:
 
 
 @api_bp.route("/notifications", methods=["GET"])
+@conditional_get("notifications")
 def get_notifications() -> tuple[dict[str, str], int]:
     """
     Retrieves all user-defined notifications
@@ -287,6 +301,7 @@ def create_notification() -> tuple[dict[str, str], int]:
 
 
 @api_bp.route("/notification/<int:notification_id>", methods=["GET"])
+@conditional_get("notifications")
 def get_notification(notification_id: int) -> tuple[dict[str, str], int]:
     """
     Retrieves information about a specific notification
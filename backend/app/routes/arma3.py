@@ -1,19 +1,24 @@
 from http import HTTPStatus
 from typing import Any
 
-from flask import Blueprint, Response, current_app, request
+from flask import Blueprint, Response, current_app, request, send_file
 
 from app.tasks.background import (
+    dedup_arma3_mods,
     download_arma3_mod,
+    download_arma3_mods,
     headless_client_start,
     headless_client_stop,
     mod_update,
     remove_arma3_mod,
+    rollback_arma3_mod,
     server_start,
     server_stop,
     server_update,
     update_arma3_mod,
+    verify_arma3_mods,
 )
+from app.utils.etag import conditional_get
 
 a3_bp = Blueprint("arma3", __name__)
 
@@ -87,18 +92,71 @@ def get_mod_overview(mod_id: int) -> tuple[dict[str, str], int]:
 
 
 @a3_bp.route("/mod/subscriptions", methods=["GET"])
+@conditional_get("mods")
 def get_mod_subscriptions() -> tuple[dict[str, str], int]:
     """
     Retrieve a list of existing mod subscriptions.
+    Without any URL parameters every subscription is returned. Passing "limit" (or any filter) switches to
+    keyset pagination; pass the returned "next_cursor" as "cursor" to fetch the following page.
+    URL parameters (all optional):
+        limit: page size (default 100, max 500)
+        cursor: opaque cursor from the previous page
+        sort: "id" (default) or "name"
+        order: "asc" (default) or "desc"
+        status: comma-separated mod statuses, e.g. "installed,install_failed"
+        mod_type: comma-separated mod types, e.g. "mod,map"
+        server_mod: "true" or "false"
+        should_update: "true" or "false"
+        search: case-insensitive name substring, or an exact steam ID
     :return:
-        JSON response with list of existing mod subscriptions
+        JSON response with list of existing mod subscriptions (and "next_cursor" when paginating)
     """
+    str_to_bool = {
+        "true": True,
+        "false": False,
+    }
+    paginated_params = [
+        "limit",
+        "cursor",
+        "sort",
+        "order",
+        "status",
+        "mod_type",
+        "server_mod",
+        "should_update",
+        "search",
+    ]
     try:
+        if not any(param in request.args for param in paginated_params):
+            return (
+                {
+                    "results": current_app.config["MOD_MANAGERS"][
+                        "ARMA3"
+                    ].get_subscribed_mods(),
+                    "message": "Retrieved successfully",
+                },
+                HTTPStatus.OK,
+            )
+
+        filters = {
+            "status": [x for x in request.args.get("status", "").split(",") if x],
+            "mod_type": [x for x in request.args.get("mod_type", "").split(",") if x],
+            "search": request.args.get("search"),
+        }
+        for flag in ["server_mod", "should_update"]:
+            if flag in request.args:
+                filters[flag] = str_to_bool[request.args[flag].lower()]
+        page = current_app.config["MOD_MANAGERS"]["ARMA3"].get_subscribed_mods_page(
+            limit=int(request.args.get("limit", 100)),
+            cursor=request.args.get("cursor"),
+            sort=request.args.get("sort", "id"),
+            descending=request.args.get("order", "asc").lower() == "desc",
+            filters=filters,
+        )
         return (
             {
-                "results": current_app.config["MOD_MANAGERS"][
-                    "ARMA3"
-                ].get_subscribed_mods(),
+                "results": page["results"],
+                "next_cursor": page["next_cursor"],
                 "message": "Retrieved successfully",
             },
             HTTPStatus.OK,
@@ -112,23 +170,47 @@ def get_mod_subscriptions() -> tuple[dict[str, str], int]:
 @a3_bp.route("/mod/subscription", methods=["POST"])
 def add_mod_subscription() -> tuple[dict[str, Any], int]:
     """
-    Adds a mod to the tracked mod list, aka subscribes to it
+    Adds mods to the tracked mod list, aka subscribes to them
+    Each mod succeeds or fails on its own; the request only fails if nothing could be subscribed
     :return:
+        JSON response with the IDs of newly subscribed mods and per-item results
+        {
+            "message": "Successfully subscribed",
+            "ids": [1, 2],
+            "results": [
+                {"steam_id": 450814997, "id": 1, "status": "subscribed"},
+                {"steam_id": 463939057, "id": None, "status": "failed", "message": "<reason>"},
+            ],
+        }
     """
-    created = []
     try:
-        for mod in request.json["mods"]:
-            created.append(
-                current_app.config["MOD_MANAGERS"]["ARMA3"].add_subscribed_mod(
-                    mod["steam_id"]
-                )
-            )
+        results = current_app.config["MOD_MANAGERS"]["ARMA3"].add_subscribed_mods(
+            [mod["steam_id"] for mod in request.json["mods"]]
+        )
     except Exception as e:
         return {
             "message": str(e),
         }, HTTPStatus.BAD_REQUEST
 
-    return {"message": "Successfully subscribed", "ids": created}, HTTPStatus.OK
+    created = [result["id"] for result in results if result["status"] == "subscribed"]
+    failed = [result for result in results if result["status"] != "subscribed"]
+    if failed and not created:
+        return {
+            "message": failed[0]["message"],
+            "ids": created,
+            "results": results,
+        }, HTTPStatus.BAD_REQUEST
+    if failed:
+        return {
+            "message": f"Subscribed to {len(created)} of {len(results)} mods",
+            "ids": created,
+            "results": results,
+        }, HTTPStatus.OK
+    return {
+        "message": "Successfully subscribed",
+        "ids": created,
+        "results": results,
+    }, HTTPStatus.OK
 
 
 @a3_bp.route("/mod/subscription", methods=["GET"])
@@ -143,6 +225,7 @@ def mod_subscription_not_found() -> tuple[dict[str, str], int]:
 
 
 @a3_bp.route("/mod/subscription/<int:mod_id>", methods=["GET"])
+@conditional_get("mods")
 def get_mod_subscription_details(mod_id: int) -> tuple[dict[str, str], int]:
     """
     Retrieves details about a specific mod
@@ -199,26 +282,60 @@ def remove_mod_subscription(mod_id: int) -> tuple[dict[str, str], int]:
         }, HTTPStatus.BAD_REQUEST
 
 
-@a3_bp.route("/mod/subscription/<int:mod_id>/image", methods=["GET"])
+@a3_bp.route("/mod/subscription/<int:mod_id>/image", methods=["GET", "HEAD"])
 def get_mod_subscription_image(
     mod_id: int,
 ) -> tuple[Response, int] | tuple[dict[str, str], int]:
     """
     Retrieves image for a specific mod
+    The image's content hash is sent as its ETag, so unchanged images are answered with a 304 (without reading the
+    image bytes). Requests which pass the hash as "v" (the "image_hash" reported in mod listings) are cached by
+    the browser indefinitely, since a new image means a new URL
+    URL parameters (optional):
+        v: the image's content hash
+        size: thumbnail size in pixels (see IMAGE_THUMBNAIL_SIZES); the original is sent if there is no such thumbnail
     :return:
         Image content ONLY, or a JSON blob indicating the image could not be found
     """
     try:
-        image = current_app.config["MOD_MANAGERS"]["ARMA3"].get_subscribed_mod_image(
-            mod_id
-        )
-        return (
-            Response(
-                image["image_data"],
-                headers={"Content-Type": image["content_type"]},
-            ),
-            HTTPStatus.OK,
+        mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+        size = request.args.get("size", type=int)
+        image = mod_manager.get_subscribed_mod_image(
+            mod_id, include_data=False, size=size
         )
+        not_modified = request.if_none_match.contains_weak(image["etag"])
+        if "path" in image and not not_modified:
+            # streamed from disk (zero-copy where the WSGI server supports it)
+            response = send_file(
+                image["path"],
+                mimetype=image["content_type"],
+                etag=image["etag"],
+                last_modified=image["created_at"],
+            )
+        else:
+            if request.method == "HEAD" or not_modified:
+                response = Response(content_type=image["content_type"])
+                response.content_length = image["size_bytes"]
+            else:
+                image = mod_manager.get_subscribed_mod_image(mod_id, size=size)
+                response = Response(
+                    image["image_data"], content_type=image["content_type"]
+                )
+            response.set_etag(image["etag"])
+            response.last_modified = image["created_at"]
+        if request.args.get("v") == image["content_hash"]:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        if not_modified:
+            # a 304 carries the validators and caching headers but no body (or body length)
+            response.headers.pop("Content-Length", None)
+            return response, HTTPStatus.NOT_MODIFIED
+        # send_file may have answered a range request with a 206
+        return response, response.status_code
     except AttributeError:
         return {
             "message": "Image not found",
@@ -259,6 +376,60 @@ def trigger_mod_update(
     }, HTTPStatus.OK
 
 
+@a3_bp.route("/mod/<int:mod_id>/download/queue", methods=["GET"])
+def get_mod_download_queue_position(mod_id: int) -> tuple[dict[str, Any], int]:
+    """
+    Looks up where a mod is in the download queue
+    :return:
+        JSON response with the download the mod is queued under (and its "position", 0 once in flight) and the
+        queue "depth"
+    """
+    position = current_app.config["DOWNLOAD_QUEUE_HELPER"].get_mod_position(mod_id)
+    if position is None:
+        return {
+            "message": "Mod not queued",
+        }, HTTPStatus.NOT_FOUND
+    return {
+        "results": position,
+        "message": "Retrieved successfully",
+    }, HTTPStatus.OK
+
+
+@a3_bp.route("/mod/<int:mod_id>/snapshots", methods=["GET"])
+def get_mod_snapshots(mod_id: int) -> tuple[dict[str, Any], int]:
+    """
+    Lists the snapshots (backups of previous versions) of an installed mod, oldest first
+    :return:
+        JSON response with the snapshots
+    """
+    try:
+        return {
+            "results": current_app.config["MOD_MANAGERS"]["ARMA3"].get_mod_snapshots(
+                mod_id
+            ),
+            "message": "Retrieved successfully",
+        }, HTTPStatus.OK
+    except AttributeError:
+        return {
+            "message": "Mod not found",
+        }, HTTPStatus.NOT_FOUND
+
+
+@a3_bp.route("/mod/<int:mod_id>/snapshot/<int:snapshot_id>/rollback", methods=["POST"])
+def trigger_mod_rollback(
+    mod_id: int, snapshot_id: int
+) -> tuple[Response, int] | tuple[dict[str, str], int]:
+    """
+    Rolls an installed mod back to one of its snapshots (which also turns off its automatic updates)
+    :return:
+        JSON response with message and async job ID (to look up job status)
+    """
+    return {
+        "status": rollback_arma3_mod.delay(mod_id, snapshot_id).id,
+        "message": "Rollback queued",
+    }, HTTPStatus.OK
+
+
 @a3_bp.route("/mods/update", methods=["POST"])
 def trigger_all_mod_update() -> tuple[Response, int] | tuple[dict[str, str], int]:
     return {
@@ -267,7 +438,135 @@ def trigger_all_mod_update() -> tuple[Response, int] | tuple[dict[str, str], int
     }, HTTPStatus.OK
 
 
+@a3_bp.route("/mods/download", methods=["POST"])
+def trigger_bulk_mod_download() -> tuple[Response, int] | tuple[dict[str, str], int]:
+    """
+    Downloads many subscribed mods at once, several per steamcmd session
+    Must contain a JSON blob of the mod IDs to download:
+        {"mods": [1, 2, 3]}
+    :return:
+        JSON response with message and async job ID (to look up job status)
+    """
+    try:
+        mod_ids = [int(mod_id) for mod_id in request.json["mods"]]
+        if not mod_ids:
+            raise ValueError("No mods to download")
+        return {
+            "status": download_arma3_mods.delay(mod_ids).id,
+            "message": "Mod downloads queued",
+        }, HTTPStatus.OK
+    except Exception as e:
+        return {
+            "message": str(e),
+        }, HTTPStatus.BAD_REQUEST
+
+
+@a3_bp.route("/mods/download/queue", methods=["GET"])
+def get_download_queue() -> tuple[dict[str, Any], int]:
+    """
+    Lists the downloads (and updates) in the download queue: those in flight, then those waiting in the order
+    they'll start, with the queue depth and the free and reserved space on the staging and install filesystems
+    :return:
+        JSON response with the "reservations" (each with its "position", 0 once in flight), "depth" and
+        "filesystems"
+    """
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    return {
+        "results": current_app.config["DISK_ADMISSION_HELPER"].get_queue(
+            [mod_manager.staging_dir, mod_manager.dst_dir, mod_manager.mission_dir]
+        ),
+        "message": "Retrieved successfully",
+    }, HTTPStatus.OK
+
+
+@a3_bp.route("/mods/verify", methods=["POST"])
+def trigger_mod_verify() -> tuple[Response, int] | tuple[dict[str, str], int]:
+    """
+    Verifies installed mods' files against their manifests, marking any which are damaged as corrupt
+    May contain a JSON blob of the mod IDs to verify (all installed mods if omitted), and whether to re-download
+    the corrupt ones:
+        {"mods": [1, 2, 3], "redownload": true}
+    :return:
+        JSON response with message and async job ID (to look up job status)
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        mod_ids = [int(mod_id) for mod_id in body.get("mods") or []]
+        return {
+            "status": verify_arma3_mods.delay(
+                0, mod_ids or None, bool(body.get("redownload"))
+            ).id,
+            "message": "Mod verification queued",
+        }, HTTPStatus.OK
+    except Exception as e:
+        return {
+            "message": str(e),
+        }, HTTPStatus.BAD_REQUEST
+
+
+@a3_bp.route("/mods/dedup", methods=["POST"])
+def trigger_mod_dedup() -> tuple[Response, int] | tuple[dict[str, str], int]:
+    """
+    Replaces identical read-only files across installed mods with hardlinks to a single copy
+    :return:
+        JSON response with message and async job ID (to look up job status)
+    """
+    return {
+        "status": dedup_arma3_mods.delay().id,
+        "message": "Mod deduplication queued",
+    }, HTTPStatus.OK
+
+
+@a3_bp.route("/mods/dedup", methods=["GET"])
+def get_mod_dedup_summary() -> tuple[dict[str, Any], int]:
+    """
+    Summarises the files shared between installed mods by deduplication
+    :return:
+        JSON response with the number of link groups, the files in them and the bytes stored once instead of per file
+    """
+    return {
+        "results": current_app.config["MOD_MANAGERS"]["ARMA3"].get_link_groups(),
+        "message": "Retrieved successfully",
+    }, HTTPStatus.OK
+
+
+@a3_bp.route("/mod/changes", methods=["GET"])
+def get_mod_changes() -> tuple[dict[str, str], int]:
+    """
+    Returns the mods, collections and collection entries created, changed or deleted since a cursor
+        Clients should call this without "since" once, then pass the returned "cursor" on each refresh.
+        When "full_sync" is true the results are a complete snapshot and should replace local state
+    URL parameters (optional):
+        since: the "cursor" returned by the previous call
+    :return:
+        JSON response with the changes, the deleted IDs per table and the next cursor
+    """
+    try:
+        changes = current_app.config["MOD_MANAGERS"]["ARMA3"].get_changes_since(
+            request.args.get("since")
+        )
+        return (
+            {
+                "results": {
+                    "mods": changes["mods"],
+                    "collections": changes["collections"],
+                    "collection_entries": changes["collection_entries"],
+                    "deleted": changes["deleted"],
+                },
+                "cursor": changes["cursor"],
+                "full_sync": changes["full_sync"],
+                "message": "Retrieved successfully",
+            },
+            HTTPStatus.OK,
+        )
+    except Exception as e:
+        return {
+            "message": str(e),
+        }, HTTPStatus.BAD_REQUEST
+
+
 @a3_bp.route("/mod/collections", methods=["GET"])
+@conditional_get("collections")
 def get_mod_collections() -> tuple[dict[str, str], int]:
     """
     Returns all currently defined collections
@@ -327,6 +626,7 @@ def create_mod_collection() -> tuple[dict[str, str], int]:
 
 
 @a3_bp.route("/mod/collection/<int:collection_id>", methods=["GET"])
+@conditional_get("collections")
 def get_mod_collection(collection_id: int) -> tuple[dict[str, str], int]:
     """
     Returns all currently defined collections
@@ -487,6 +787,7 @@ def delete_mod_from_collection(
 
 
 @a3_bp.route("/servers", methods=["GET"])
+@conditional_get("servers", weak=True, refresh_interval=10)
 def get_servers() -> tuple[dict[str, str], int]:
     """
     Retrieves all user-defined servers
@@ -581,6 +882,7 @@ def stop_server() -> tuple[dict[str, str], int]:
 
 
 @a3_bp.route("/server/<int:server_id>", methods=["GET"])
+@conditional_get("servers", weak=True, refresh_interval=10)
 def get_server(server_id: int) -> tuple[dict[str, str], int]:
     """
     Retrieves information about a specific server
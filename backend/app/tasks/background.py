@@ -6,23 +6,32 @@ import subprocess
 import time
 from datetime import datetime
 
+import httpx
 from celery import current_task, shared_task
 from flask import current_app
+from sqlalchemy import select, update
 from sqlalchemy.sql import and_
 
-from app import db
+from app import celery, db
+from app.models.disk_reservation import DiskReservation, ReservationState
 from app.models.mod import Mod, ModStatus, ModType
+from app.models.mod_image import ModImage
+from app.models.mod_snapshot import ModSnapshot
 from app.models.schedule import Schedule
 from app.models.server_config import ServerConfig
 from app.utils.helpers import TaskStatus
 
 
 @shared_task
-def download_arma3_mod(mod_id: int) -> None:
+def download_arma3_mod(mod_id: int, reservation_id: int | None = None) -> None:
     """
     Downloads a subscribed, NOT ALREADY DOWNLOADED Arma 3 mod
+        Waits its turn in the download queue, and for (or fails without) the disk space it needs, see
+        _admit_download
     :param mod_id:
         INT, the subscribed mod ID to download
+    :param reservation_id:
+        INT, the disk reservation the download was queued or deferred with, if any
     :return:
         N/A, though the result is stored in the task output
     """
@@ -59,6 +68,14 @@ def download_arma3_mod(mod_id: int) -> None:
             msg=f"Arma 3 mod {mod_id} already downloaded or download already requested",
         )
         return
+    decision, reservation_id, _ = _admit_download(
+        "download_arma3_mod", [mod_id], [mod_data], "mod_download", 0, reservation_id
+    )
+    if decision == "rejected":
+        mod_data.status = ModStatus.install_failed
+        db.session.commit()
+    if decision != "admitted":
+        return
     mod_data.status = ModStatus.install_requested
     db.session.commit()
 
@@ -77,10 +94,19 @@ def download_arma3_mod(mod_id: int) -> None:
             mod_data.steam_id,
             mod_dir,
             mod_data.mod_type == ModType.mission,
+            progress_callback=helper.progress_reporter(current_task),
         )
         mod_data.local_path = mod_dir
         mod_data.last_updated = datetime.now()
         mod_data.status = ModStatus.installed
+        current_app.config["MOD_MANAGERS"]["ARMA3"].directory_index.add(
+            mod_dir, is_dir=mod_data.mod_type != ModType.mission
+        )
+        if mod_data.mod_type != ModType.mission:
+            current_app.config["MOD_MANAGERS"]["ARMA3"].save_manifest(
+                mod_data,
+                current_app.config["MOD_MANAGERS"]["ARMA3"].build_manifest(mod_dir),
+            )
     except Exception:
         mod_data.status = ModStatus.install_failed
         db.session.commit()
@@ -94,6 +120,8 @@ def download_arma3_mod(mod_id: int) -> None:
             msg=f"Failed to download Arma 3 mod {mod_id}",
         )
         return
+    finally:
+        _release_download(reservation_id)
     db.session.commit()
 
     helper.update_task_state(
@@ -108,13 +136,291 @@ def download_arma3_mod(mod_id: int) -> None:
 
 
 @shared_task
-def update_arma3_mod(mod_id: int, schedule_id: int = 0) -> None:
+def download_arma3_mods(
+    mod_ids: list[int], schedule_id: int = 0, reservation_id: int | None = None
+) -> dict:
+    """
+    Downloads many subscribed, NOT ALREADY DOWNLOADED Arma 3 mods, several per steamcmd session
+        Waits its turn in the download queue, and for (or fails without) the disk space they need, see
+        _admit_download
+    :param mod_ids:
+        LIST, the subscribed mod IDs to download
+    :param schedule_id:
+    :param reservation_id:
+        INT, the disk reservation the downloads were queued or deferred with, if any
+    :return:
+        Dict with the mod IDs which "succeeded" and which "failed" (empty if the downloads haven't started yet, or
+        were all merged into other downloads)
+    """
+    helper = current_app.config["TASK_HELPER"]
+    mods = Mod.query.filter(
+        Mod.id.in_(mod_ids),
+        Mod.status.not_in([ModStatus.install_requested, ModStatus.installed]),
+    ).all()
+    skipped = set(mod_ids) - {mod.id for mod in mods}
+    if skipped:
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type="mod_download",
+            level="warn",
+            status=TaskStatus.running,
+            msg=f"Skipping Arma 3 mods not found, already downloaded or already requested: {sorted(skipped)}",
+        )
+    decision, reservation_id, mods = _admit_download(
+        "download_arma3_mods",
+        [mod_ids, schedule_id],
+        mods,
+        "mod_download",
+        schedule_id,
+        reservation_id,
+    )
+    if decision == "rejected":
+        for mod in mods:
+            mod.status = ModStatus.install_failed
+        db.session.commit()
+        return {"succeeded": [], "failed": [mod.id for mod in mods]}
+    if decision != "admitted":
+        return {}
+    for mod in mods:
+        mod.status = ModStatus.install_requested
+    db.session.commit()
+    try:
+        return _download_mods(mods, schedule_id, "mod_download")
+    finally:
+        _release_download(reservation_id)
+
+
+def _admit_download(
+    task_name: str,
+    args: list,
+    mods: list[Mod],
+    task_type: str,
+    schedule_id: int,
+    reservation_id: int | None,
+) -> tuple[str, int | None, list[Mod]]:
+    """
+    Queues downloading mods (see DownloadQueueHelper) and reserves the disk space they need (see
+    DiskAdmissionHelper)
+        Mods already queued or in flight under another download are merged into it, and left out here. The rest
+        wait their turn: manual requests go before background ones, and mods the server loads before the others.
+        Once the turn comes the task is dispatched again (with the same arguments, and the reservation); if the
+        space isn't free by then, it's queued again to retry later
+    :param task_name:
+        STR, the name of the calling task, e.g. "download_arma3_mods"
+    :param args:
+        LIST, the calling task's positional arguments
+    :param mods:
+        LIST, the mods to download
+    :param task_type:
+        STR, the task type to log against
+    :param schedule_id:
+        INT, the schedule running the task (0 if a user asked for it)
+    :param reservation_id:
+        INT, the reservation the task was queued or deferred with, if any
+    :return:
+        A tuple of the decision, "admitted" (call _release_download once the files are on disk), "queued",
+        "merged" (nothing left to download), "deferred" or "rejected", the reservation's ID, and the mods to
+        download
+    """
+    helper = current_app.config["TASK_HELPER"]
+    admission = current_app.config["DISK_ADMISSION_HELPER"]
+    queue = current_app.config["DOWNLOAD_QUEUE_HELPER"]
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    if reservation_id is not None:
+        reservation = db.session.get(DiskReservation, reservation_id)
+        if reservation is not None and reservation.state == ReservationState.active:
+            # dispatched twice (by its own retry, and by the queue advancing); the other task has it in hand
+            return "merged", reservation_id, []
+
+    reservation = admission.reserve(
+        task_type,
+        [mod.id for mod in mods],
+        mod_manager.space_needed(mods),
+        reservation_id,
+        queue.priority(
+            [mod.id for mod in mods],
+            schedule_id == 0,
+            current_app.config["A3_SERVER_HELPER"].get_loaded_mod_ids(),
+        ),
+        task_name,
+        args,
+    )
+    reservation_id = reservation.id
+    queued, merged = queue.enqueue(reservation, [mod.id for mod in mods])
+    if merged:
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type=task_type,
+            level="info",
+            status=TaskStatus.running,
+            msg=f"Arma 3 mods {sorted(merged)} are already queued or downloading, "
+            f"merged into downloads {sorted(set(merged.values()))}",
+        )
+        mods = [mod for mod in mods if mod.id in queued]
+        if not mods:
+            _release_download(reservation_id)
+            return "merged", reservation_id, []
+        reservation = admission.reserve(
+            task_type,
+            [mod.id for mod in mods],
+            mod_manager.space_needed(mods),
+            reservation_id,
+        )
+
+    if not queue.is_turn(reservation):
+        queue.wait(reservation)
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type=task_type,
+            level="info",
+            status=TaskStatus.aborted,
+            msg=f"Queued {len(mods)} Arma 3 mods for download at position "
+            f"{queue.get_positions()[reservation_id]}; they start once the downloads ahead finish",
+        )
+        return "queued", reservation_id, mods
+    decision, shortfall = admission.admit(reservation)
+    if decision == "deferred":
+        celery.send_task(
+            f"app.tasks.background.{task_name}",
+            args=args,
+            kwargs={"reservation_id": reservation_id},
+            countdown=admission.retry_seconds,
+        )
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type=task_type,
+            level="warn",
+            status=TaskStatus.aborted,
+            msg=f"Not enough disk space to download {len(mods)} Arma 3 mods yet, "
+            f"retrying in {admission.retry_seconds}s ({shortfall})",
+        )
+    elif decision == "rejected":
+        # it was first in line, so let the next one go
+        queue.advance()
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type=task_type,
+            level="error",
+            status=TaskStatus.failed,
+            msg=f"Not enough disk space to download {len(mods)} Arma 3 mods ({shortfall})",
+        )
+    return decision, reservation_id, mods
+
+
+def _release_download(reservation_id: int) -> None:
+    """
+    Takes a finished (or failed) download out of the queue, freeing its reserved space, and dispatches the next
+    in line
+    :param reservation_id:
+        INT, the download's reservation
+    """
+    current_app.config["DISK_ADMISSION_HELPER"].release(reservation_id)
+    current_app.config["DOWNLOAD_QUEUE_HELPER"].advance()
+
+
+def _download_mods(mods: list[Mod], schedule_id: int, task_type: str) -> dict:
+    """
+    Downloads (or updates) mods in batched steamcmd sessions, recording each mod's outcome on its row
+    :param mods:
+        LIST, the mods to download
+    :param schedule_id:
+    :param task_type:
+        STR, the task type to log against, e.g. "mod_update"
+    :return:
+        Dict with the mod IDs which "succeeded" and which "failed"
+    """
+    helper = current_app.config["TASK_HELPER"]
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=schedule_id,
+        task_type=task_type,
+        level="info",
+        status=TaskStatus.running,
+        msg=f"Downloading {len(mods)} Arma 3 mods",
+    )
+    destinations = {mod.id: mod_manager.mod_destination(mod) for mod in mods}
+    errors = mod_manager.download_mods(
+        [
+            {
+                "steam_id": mod.steam_id,
+                "dst_dir": destinations[mod.id],
+                "is_msn": mod.mod_type == ModType.mission,
+                "size": mod.size_bytes,
+            }
+            for mod in mods
+        ],
+        progress_callback=helper.progress_reporter(current_task),
+    )
+
+    outcome: dict[str, list[int]] = {"succeeded": [], "failed": []}
+    for mod in mods:
+        error = errors.get(mod.steam_id)
+        if error:
+            mod.status = ModStatus.install_failed
+            outcome["failed"].append(mod.id)
+            helper.update_task_state(
+                current_task=current_task,
+                current_app=current_app,
+                schedule_id=schedule_id,
+                task_type=task_type,
+                level="error",
+                status=TaskStatus.running,
+                msg=f"Failed to download Arma 3 mod {mod.id}: {error}",
+            )
+            continue
+        mod.local_path = destinations[mod.id]
+        mod.last_updated = datetime.now()
+        mod.status = ModStatus.installed
+        mod_manager.directory_index.add(
+            destinations[mod.id], is_dir=mod.mod_type != ModType.mission
+        )
+        if mod.mod_type != ModType.mission:
+            # lets later updates replace only the files which changed
+            mod_manager.save_manifest(
+                mod, mod_manager.build_manifest(destinations[mod.id])
+            )
+        outcome["succeeded"].append(mod.id)
+    db.session.commit()
+
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=schedule_id,
+        task_type=task_type,
+        level="error" if outcome["failed"] else "info",
+        status=TaskStatus.failed if outcome["failed"] else TaskStatus.success,
+        msg=f"Downloaded {len(outcome['succeeded'])} of {len(mods)} Arma 3 mods",
+    )
+    return outcome
+
+
+@shared_task
+def update_arma3_mod(
+    mod_id: int, schedule_id: int = 0, reservation_id: int | None = None
+) -> None:
     """
     Updates a single Arma 3 mod. Note that this is here as an async task; it should not be scheduled
     Instead, `mod_update` should be used within a schedule (which invokes this task)
+    Waits its turn in the download queue, and for (or fails without) the disk space it needs, see _admit_download
+    The update is staged and swapped in as `mod_update` does, so a failed download or swap leaves the installed
+    version in place
     :param mod_id:
         INT - the subscribed mod ID to update
     :param schedule_id:
+    :param reservation_id:
+        INT, the disk reservation the update was queued or deferred with, if any
     :return:
         N/A, though the result is stored in the task output
     """
@@ -151,46 +457,66 @@ def update_arma3_mod(mod_id: int, schedule_id: int = 0) -> None:
             msg=f"Arma 3 mod {mod_id} not installed",
         )
         return
+    decision, reservation_id, _ = _admit_download(
+        "update_arma3_mod",
+        [mod_id, schedule_id],
+        [mod_data],
+        "mod_update",
+        schedule_id,
+        reservation_id,
+    )
+    if decision != "admitted":
+        # the installed version is untouched
+        return
     mod_data.status = ModStatus.update_requested
     db.session.commit()
 
-    # build the destination path
-    mod_dir = os.path.join(
-        current_app.config["MOD_MANAGERS"]["ARMA3"].dst_dir,
-        f"{mod_data.filename}",
-    )
-    if mod_data.mod_type == "mission":
-        mod_dir = os.path.join(
-            current_app.config["MOD_MANAGERS"]["ARMA3"].mission_dir,
-            f"{mod_data.filename}",
-        )
-
+    # downloaded (and lowercased) alongside the installed copy, which is untouched until the swap
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    destinations = {mod_data.id: mod_manager.mod_destination(mod_data)}
     try:
-        # trigger the actual update
-        current_app.config["MOD_MANAGERS"]["ARMA3"].download_single_mod(
-            mod_data.steam_id,
-            mod_dir,
-            mod_data.mod_type == ModType.mission,
-        )
-
-        # update the DB to reflect this
-        mod_data.local_path = mod_dir
-        mod_data.last_updated = datetime.now()
+        error = mod_manager.download_mods(
+            [
+                {
+                    "steam_id": mod_data.steam_id,
+                    "dst_dir": mod_manager.staged_path(destinations[mod_data.id]),
+                    "is_msn": mod_data.mod_type == ModType.mission,
+                    "size": mod_data.size_bytes,
+                }
+            ],
+            progress_callback=helper.progress_reporter(current_task),
+        )[mod_data.steam_id]
+    finally:
+        _release_download(reservation_id)
+    if error:
+        # the installed version is untouched, so it stays installed
         mod_data.status = ModStatus.installed
-    except Exception as e:
-        mod_data.status = ModStatus.install_failed
         db.session.commit()
+        mod_manager.discard_staged_mods([destinations[mod_data.id]])
         helper.update_task_state(
             current_task=current_task,
             current_app=current_app,
             schedule_id=schedule_id,
-            task_type="mod_download",
+            task_type="mod_update",
             level="error",
             status=TaskStatus.failed,
-            msg=f"Failed to update Arma 3 mod {mod_id}: {str(e)}",
+            msg=f"Failed to update Arma 3 mod {mod_id}: {error}",
+        )
+        return
+
+    _snapshot_mods([mod_data], schedule_id, "mod_update")
+    swap_errors, _ = _apply_mod_updates([mod_data], destinations, schedule_id)
+    if swap_errors:
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type="mod_update",
+            level="error",
+            status=TaskStatus.failed,
+            msg=f"Arma 3 mod {mod_id} update was not applied: {'; '.join(swap_errors)}",
         )
         return
-    db.session.commit()
 
     helper.update_task_state(
         current_task=current_task,
@@ -238,6 +564,7 @@ def remove_arma3_mod(mod_id: int) -> None:
         ModStatus.installed,
         ModStatus.install_failed,
         ModStatus.uninstall_failed,
+        ModStatus.corrupt,
     ]:
         helper.update_task_state(
             current_task=current_task,
@@ -254,6 +581,7 @@ def remove_arma3_mod(mod_id: int) -> None:
 
     try:
         if mod_data.mod_type == ModType.mission:
+            mod_dir = mod_data.local_path
             os.remove(mod_data.local_path)
         else:
             mod_dir = os.path.join(
@@ -261,6 +589,10 @@ def remove_arma3_mod(mod_id: int) -> None:
                 f"@{mod_data.name}",
             )
             shutil.rmtree(mod_dir)
+        for removed_path in {mod_dir, mod_data.local_path} - {None}:
+            current_app.config["MOD_MANAGERS"]["ARMA3"].directory_index.remove(
+                removed_path
+            )
 
         mod_data.local_path = None
         mod_data.last_updated = datetime.now()
@@ -505,12 +837,18 @@ def server_update(schedule_id: int = 0) -> None:
 
 
 @shared_task()
-def mod_update(schedule_id: int = 0) -> None:
+def mod_update(schedule_id: int = 0, reservation_id: int | None = None) -> None:
     """
-    Updates installed and subscribed mods
-    Stops the server, if it's running (restarting it after the mods finish updating)
+    Updates installed and subscribed mods, in two phases to keep server downtime short:
+        1. downloads every update to a staging path next to the installed mod while the server keeps running
+        2. swaps the staged updates in with renames, stopping (and restarting) the server only if it's running
+           with an updated mod loaded; mods outside the running collection are swapped in without a restart
+    If a swap fails, the mods swapped with it are rolled back to their previous version
+    The downloads wait their turn in the download queue, and for (or fail without) the disk space they need, see
+    _admit_download; mods already queued or downloading elsewhere are left to that download
     """
     helper = current_app.config["TASK_HELPER"]
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
     helper.update_task_state(
         current_task=current_task,
         current_app=current_app,
@@ -520,24 +858,11 @@ def mod_update(schedule_id: int = 0) -> None:
         status=TaskStatus.running,
         msg="Updating installed Arma 3 mods!",
     )
-    server_helper = current_app.config["A3_SERVER_HELPER"]
-    server_running = server_helper.is_server_running()
-
-    if server_running:
-        helper.update_task_state(
-            current_task=current_task,
-            current_app=current_app,
-            schedule_id=schedule_id,
-            task_type="mod_update",
-            level="debug",
-            status=TaskStatus.running,
-            msg="Stopping Arma 3 server to update mods...",
-        )
-        server_stop()
 
     mods = Mod.query.filter(
         Mod.should_update,
         Mod.steam_last_updated > Mod.last_updated,
+        Mod.status == ModStatus.installed,
     ).all()
     if not mods:
         helper.update_task_state(
@@ -550,9 +875,134 @@ def mod_update(schedule_id: int = 0) -> None:
             msg="No updates found for mods! Aborting",
         )
         return
+    decision, reservation_id, mods = _admit_download(
+        "mod_update", [schedule_id], mods, "mod_update", schedule_id, reservation_id
+    )
+    if decision != "admitted":
+        return
     for mod in mods:
-        update_arma3_mod(mod.id)
-    if server_running:
+        mod.status = ModStatus.update_requested
+    db.session.commit()
+
+    # phase 1: download (and lowercase) the updates alongside the installed mods
+    destinations = {mod.id: mod_manager.mod_destination(mod) for mod in mods}
+    try:
+        errors = mod_manager.download_mods(
+            [
+                {
+                    "steam_id": mod.steam_id,
+                    "dst_dir": mod_manager.staged_path(destinations[mod.id]),
+                    "is_msn": mod.mod_type == ModType.mission,
+                    "size": mod.size_bytes,
+                }
+                for mod in mods
+            ],
+            progress_callback=helper.progress_reporter(current_task),
+        )
+    finally:
+        # the updates are on disk now (or failed), so their space no longer needs holding
+        _release_download(reservation_id)
+    staged = []
+    for mod in mods:
+        if errors.get(mod.steam_id):
+            # the installed version is untouched, so it stays installed
+            mod.status = ModStatus.installed
+            helper.update_task_state(
+                current_task=current_task,
+                current_app=current_app,
+                schedule_id=schedule_id,
+                task_type="mod_update",
+                level="error",
+                status=TaskStatus.running,
+                msg=f"Failed to download update for Arma 3 mod {mod.id}: {errors[mod.steam_id]}",
+            )
+            continue
+        staged.append(mod)
+    db.session.commit()
+    mod_manager.discard_staged_mods(
+        [destinations[mod.id] for mod in mods if mod not in staged]
+    )
+    # back up the versions being replaced while the server is still running
+    _snapshot_mods(staged, schedule_id, "mod_update")
+    if not staged:
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type="mod_update",
+            level="error",
+            status=TaskStatus.failed,
+            msg="Failed to download any Arma 3 mod updates",
+        )
+        return
+
+    # phase 2: swap the updates in, stopping the server only if it has updated mods loaded
+    swap_errors, restarted = _apply_mod_updates(staged, destinations, schedule_id)
+
+    if swap_errors:
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type="mod_update",
+            level="error",
+            status=TaskStatus.failed,
+            msg=f"Arma 3 mod updates were not applied: {'; '.join(swap_errors)}",
+        )
+        return
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=schedule_id,
+        task_type="mod_update",
+        level="error" if len(staged) < len(mods) else "info",
+        status=TaskStatus.failed if len(staged) < len(mods) else TaskStatus.success,
+        msg=f"Updated {len(staged)} of {len(mods)} installed Arma 3 mods "
+        f"({restarted} needed a server restart)",
+    )
+
+
+def _apply_mod_updates(
+    mods: list[Mod], destinations: dict[int, str], schedule_id: int
+) -> tuple[list[str], int]:
+    """
+    Swaps staged updates in (see _swap_in_mod_updates), stopping (and restarting) the server only if it's running
+    with one of the mods loaded; mods outside the running collection are swapped in without a restart
+    :param mods:
+        LIST, the mods whose updates are staged
+    :param destinations:
+        DICT, mod ID to installed path
+    :param schedule_id:
+    :return:
+        Tuple of the messages explaining which updates weren't applied, and the number of mods which needed the
+        server restarted
+    """
+    helper = current_app.config["TASK_HELPER"]
+    server_helper = current_app.config["A3_SERVER_HELPER"]
+    server_running = server_helper.is_server_running()
+    loaded_mod_ids = server_helper.get_loaded_mod_ids() if server_running else set()
+    in_background = [mod for mod in mods if mod.id not in loaded_mod_ids]
+    needs_restart = [mod for mod in mods if mod.id in loaded_mod_ids]
+
+    swap_errors = []
+    if in_background:
+        swap_error = _swap_in_mod_updates(in_background, destinations)
+        if swap_error:
+            swap_errors.append(swap_error)
+    if needs_restart:
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type="mod_update",
+            level="debug",
+            status=TaskStatus.running,
+            msg=f"Stopping Arma 3 server to swap in updates to {len(needs_restart)} loaded mods...",
+        )
+        server_stop()
+        swap_error = _swap_in_mod_updates(needs_restart, destinations)
+        if swap_error:
+            swap_errors.append(swap_error)
         helper.update_task_state(
             current_task=current_task,
             current_app=current_app,
@@ -563,15 +1013,281 @@ def mod_update(schedule_id: int = 0) -> None:
             msg="Starting server after mod updates",
         )
         server_start()
+
+    return swap_errors, len(needs_restart)
+
+
+def _swap_in_mod_updates(mods: list[Mod], destinations: dict[int, str]) -> str | None:
+    """
+    Swaps staged updates into place, recording the outcome on each mod's row
+        If any swap fails, all of these mods keep their previous version and their staged updates are discarded
+    :param mods:
+        LIST, the mods whose updates are staged
+    :param destinations:
+        DICT, mod ID to installed path
+    :return:
+        None on success, otherwise a message explaining why the updates weren't applied
+    """
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    paths = [destinations[mod.id] for mod in mods]
+    # mods with a manifest of their installed files only have the changed files replaced
+    manifests = {
+        destinations[mod.id]: mod.manifest.files for mod in mods if mod.manifest
+    }
+    swap_error = None
+    new_manifests = {}
+    try:
+        new_manifests = mod_manager.swap_in_staged_mods(paths, manifests)
+    except Exception as e:
+        swap_error = str(e)
+        mod_manager.discard_staged_mods(paths)
+    for mod in mods:
+        mod.status = ModStatus.installed
+        if swap_error is None:
+            mod.local_path = destinations[mod.id]
+            mod.last_updated = datetime.now()
+            mod_manager.directory_index.add(
+                destinations[mod.id], is_dir=mod.mod_type != ModType.mission
+            )
+            if destinations[mod.id] in new_manifests:
+                mod_manager.save_manifest(mod, new_manifests[destinations[mod.id]])
+    db.session.commit()
+    return swap_error
+
+
+def _snapshot_mods(mods: list[Mod], schedule_id: int, task_type: str) -> None:
+    """
+    Snapshots the installed copies of mods about to be replaced, and prunes their old snapshots
+        A failed snapshot is logged but doesn't stop the update
+    :param mods:
+        LIST, the installed mods
+    :param schedule_id:
+    :param task_type:
+        STR, the task type to log against
+    :return:
+        N/A
+    """
+    helper = current_app.config["TASK_HELPER"]
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    for mod in mods:
+        try:
+            mod_manager.snapshot_mod(mod)
+            mod_manager.prune_snapshots(mod)
+        except Exception as e:
+            helper.update_task_state(
+                current_task=current_task,
+                current_app=current_app,
+                schedule_id=schedule_id,
+                task_type=task_type,
+                level="warn",
+                status=TaskStatus.running,
+                msg=f"Failed to snapshot Arma 3 mod {mod.id} before replacing it: {str(e)}",
+            )
+    db.session.commit()
+
+
+@shared_task()
+def rollback_arma3_mod(mod_id: int, snapshot_id: int, schedule_id: int = 0) -> None:
+    """
+    Rolls an installed Arma 3 mod back to one of its snapshots, replacing only the files which differ
+        The mod stops being kept up-to-date, so the next update doesn't reinstall the version rolled back from.
+        If the mod is loaded by the running server, the server is stopped for the swap and started again
+    :param mod_id:
+        INT, the installed mod ID to roll back
+    :param snapshot_id:
+        INT, the snapshot of that mod to restore
+    :param schedule_id:
+    :return:
+        N/A, though the result is stored in the task output
+    """
+    helper = current_app.config["TASK_HELPER"]
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    mod = Mod.query.get(mod_id)
+    snapshot = ModSnapshot.query.filter(
+        ModSnapshot.id == snapshot_id, ModSnapshot.mod_id == mod_id
+    ).first()
+    if mod is None or snapshot is None or mod.status != ModStatus.installed:
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type="mod_rollback",
+            level="warn",
+            status=TaskStatus.aborted,
+            msg=f"Arma 3 mod {mod_id} not installed, or has no snapshot {snapshot_id}",
+        )
+        return
+    mod.status = ModStatus.update_requested
+    db.session.commit()
     helper.update_task_state(
         current_task=current_task,
         current_app=current_app,
         schedule_id=schedule_id,
-        task_type="mod_update",
+        task_type="mod_rollback",
+        level="info",
+        status=TaskStatus.running,
+        msg=f"Rolling Arma 3 mod {mod_id} back to snapshot {snapshot_id}",
+    )
+
+    path = mod.local_path
+    error = None
+    try:
+        installed = mod_manager.stage_snapshot(mod, snapshot)
+    except Exception as e:
+        error = str(e)
+        mod_manager.discard_staged_mods([path])
+    if error is None:
+        server_helper = current_app.config["A3_SERVER_HELPER"]
+        restart = (
+            server_helper.is_server_running()
+            and mod.id in server_helper.get_loaded_mod_ids()
+        )
+        if restart:
+            server_stop()
+        try:
+            new_manifests = mod_manager.swap_in_staged_mods(
+                [path], {path: installed}, {path: snapshot.files}
+            )
+            mod_manager.save_manifest(mod, new_manifests[path])
+            mod.last_updated = snapshot.mod_last_updated or mod.last_updated
+            mod.should_update = False
+        except Exception as e:
+            error = str(e)
+            mod_manager.discard_staged_mods([path])
+        if restart:
+            server_start()
+    mod.status = ModStatus.installed
+    db.session.commit()
+
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=schedule_id,
+        task_type="mod_rollback",
+        level="error" if error else "info",
+        status=TaskStatus.failed if error else TaskStatus.success,
+        msg=f"Failed to roll back Arma 3 mod {mod_id}: {error}"
+        if error
+        else f"Rolled Arma 3 mod {mod_id} back to snapshot {snapshot_id}",
+    )
+
+
+@shared_task()
+def verify_arma3_mods(
+    schedule_id: int = 0, mod_ids: list[int] | None = None, redownload: bool = False
+) -> dict:
+    """
+    Verifies installed Arma 3 mods against their manifests (or Steam's file size), marking damaged mods as corrupt
+        Corrupt mods which now verify are marked installed again
+    :param schedule_id:
+    :param mod_ids:
+        LIST, the mods to verify; all installed (and corrupt) mods if not given
+    :param redownload:
+        BOOL, whether to queue a download of the mods found to be corrupt
+    :return:
+        Dict with the mod IDs "verified", and the "corrupt" mod IDs mapped to what's wrong with them
+    """
+    helper = current_app.config["TASK_HELPER"]
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    query = Mod.query.filter(Mod.status.in_([ModStatus.installed, ModStatus.corrupt]))
+    if mod_ids:
+        query = query.filter(Mod.id.in_(mod_ids))
+    mods = query.all()
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=schedule_id,
+        task_type="mod_verify",
+        level="info",
+        status=TaskStatus.running,
+        msg=f"Verifying {len(mods)} installed Arma 3 mods",
+    )
+
+    problems = mod_manager.verify_mods(mods)
+    corrupt = {}
+    for mod in mods:
+        if problems[mod.id]:
+            mod.status = ModStatus.corrupt
+            corrupt[mod.id] = problems[mod.id]
+            helper.update_task_state(
+                current_task=current_task,
+                current_app=current_app,
+                schedule_id=schedule_id,
+                task_type="mod_verify",
+                level="warn",
+                status=TaskStatus.running,
+                msg=f"Arma 3 mod {mod.id} ({mod.name}) is {problems[mod.id]}",
+            )
+        elif mod.status == ModStatus.corrupt:
+            mod.status = ModStatus.installed
+    db.session.commit()
+
+    if corrupt and redownload:
+        download_arma3_mods.delay(sorted(corrupt), schedule_id)
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=schedule_id,
+        task_type="mod_verify",
+        level="warn" if corrupt else "info",
+        status=TaskStatus.success,
+        msg=f"Verified {len(mods)} Arma 3 mods: {len(corrupt)} corrupt"
+        + (", queued for download" if corrupt and redownload else ""),
+    )
+    return {"verified": [mod.id for mod in mods], "corrupt": corrupt}
+
+
+@shared_task()
+def dedup_arma3_mods(schedule_id: int = 0) -> dict:
+    """
+    Replaces identical read-only files across installed Arma 3 mods with hardlinks to a single copy
+    :param schedule_id:
+    :return:
+        Dict with the number of "files_linked", the "bytes_reclaimed" and the number of link "groups"
+    """
+    helper = current_app.config["TASK_HELPER"]
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    mods = [
+        mod
+        for mod in Mod.query.filter(Mod.status == ModStatus.installed).all()
+        if mod.local_path and os.path.isdir(mod.local_path)
+    ]
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=schedule_id,
+        task_type="mod_dedup",
+        level="info",
+        status=TaskStatus.running,
+        msg=f"Deduplicating files across {len(mods)} installed Arma 3 mods",
+    )
+    try:
+        outcome = mod_manager.dedup_mods(mods)
+    except Exception as e:
+        # files linked before the failure stay linked (and identical), but aren't tracked until the next pass
+        db.session.rollback()
+        helper.update_task_state(
+            current_task=current_task,
+            current_app=current_app,
+            schedule_id=schedule_id,
+            task_type="mod_dedup",
+            level="error",
+            status=TaskStatus.failed,
+            msg=f"Failed to deduplicate Arma 3 mods: {str(e)}",
+        )
+        return {}
+    db.session.commit()
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=schedule_id,
+        task_type="mod_dedup",
         level="info",
         status=TaskStatus.success,
-        msg="Successfully updated installed Arma 3 mods!",
+        msg=f"Linked {outcome['files_linked']} duplicate files in {outcome['groups']} groups, "
+        f"reclaiming {outcome['bytes_reclaimed'] / 1048576:.1f} MiB",
     )
+    return outcome
 
 
 @shared_task()
@@ -734,6 +1450,7 @@ def update_mod_steam_updated_time() -> None:
     """
     Checks every mod we have a subscription for and updates their steam last updated time
         This information is used to determine if a newer version of the mod is available
+        Details are requested from Steam in batches and written back with a single bulk UPDATE
     :return:
         N/A
     """
@@ -748,10 +1465,23 @@ def update_mod_steam_updated_time() -> None:
         msg="Updating mod steam updated time for all subscribed mods",
     )
     steam_helper = current_app.config["STEAM_API_HELPER"]
-    mods = Mod.query.filter(Mod.should_update).all()
-    for mod in mods:
-        mod_details = steam_helper.get_mod_details(mod.steam_id)
-        mod.steam_last_updated = datetime.utcfromtimestamp(mod_details["time_updated"])
+    mods = db.session.execute(
+        select(Mod.id, Mod.steam_id).where(Mod.should_update)
+    ).all()
+    mod_details = steam_helper.get_mods_details([mod.steam_id for mod in mods])
+    updates = [
+        {
+            "id": mod.id,
+            "steam_last_updated": datetime.utcfromtimestamp(
+                mod_details[mod.steam_id]["time_updated"]
+            ),
+        }
+        for mod in mods
+        if mod.steam_id in mod_details
+    ]
+    if updates:
+        # one bulk UPDATE (executemany keyed on primary key) rather than a flush per mod
+        db.session.execute(update(Mod), updates)
     db.session.commit()
     helper.update_task_state(
         current_task=current_task,
@@ -764,6 +1494,151 @@ def update_mod_steam_updated_time() -> None:
     )
 
 
+@shared_task(
+    autoretry_for=(httpx.HTTPError,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
+def fetch_mod_preview_image(mod_id: int) -> None:
+    """
+    Downloads and stores the preview image for a subscribed mod
+        Runs on the dedicated "images" queue so large Steam CDN downloads never hold up subscribing
+        Network failures are retried with exponential backoff
+    :param mod_id:
+        INT, the subscribed mod ID to fetch the preview image for
+    :return:
+        N/A
+    """
+    mod_data = Mod.query.get(mod_id)
+    if not mod_data:
+        current_app.logger.warning(f"Arma 3 mod {mod_id} not found, skipping image")
+        return
+    if current_app.config["MOD_MANAGERS"]["ARMA3"].store_preview_image(mod_data):
+        current_app.logger.debug(f"Stored preview image for Arma 3 mod {mod_id}")
+
+
+@shared_task()
+def backfill_mod_preview_images() -> None:
+    """
+    Periodic sweep which queues preview image fetches for every mod that doesn't have one yet
+        Mods which never had their preview URL recorded get it from a batched Steam details call first
+    :return:
+        N/A
+    """
+    helper = current_app.config["TASK_HELPER"]
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=-1,
+        task_type="",
+        level="debug",
+        status=TaskStatus.running,
+        msg="Looking for mods without preview images",
+    )
+    mods = Mod.query.filter(
+        ~select(ModImage.id).where(ModImage.mod_id == Mod.id).exists()
+    ).all()
+    missing_urls = [mod for mod in mods if not mod.preview_url]
+    if missing_urls:
+        mod_details = current_app.config["STEAM_API_HELPER"].get_mods_details(
+            [mod.steam_id for mod in missing_urls]
+        )
+        for mod in missing_urls:
+            mod.preview_url = (
+                mod_details.get(mod.steam_id, {}).get("preview_url") or None
+            )
+    for mod in mods:
+        mod.image_pending = bool(mod.preview_url)
+    db.session.commit()
+
+    queued = [mod.id for mod in mods if mod.image_pending]
+    current_app.config["MOD_MANAGERS"]["ARMA3"].queue_preview_image_fetches(queued)
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=-1,
+        task_type="",
+        level="debug",
+        status=TaskStatus.success,
+        msg=f"Queued preview image fetches for {len(queued)} mods",
+    )
+
+
+@shared_task()
+def reconcile_mod_directory_index() -> None:
+    """
+    Rescans the mod directories to correct any drift in the filesystem state index
+        e.g., mods deleted or copied in by hand
+    :return:
+        N/A
+    """
+    helper = current_app.config["TASK_HELPER"]
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=-1,
+        task_type="",
+        level="debug",
+        status=TaskStatus.running,
+        msg="Reconciling mod directory index",
+    )
+    corrected = current_app.config["MOD_MANAGERS"]["ARMA3"].reconcile_installed_mods()
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=-1,
+        task_type="",
+        level="debug",
+        status=TaskStatus.success,
+        msg=f"Reconciled mod directory index ({corrected} mods no longer installed)",
+    )
+
+
+@shared_task()
+def prune_tombstones() -> None:
+    """
+    Removes deletion records older than the retention window used by the change feed
+    :return:
+        N/A
+    """
+    helper = current_app.config["TASK_HELPER"]
+    mod_manager = current_app.config["MOD_MANAGERS"]["ARMA3"]
+    removed = mod_manager.prune_tombstones(mod_manager.tombstone_retention_days)
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=-1,
+        task_type="",
+        level="debug",
+        status=TaskStatus.success,
+        msg=f"Pruned {removed} expired tombstones",
+    )
+
+
+@shared_task()
+def advance_download_queue() -> None:
+    """
+    Forgets downloads whose task went away without finishing, and dispatches those next in line into the freed
+    slots. Downloads normally advance the queue themselves as they finish; this keeps it moving if one never does
+    :return:
+        N/A
+    """
+    helper = current_app.config["TASK_HELPER"]
+    current_app.config["DISK_ADMISSION_HELPER"].expire_stale()
+    dispatched = current_app.config["DOWNLOAD_QUEUE_HELPER"].advance()
+    helper.update_task_state(
+        current_task=current_task,
+        current_app=current_app,
+        schedule_id=-1,
+        task_type="",
+        level="debug",
+        status=TaskStatus.success,
+        msg=f"Dispatched {len(dispatched)} queued downloads",
+    )
+
+
 @shared_task()
 def check_for_server_death() -> None:
     """
@@ -847,6 +1722,8 @@ def task_kickoff(celery_name) -> None:
         "server_start": server_start,
         "server_stop": server_stop,
         "mod_update": mod_update,
+        "mod_verify": verify_arma3_mods,
+        "mod_dedup": dedup_arma3_mods,
     }
     tasks = Schedule.query.filter(
         and_(Schedule.celery_name == celery_name, Schedule.enabled)
@@ -0,0 +1,68 @@
+"""Conditional GET support for read endpoints, driven by resource version counters."""
+
+import time
+from collections.abc import Callable
+from functools import wraps
+from http import HTTPStatus
+from typing import Any
+
+from flask import make_response, request
+from sqlalchemy import select
+
+from app import db
+from app.models.resource_version import ResourceVersion
+
+
+def current_versions(resources: tuple[str, ...]) -> dict[str, int]:
+    """
+    Reads the version counters of the given resources in a single query
+    :param resources: - TUPLE, resource names, e.g. ("mods", "collections")
+    :return:
+        Dict of resource name to version (missing counters are reported as 0)
+    """
+    table = ResourceVersion.__table__
+    rows = db.session.execute(
+        select(table.c.name, table.c.version).where(table.c.name.in_(resources))
+    ).all()
+    versions = dict.fromkeys(resources, 0)
+    versions.update(dict(rows))
+    return versions
+
+
+def conditional_get(
+    *resources: str, weak: bool = False, refresh_interval: int | None = None
+) -> Callable:
+    """
+    Adds an ETag to a read endpoint's successful responses and answers matching If-None-Match with 304
+        The ETag is derived from the resource version counters rather than the response body, so a matching
+        request is answered before the view (and any ORM work) runs
+    :param resources: - STR, names of the resources the endpoint's response is built from
+    :param weak: - BOOL, issue a weak ETag (for responses which embed live values, e.g. server CPU usage)
+    :param refresh_interval: - INT, if set, the ETag also changes every this many seconds so live values are
+        re-sent periodically even when nothing in the database changed
+    :return:
+        The decorator
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            versions = current_versions(resources)
+            etag = "-".join(f"{name}.{versions[name]}" for name in resources)
+            if refresh_interval:
+                etag += f"-t{int(time.time() // refresh_interval)}"
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", HTTPStatus.NOT_MODIFIED)
+                response.set_etag(etag, weak=weak)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == HTTPStatus.OK:
+                response.set_etag(etag, weak=weak)
+                # always revalidate, so clients never act on a stale copy
+                response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,26 +1,48 @@
 """Utility helper functions."""
 
+import base64
 import enum
 import glob
+import heapq
+import json
+import mimetypes
 import os
+import re
 import shutil
 import subprocess
-from datetime import datetime
-from xmlrpc.client import Binary
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from typing import Any
 
-import httpx
 import psutil
 import sqlalchemy
+from sqlalchemy import select
 
-from app import db
+from app import celery, db
 from app.models import TaskLogEntry
 from app.models.collection import Collection
-from app.models.mod import Mod, ModStatus
+from app.models.disk_reservation import DiskReservation, ReservationState
+from app.models.download_queue_entry import DownloadQueueEntry
+from app.models.mod import Mod, ModStatus, ModType
 from app.models.mod_collection_entry import ModCollectionEntry
+from app.models.mod_directory_entry import ModDirectoryEntry
+from app.models.mod_file_link import ModFileLink
 from app.models.mod_image import ModImage
+from app.models.mod_manifest import ModManifest
+from app.models.mod_snapshot import ModSnapshot
 from app.models.notification import Notification
 from app.models.schedule import Schedule
 from app.models.server_config import ServerConfig
+from app.models.tombstone import Tombstone
+from app.utils import http_client, integrity, transfer
+from app.utils.image_store import (
+    DatabaseImageStore,
+    FilesystemImageStore,
+    ImageStore,
+)
 
 
 # Helper functions will be added here as needed
@@ -30,12 +52,35 @@ class Arma3ModManager:
     Note that "mod_id" refers to the internal ID used by this application, and "steam_mod_id" refers to the steam mod ID
     """
 
+    # fields mod listings can be sorted (and keyset-paginated) on
+    SORTABLE_FIELDS = {"id": Mod.id, "name": Mod.name}
+    # upper bound on the number of mods returned in a single page
+    MAX_PAGE_SIZE = 500
+    # how steamcmd reports a workshop item it could not download, e.g. "ERROR! Download item 123 failed (Timeout)."
+    STEAM_CMD_FAILURE = re.compile(r"ERROR! Download item (\d+) failed \(([^)]*)\)")
+    # threads used to lowercase a mod's files once it's downloaded
+    LOWERCASE_WORKERS = 8
+    # mod files which are only ever read (never edited, unlike e.g. userconfig), so identical copies can be shared
+    DEDUP_EXTENSIONS = {".pbo", ".ebo", ".bisign", ".bikey", ".paa", ".dll", ".so"}
+
     def __init__(
         self,
         steam_cmd_path: str,
         steam_cmd_user: str,
         mod_staging_dir: str,
         mod_dest_dir: str,
+        steam_api_details_chunk_size: int = 100,
+        directory_index_refresh_interval: float = 30.0,
+        tombstone_retention_days: int = 30,
+        image_store: ImageStore | None = None,
+        download_batch_size: int = 25,
+        download_workers: int = 1,
+        progress_interval: float = 2.0,
+        transfer_workers: int = 4,
+        verify_workers: int = 1,
+        backup_dir: str | None = None,
+        snapshot_retention: int = 3,
+        snapshot_max_age_days: int = 0,
     ) -> None:
         self.steam_cmd_path = steam_cmd_path
         self.steam_cmd_user = steam_cmd_user
@@ -43,9 +88,22 @@ class Arma3ModManager:
         self.staging_dir = mod_staging_dir
         self.dst_dir = mod_dest_dir
         self.mission_dir = os.path.join(mod_dest_dir, "mpmissions")
+        self.backup_dir = backup_dir
         self._validate_dirs()
         self._validate_steam_cmd()
-        self.steam_api = SteamAPI()
+        self.steam_api = SteamAPI(steam_api_details_chunk_size)
+        self.directory_index = ModDirectoryIndex(
+            [self.dst_dir, self.mission_dir], directory_index_refresh_interval
+        )
+        self.tombstone_retention_days = tombstone_retention_days
+        self.image_store = image_store or DatabaseImageStore()
+        self.download_batch_size = download_batch_size
+        self.download_workers = download_workers
+        self.progress_interval = progress_interval
+        self.transfer_workers = transfer_workers
+        self.verify_workers = verify_workers
+        self.snapshot_retention = snapshot_retention
+        self.snapshot_max_age_days = snapshot_max_age_days
 
     def empty_mod_staging_dir(self):
         """
@@ -57,68 +115,230 @@ class Arma3ModManager:
             shutil.rmtree(self.staging_dir)
             os.makedirs(self.staging_dir)
 
-    @staticmethod
-    def _validate_mod_filesystem_state(mod: Mod) -> None:
+    def _validate_mods_filesystem_state(self, mods: list[Mod]) -> bool:
         """
-        Validates that a mod's local_path still exists on disk and updates the database if not.
+        Validates that each mod's local_path still exists and updates the mod if not.
         This ensures the database stays in sync with the actual filesystem state.
+        Existence is answered by the directory index, so no disk I/O happens here.
+        NOTE: corrections are not committed; callers commit once after serializing
 
-        :param mod: The Mod instance to validate
+        :param mods: The Mod instances to validate
+        :return: True if any mod was corrected (and needs committing)
         """
-        # Only validate if the mod is marked as installed with a non-empty local_path
+        # Only validate mods marked as installed with a non-empty local_path
         # Don't validate during active operations (downloads/updates/uninstalls)
-        if mod.status != ModStatus.installed:
-            return
+        candidates = [
+            mod
+            for mod in mods
+            if mod is not None
+            and mod.status == ModStatus.installed
+            and mod.local_path
+            and mod.local_path.strip()
+        ]
+        if not candidates:
+            return False
 
-        if not mod.local_path or not mod.local_path.strip():
-            return
+        missing = self.directory_index.missing([mod.local_path for mod in candidates])
+        for mod in candidates:
+            if mod.local_path in missing:
+                # Filesystem and database are out of sync - update database
+                mod.local_path = None
+                mod.status = ModStatus.not_installed
+        return bool(missing)
 
-        # At this point, local_path is guaranteed to be a non-empty string
-        if not os.path.exists(mod.local_path):
-            # Filesystem and database are out of sync - update database
-            mod.local_path = None
-            mod.status = ModStatus.not_installed
-            db.session.commit()
+    @staticmethod
+    def _image_hash_column():
+        """
+        Builds a correlated subquery reporting each mod's preview image version without touching the image blobs
+            NULL means the mod has no image; an empty string means it has one whose hash isn't known yet
+        :return:
+            A labelled SQL expression, the content hash of the mod's preview image
+        """
+        return (
+            select(sqlalchemy.func.coalesce(ModImage.content_hash, ""))
+            .where(ModImage.mod_id == Mod.id)
+            .order_by(ModImage.id.desc())
+            .limit(1)
+            .scalar_subquery()
+            .label("image_hash")
+        )
 
     @staticmethod
-    def get_subscribed_mods() -> list[dict[str, str]]:
+    def _add_image_details(details: dict, image_hash: str | None) -> dict:
+        """
+        Adds preview image availability (and its version, used to build cacheable image URLs) to a mod's details
+        :param details: - DICT, the mod's details
+        :param image_hash: - STR, result of the _image_hash_column() subquery
+        :return:
+            The updated details
+        """
+        details["image_available"] = image_hash is not None
+        details["image_hash"] = image_hash or None
+        return details
+
+    def get_subscribed_mods(self) -> list[dict[str, str]]:
         """
         Retrieves details about subscribed mods
+            Runs a single query regardless of library size; any filesystem corrections are committed together
         """
-        results = []
-        for result in Mod.query.all():
-            # Validate filesystem state and auto-correct if needed
-            Arma3ModManager._validate_mod_filesystem_state(result)
+        return self._serialize_mods(
+            select(Mod, self._image_hash_column()).order_by(Mod.id)
+        )
 
-            details = result.to_dict()
-            try:
-                ModImage.query.filter(ModImage.id == result.id).first()
-                details["image_available"] = True
-            except sqlalchemy.orm.exc.NoResultFound:
-                details["image_available"] = False
-            results.append(details)
-        return results
+    def get_subscribed_mods_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        sort: str = "id",
+        descending: bool = False,
+        filters: dict | None = None,
+    ) -> dict:
+        """
+        Retrieves one page of subscribed mods using keyset (cursor) pagination
+        :param limit: - INT, the maximum number of mods to return (capped at MAX_PAGE_SIZE)
+        :param cursor: - Optional STR, the "next_cursor" returned with the previous page
+        :param sort: - STR, the field to sort on ("id" or "name")
+        :param descending: - BOOL, whether to sort in descending order
+        :param filters: - Optional DICT, any of:
+            "status": list of mod statuses, e.g. ["installed", "install_failed"]
+            "mod_type": list of mod types, e.g. ["mod", "map"]
+            "server_mod": bool
+            "should_update": bool
+            "search": case-insensitive substring of the mod name, or an exact steam ID
+        :return:
+            {
+                "results": [<mod details, see get_subscribed_mods>],
+                "next_cursor": "<opaque cursor for the next page, or None on the last page>",
+            }
+        """
+        if sort not in self.SORTABLE_FIELDS:
+            raise ValueError(f"Cannot sort mods by {sort}")
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        limit = min(limit, self.MAX_PAGE_SIZE)
+        filters = filters or {}
+        sort_column = self.SORTABLE_FIELDS[sort]
+
+        query = select(Mod, self._image_hash_column())
+        if filters.get("status"):
+            query = query.where(
+                Mod.status.in_([ModStatus(status) for status in filters["status"]])
+            )
+        if filters.get("mod_type"):
+            query = query.where(
+                Mod.mod_type.in_(
+                    [ModType(mod_type) for mod_type in filters["mod_type"]]
+                )
+            )
+        if filters.get("server_mod") is not None:
+            query = query.where(Mod.server_mod == filters["server_mod"])
+        if filters.get("should_update") is not None:
+            query = query.where(Mod.should_update == filters["should_update"])
+        if filters.get("search"):
+            search = filters["search"].strip()
+            escaped = (
+                search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            condition = Mod.name.ilike(f"%{escaped}%", escape="\\")
+            if search.isdigit():
+                condition = sqlalchemy.or_(condition, Mod.steam_id == int(search))
+            query = query.where(condition)
+
+        # keyset pagination on (sort column, id) so every page is an index range scan
+        keyset = sqlalchemy.tuple_(sort_column, Mod.id)
+        if cursor:
+            position = sqlalchemy.tuple_(*self._decode_cursor(cursor, sort))
+            query = query.where(keyset < position if descending else keyset > position)
+        if descending:
+            query = query.order_by(sort_column.desc(), Mod.id.desc())
+        else:
+            query = query.order_by(sort_column, Mod.id)
+
+        results = self._serialize_mods(query.limit(limit + 1))
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = self._encode_cursor(results[-1], sort)
+        return {"results": results, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _encode_cursor(last_mod: dict, sort: str) -> str:
+        """
+        Builds an opaque cursor pointing just past the given mod
+        :param last_mod: - DICT, the serialized last mod of the current page
+        :param sort: - STR, the field the page is sorted on
+        :return:
+            The cursor, as a URL-safe string
+        """
+        position = json.dumps([sort, last_mod[sort], last_mod["id"]])
+        return base64.urlsafe_b64encode(position.encode()).decode()
 
     @staticmethod
-    def get_subscribed_mod_details(mod_id: int) -> dict[str, str]:
+    def _decode_cursor(cursor: str, sort: str) -> tuple:
+        """
+        Unpacks a cursor built by _encode_cursor
+        :param cursor: - STR, the cursor supplied by the client
+        :param sort: - STR, the field the page is sorted on (must match the cursor)
+        :return:
+            (sort value, mod ID) of the last mod on the previous page
+        """
+        try:
+            cursor_sort, value, mod_id = json.loads(base64.urlsafe_b64decode(cursor))
+        except Exception as e:
+            raise ValueError("Invalid cursor") from e
+        if cursor_sort != sort:
+            raise ValueError("Cursor does not match the requested sort order")
+        return value, mod_id
+
+    def _serialize_mods(self, query) -> list[dict[str, str]]:
+        """
+        Runs a (Mod, image_hash) query and serializes the results
+            Any filesystem corrections are committed together, after serializing
+        :param query: - the select() to run
+        :return:
+            List of mod details
+        """
+        rows = db.session.execute(query).all()
+
+        # Validate filesystem state and auto-correct if needed
+        corrected = self._validate_mods_filesystem_state([mod for mod, _ in rows])
+
+        results = []
+        for mod, image_hash in rows:
+            results.append(self._add_image_details(mod.to_dict(), image_hash))
+        if corrected:
+            # serialized above so committing (which expires every mod) doesn't trigger a reload per row
+            db.session.commit()
+        return results
+
+    def get_subscribed_mod_details(self, mod_id: int) -> dict[str, str]:
         """
         Retrieves details about a subscribed mod
         :param mod_id: - INT, the internal ID of the mod to get details for
         :return:
         """
-        result = Mod.query.filter(Mod.id == mod_id).first()
+        mod, image_hash = db.session.execute(
+            select(Mod, Arma3ModManager._image_hash_column()).where(Mod.id == mod_id)
+        ).first() or (None, None)
 
         # Validate filesystem state and auto-correct if needed
-        Arma3ModManager._validate_mod_filesystem_state(result)
+        corrected = self._validate_mods_filesystem_state([mod])
 
-        details = result.to_dict()
-        try:
-            ModImage.query.filter(ModImage.id == result.id).first()
-            details["image_available"] = True
-        except sqlalchemy.orm.exc.NoResultFound:
-            details["image_available"] = False
+        details = self._add_image_details(mod.to_dict(), image_hash)
+        if corrected:
+            db.session.commit()
         return details
 
+    @staticmethod
+    def get_mod_snapshots(mod_id: int) -> list[dict[str, Any]]:
+        """
+        Retrieves the snapshots (backups of previous versions) of a mod, oldest first
+        :param mod_id: - INT, the internal ID of the mod
+        :return:
+            List of snapshot dicts, but raises AttributeError if the mod doesn't exist
+        """
+        return [snapshot.to_dict() for snapshot in Mod.query.get(mod_id).snapshots]
+
     @staticmethod
     def update_subscribed_mod(mod_id: int, updated_data: dict) -> None:
         """
@@ -154,13 +374,19 @@ class Arma3ModManager:
         # TODO: delete the local files
         # TODO: check for presence in mod collections and refuse to remove if present
         try:
-            db.session.delete(ModImage.query.filter(ModImage.mod_id == mod_id).first())
+            image = ModImage.query.filter(ModImage.mod_id == mod_id).first()
+            db.session.delete(image)
+            content_hash = image.content_hash
             db.session.commit()
+            self._release_image_file(content_hash)
         except sqlalchemy.orm.exc.UnmappedInstanceError:
             # preview image is not required, so ignore it being missing
             pass
         try:
-            db.session.delete(Mod.query.filter(Mod.id == mod_id).first())
+            mod = Mod.query.filter(Mod.id == mod_id).first()
+            if mod is not None:
+                self.delete_snapshots(mod)
+            db.session.delete(mod)
             db.session.commit()
         except sqlalchemy.orm.exc.UnmappedInstanceError as e:
             raise Exception("Cannot find subscribed mod") from e
@@ -172,8 +398,108 @@ class Arma3ModManager:
         :return:
             The ID of the newly subscribed mod
         """
-        mod_details = self.steam_api.get_mod_details(mod_steam_id)
+        result = self.add_subscribed_mods([mod_steam_id])[0]
+        if result["status"] != "subscribed":
+            raise Exception(result["message"])
+        return result["id"]
+
+    def add_subscribed_mods(self, mod_steam_ids: list[int]) -> list[dict]:
+        """
+        Subscribes to many mods at once
+            Details are fetched with batched Steam calls and every Mod row is inserted in one transaction.
+            Preview images are left "pending" and fetched by a background task, so subscribing never waits
+            on the Steam CDN. A bad item never fails the rest of the batch.
+        :param mod_steam_ids: - LIST of INT, the steam IDs of the mods to subscribe to
+        :return:
+            A list of per-item results, in request order, e.g.:
+            [
+                {"steam_id": 450814997, "id": 1, "status": "subscribed"},
+                {"steam_id": 463939057, "id": None, "status": "failed", "message": "This mod is already subscribed"},
+            ]
+        """
+        results = [
+            {"steam_id": int(steam_id), "id": None, "status": "pending"}
+            for steam_id in mod_steam_ids
+        ]
+
+        def fail(result: dict, message: str) -> None:
+            result["status"] = "failed"
+            result["message"] = message
+
+        # weed out duplicates within the request and mods we already track
+        seen = set()
+        for result in results:
+            if result["steam_id"] in seen:
+                fail(result, "Duplicate mod in request")
+            seen.add(result["steam_id"])
+        already_subscribed = set(
+            db.session.scalars(select(Mod.steam_id).where(Mod.steam_id.in_(seen)))
+        )
+        for result in results:
+            if (
+                result["status"] == "pending"
+                and result["steam_id"] in already_subscribed
+            ):
+                fail(result, "This mod is already subscribed")
+
+        pending = [result for result in results if result["status"] == "pending"]
+        if not pending:
+            return results
+        try:
+            mod_details = self.steam_api.get_mods_details(
+                [result["steam_id"] for result in pending]
+            )
+        except Exception as e:
+            for result in pending:
+                fail(result, f"Failed to retrieve mod details from Steam: {str(e)}")
+            return results
+
+        prepared_mods = {}
+        for result in pending:
+            details = mod_details.get(result["steam_id"])
+            if not details:
+                fail(result, "Mod not found on the Steam Workshop")
+                continue
+            prepared_mods[result["steam_id"]] = self._build_subscribed_mod(
+                result["steam_id"], details
+            )
+
+        db.session.add_all(prepared_mods.values())
+        try:
+            db.session.commit()
+        except sqlalchemy.exc.IntegrityError:
+            # something else subscribed to one of these in the meantime; retry item by item
+            db.session.rollback()
+            for steam_id, prepared_mod in list(prepared_mods.items()):
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(prepared_mod)
+                except sqlalchemy.exc.IntegrityError:
+                    del prepared_mods[steam_id]
+            db.session.commit()
+
+        for result in pending:
+            if result["status"] != "pending":
+                continue
+            if result["steam_id"] not in prepared_mods:
+                fail(result, "This mod is already subscribed")
+                continue
+            result["id"] = prepared_mods[result["steam_id"]].id
+            result["status"] = "subscribed"
+
+        self.queue_preview_image_fetches(
+            [prepared_mod.id for prepared_mod in prepared_mods.values()]
+        )
+        return results
 
+    def _build_subscribed_mod(self, mod_steam_id: int, mod_details: dict) -> Mod:
+        """
+        Builds (but does not persist) a Mod row from Steam workshop details
+        :param mod_steam_id: - INT, the steam ID of the mod
+        :param mod_details: - DICT, the details of the mod as returned by SteamAPI
+        :return:
+            The prepared Mod
+        """
         filename = f"@{mod_details['title']}"
         if mod_details["filename"]:
             filename = mod_details["filename"]
@@ -199,7 +525,7 @@ class Arma3ModManager:
             local_path = ""
             status = ModStatus.not_installed
 
-        prepared_mod = Mod(
+        return Mod(
             steam_id=mod_steam_id,
             filename=filename,
             name=mod_details["title"],
@@ -210,70 +536,1056 @@ class Arma3ModManager:
             steam_last_updated=datetime.utcfromtimestamp(mod_details["time_updated"]),
             should_update=True,
             status=status,
+            preview_url=mod_details.get("preview_url") or None,
+            image_pending=bool(mod_details.get("preview_url")),
         )
-        db.session.add(prepared_mod)
-        try:
+
+    @staticmethod
+    def queue_preview_image_fetches(mod_ids: list[int]) -> None:
+        """
+        Hands preview image downloads off to the background "images" queue
+            If the broker can't be reached the mods simply stay "image pending" and are picked up by the
+            periodic backfill sweep instead
+        :param mod_ids: - LIST of INT, the internal IDs of mods waiting on a preview image
+        :return:
+            N/A
+        """
+        for mod_id in mod_ids:
+            try:
+                celery.send_task(
+                    "app.tasks.background.fetch_mod_preview_image", args=[mod_id]
+                )
+            except Exception as e:
+                print(f"Failed to queue preview image fetch for mod {mod_id}: {e}")
+
+    def store_preview_image(self, mod: Mod) -> bool:
+        """
+        Downloads and stores the preview image for a mod, clearing its "image pending" state
+        :param mod: - Mod, the mod to fetch the preview image for
+        :return:
+            True if an image was stored, False if there was nothing to fetch
+        """
+        existing = db.session.scalar(
+            select(ModImage.id).where(ModImage.mod_id == mod.id).limit(1)
+        )
+        if existing or not mod.preview_url:
+            mod.image_pending = False
             db.session.commit()
-        except sqlalchemy.exc.IntegrityError as e:
-            db.session.rollback()
-            raise Exception("This mod is already subscribed") from e
+            return False
 
-        img_data = httpx.get(mod_details["preview_url"])
-        preview_image = ModImage(
-            mod_id=prepared_mod.id,
-            image_data=bytes(img_data.content),
-            content_type=img_data.headers.get("content-type"),
+        img_data = http_client.get(mod.preview_url)
+        img_data.raise_for_status()
+        db.session.add(
+            ModImage(
+                mod_id=mod.id,
+                # bytes only go in the database when that's the configured store
+                image_data=bytes(img_data.content)
+                if self.image_store.name == DatabaseImageStore.name
+                else None,
+                content_type=img_data.headers.get("content-type"),
+                content_hash=self.image_store.put(img_data.content),
+                storage=self.image_store.name,
+            )
         )
-        db.session.add(preview_image)
+        mod.image_pending = False
         db.session.commit()
-        return prepared_mod.id
+        return True
 
-    def get_subscribed_mod_image(self, mod_id: int) -> Binary:
+    def get_subscribed_mod_image(
+        self, mod_id: int, include_data: bool = True, size: int | None = None
+    ) -> dict[str, Any]:
         """
         Retrieves preview image for a specific mod
+            Only the columns needed to answer the request are loaded; the blob is skipped unless include_data is set
         :param mod_id: - INT, the internal ID of the mod to get details for
+        :param include_data: - BOOL, whether to load the image bytes (not needed for HEAD or conditional requests)
+        :param size: - INT, the thumbnail size wanted; the original is returned if no such thumbnail exists
+        :return:
+            Dict with the image's "content_type", "content_hash", "etag", "size_bytes" and "created_at", plus
+            "path" when the image is on disk or, if requested, "image_data" when it is in the database
+        """
+        image = db.session.execute(
+            select(
+                ModImage.id,
+                ModImage.content_type,
+                ModImage.content_hash,
+                ModImage.storage,
+                ModImage.created_at,
+                sqlalchemy.func.length(ModImage.image_data).label("size_bytes"),
+            )
+            .where(ModImage.mod_id == mod_id)
+            .order_by(ModImage.id.desc())
+            .limit(1)
+        ).first()
+        if image is None:
+            raise AttributeError(f"Mod {mod_id} has no image")
+        result = dict(image._mapping)
+        result["etag"] = result["content_hash"]
+
+        if image.storage == FilesystemImageStore.name:
+            path = None
+            if size:
+                path = self.image_store.path(image.content_hash, size)
+                if path:
+                    result["content_type"] = (
+                        mimetypes.guess_type(path)[0] or result["content_type"]
+                    )
+                    result["etag"] = f"{image.content_hash}-{size}"
+            result["path"] = path or self.image_store.path(image.content_hash)
+            if result["path"] is None:
+                raise AttributeError(f"Image file for mod {mod_id} is missing")
+            return result
+
+        image_data = None
+        if result["content_hash"] is None:
+            # stored before images were hashed; hash it once so future requests can be answered without the blob
+            image_data = db.session.scalar(
+                select(ModImage.image_data).where(ModImage.id == image.id)
+            )
+            result["content_hash"] = ImageStore.content_hash(image_data)
+            result["etag"] = result["content_hash"]
+            db.session.execute(
+                sqlalchemy.update(ModImage)
+                .where(ModImage.id == image.id)
+                .values(content_hash=result["content_hash"])
+            )
+            db.session.commit()
+        if include_data:
+            result["image_data"] = image_data or db.session.scalar(
+                select(ModImage.image_data).where(ModImage.id == image.id)
+            )
+        return result
+
+    def _release_image_file(self, content_hash: str | None) -> None:
+        """
+        Deletes an image's files once no mod references them
+        :param content_hash: - STR, the content hash of an image which was just removed
         :return:
+            N/A
         """
-        return (
-            ModImage.query.filter(ModImage.id == mod_id)
-            .first()
-            .to_dict(include_data=True)
+        if not content_hash:
+            return
+        still_used = db.session.scalar(
+            select(ModImage.id).where(ModImage.content_hash == content_hash).limit(1)
         )
+        if not still_used:
+            self.image_store.release(content_hash)
 
-    def download_single_mod(self, mod_id: int, dst_dir: str, is_msn: bool):
+    def migrate_images_to_store(self, batch_size: int = 50) -> int:
+        """
+        Moves image blobs out of the database and into the configured (on-disk) image store
+            Runs in batches, committing each one, so it can be interrupted and resumed. Once any blobs were moved,
+            SQLite databases are VACUUMed to give the space back
+        :param batch_size: - INT, how many images to move per transaction
+        :return:
+            The number of images moved
+        """
+        if self.image_store.name == DatabaseImageStore.name:
+            return 0
+        moved = 0
+        while True:
+            images = db.session.execute(
+                select(ModImage.id, ModImage.image_data)
+                .where(ModImage.storage == DatabaseImageStore.name)
+                .order_by(ModImage.id)
+                .limit(batch_size)
+            ).all()
+            if not images:
+                break
+            db.session.execute(
+                sqlalchemy.update(ModImage),
+                [
+                    {
+                        "id": image_id,
+                        "content_hash": self.image_store.put(image_data),
+                        "storage": self.image_store.name,
+                        "image_data": None,
+                    }
+                    for image_id, image_data in images
+                ],
+            )
+            db.session.commit()
+            moved += len(images)
+
+        if moved and db.engine.dialect.name == "sqlite":
+            with db.engine.connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            ) as connection:
+                connection.exec_driver_sql("VACUUM")
+        return moved
+
+    def download_single_mod(
+        self,
+        mod_id: int,
+        dst_dir: str,
+        is_msn: bool,
+        progress_callback: Callable[[dict], None] | None = None,
+    ):
         """
         Downloads a single mod using steamcmd
         :param mod_id: - INT, the steam ID of the mod to download
         :param dst_dir: - STR, the destination directory to move the downloaded mod to
         :param is_msn: - BOOL, if the mod is MSN. used since missions follow a slightly different download strategy
+        :param progress_callback: - CALLABLE, receives throttled progress snapshots (see DownloadProgress)
         :return:
         """
-        self._nuke_steam_cache_()
-        subprocess.check_call(
-            [
-                self.steam_cmd_path,
-                f"+force_install_dir {self.staging_dir}",
-                # TODO: handle first-time login / cached credential problems
-                f"+login {self.steam_cmd_user}",
-                f"+workshop_download_item {self.arma3_app_id} {mod_id}",
-                "validate",
-                "+quit",
-            ],
+        error = self.download_mods(
+            [{"steam_id": mod_id, "dst_dir": dst_dir, "is_msn": is_msn}],
+            progress_callback=progress_callback,
+        )[mod_id]
+        if error:
+            raise Exception(error)
+
+    def mod_destination(self, mod: Mod) -> str:
+        """
+        Builds the path a mod is installed to
+        :param mod: - Mod, the mod to install
+        :return:
+            The mod's directory (or, for missions, file) within the Arma 3 install
+        """
+        if mod.mod_type == ModType.mission:
+            return os.path.join(self.mission_dir, mod.filename)
+        return os.path.join(self.dst_dir, mod.filename)
+
+    @staticmethod
+    def staged_path(path: str) -> str:
+        """
+        Builds the side-by-side path an update to a mod is staged at before being swapped in
+            Hidden and within the same directory, so the swap is an atomic rename on the same filesystem
+        :param path: - STR, the installed mod's directory (or, for missions, file)
+        :return:
+            The staging path, e.g. /arma3/mods/.@ace.staged for /arma3/mods/@ace
+        """
+        return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.staged")
+
+    @staticmethod
+    def _previous_path(path: str) -> str:
+        """
+        Builds the side-by-side path the outgoing version of a mod is kept at while updates are swapped in
+        """
+        return os.path.join(
+            os.path.dirname(path), f".{os.path.basename(path)}.previous"
         )
-        if is_msn:
-            self._move_msn_mod_(mod_id, dst_dir)
+
+    def swap_in_staged_mods(
+        self,
+        paths: list[str],
+        manifests: dict[str, dict] | None = None,
+        staged_manifests: dict[str, dict] | None = None,
+    ) -> dict[str, dict]:
+        """
+        Replaces installed mods with their staged updates (see staged_path), using renames only
+            Mod directories with a manifest of their installed copy are updated file by file: only changed files
+            are replaced and removed files deleted, so unchanged files are never rewritten. Others (and missions)
+            are swapped whole.
+            Either every mod is swapped or, if any rename fails, the ones already swapped are rolled back and the
+            staged copies left in place
+        :param paths: - LIST, the installed mod paths (directories or mission files) to swap the staged updates into
+        :param manifests: - DICT, installed path to the manifest recorded for its current copy (see build_manifest)
+        :param staged_manifests: - DICT, installed path to the manifest of its staged copy, if already known; the
+            staged copy then only needs the files which differ from the installed one (see stage_snapshot)
+        :return:
+            Dict of installed path to the manifest of its new copy (for directories), but raises an exception
+            (after rolling back) if a swap fails
+        """
+        manifests = manifests or {}
+        staged_manifests = staged_manifests or {}
+        journal: list[tuple] = []
+        new_manifests = {}
+        try:
+            for path in paths:
+                staged = self.staged_path(path)
+                previous = self._previous_path(path)
+                self._discard_path_(previous)
+                if not os.path.isdir(staged):
+                    if os.path.lexists(path):
+                        self._journal_rename_(path, previous, journal)
+                    self._journal_rename_(staged, path, journal)
+                elif path in manifests and os.path.isdir(path):
+                    new_manifests[path] = self._apply_delta_(
+                        path,
+                        staged,
+                        previous,
+                        manifests[path],
+                        journal,
+                        staged_manifests.get(path),
+                    )
+                else:
+                    new_manifests[path] = self.build_manifest(staged)
+                    if os.path.lexists(path):
+                        self._journal_rename_(path, previous, journal)
+                    self._journal_rename_(staged, path, journal)
+        except OSError as e:
+            self._rollback_(journal)
+            for path in paths:
+                self._discard_path_(self._previous_path(path))
+            raise Exception(
+                f"Failed to swap in staged mod updates (rolled back): {str(e)}"
+            ) from e
+
+        for path in paths:
+            self._discard_path_(self._previous_path(path))
+            # whatever a delta update didn't need is still staged
+            self._discard_path_(self.staged_path(path))
+        return new_manifests
+
+    @classmethod
+    def build_manifest(cls, mod_dir: str) -> dict[str, list]:
+        """
+        Lists every file in a mod directory, with its size, modification time and a fast (BLAKE2b) content hash
+        :param mod_dir: - STR, the mod directory
+        :return:
+            Dict of path (relative to mod_dir) to [size in bytes, mtime in nanoseconds, hash]
+        """
+        files, _ = cls._scan_tree_(mod_dir)
+        for relative_path, entry in files.items():
+            entry.append(integrity.hash_file(os.path.join(mod_dir, relative_path)))
+        return files
+
+    def save_manifest(self, mod: Mod, files: dict[str, list]) -> None:
+        """
+        Records the manifest of a mod's installed copy
+            NOTE: not committed; commit alongside the mod's state change
+        :param mod: - Mod, the installed mod
+        :param files: - DICT, the manifest (see build_manifest)
+        :return:
+            N/A
+        """
+        if mod.manifest is None:
+            mod.manifest = ModManifest(files={})
+        # files an update replaced were renamed into place, detaching them from their link group
+        for link in list(mod.file_links):
+            entry = files.get(link.path)
+            if entry is None or entry[2] != link.content_hash:
+                mod.file_links.remove(link)
+        mod.manifest.files = files
+        mod.manifest.file_count = len(files)
+        mod.manifest.total_size = sum(entry[0] for entry in files.values())
+
+    def space_needed(self, mods: list[Mod]) -> dict[str, int]:
+        """
+        Works out the disk space downloading mods needs on each filesystem: the download in the staging directory,
+        plus its copy in the install directory (or its staged update, alongside the installed copy) when that's
+        another filesystem. Sizes come from Steam; mods without a known size count as 0
+        :param mods: - LIST, the mods to download
+        :return:
+            Dict of a directory on each filesystem written to, mapped to the bytes needed there
+        """
+        needs: dict[int, list] = {}
+        for mod in mods:
+            target = (
+                self.mission_dir if mod.mod_type == ModType.mission else self.dst_dir
+            )
+            # a move within one filesystem is a rename, so the space is only needed once
+            devices = {
+                os.stat(path).st_dev: path for path in (target, self.staging_dir)
+            }
+            for device, path in devices.items():
+                needs.setdefault(device, [path, 0])[1] += mod.size_bytes or 0
+        return dict(needs.values())
+
+    def verify_mods(self, mods: list[Mod]) -> dict[int, str | None]:
+        """
+        Checks installed mods' files are all present and intact
+            Mods with a manifest are checked file by file: sizes first, then the content hash of every file (hashed
+            across verify_workers threads). Missions, and mods installed before manifests were recorded, can only
+            be checked against the size Steam reports, and only while they're up to date (an outdated copy is
+            expected to differ)
+        :param mods: - LIST, the installed mods to verify
+        :return:
+            Dict of mod ID to a description of what's wrong with it, or None if it's intact
+        """
+        problems: dict[int, str | None] = {}
+        # absolute path -> (mod ID, expected hash)
+        expected_hashes: dict[str, tuple[int, str]] = {}
+        for mod in mods:
+            path = mod.local_path
+            if not path or not os.path.exists(path):
+                problems[mod.id] = "mod not found on disk"
+                continue
+            problems[mod.id] = None
+            if mod.manifest is None or not os.path.isdir(path):
+                on_disk = (
+                    sum(entry[0] for entry in self._scan_tree_(path)[0].values())
+                    if os.path.isdir(path)
+                    else os.path.getsize(path)
+                )
+                up_to_date = not (
+                    mod.steam_last_updated
+                    and mod.last_updated
+                    and mod.steam_last_updated > mod.last_updated
+                )
+                if up_to_date and mod.size_bytes and on_disk < mod.size_bytes:
+                    problems[mod.id] = (
+                        f"partial: {on_disk} of {mod.size_bytes} bytes on disk"
+                    )
+                continue
+
+            files, _ = self._scan_tree_(path)
+            missing = [name for name in mod.manifest.files if name not in files]
+            resized = [
+                name
+                for name, entry in mod.manifest.files.items()
+                if name in files and files[name][0] != entry[0]
+            ]
+            if missing or resized:
+                problems[mod.id] = (
+                    f"partial: {len(missing)} files missing, {len(resized)} files the wrong size"
+                )
+                continue
+            for name, entry in mod.manifest.files.items():
+                expected_hashes[os.path.join(path, name)] = (mod.id, entry[2])
+
+        hashes = integrity.hash_files(list(expected_hashes), self.verify_workers)
+        corrupt: dict[int, int] = {}
+        for file_path, (mod_id, expected) in expected_hashes.items():
+            if hashes[file_path] != expected:
+                corrupt[mod_id] = corrupt.get(mod_id, 0) + 1
+        for mod_id, count in corrupt.items():
+            problems[mod_id] = f"corrupt: {count} files don't match their manifest"
+        return problems
+
+    def current_manifest(self, mod: Mod) -> dict[str, list]:
+        """
+        Lists the files of an installed mod directory as build_manifest does, but only hashes files whose size or
+        mtime differ from the mod's recorded manifest
+        :param mod: - Mod, the installed mod
+        :return:
+            Dict of path (relative to the mod directory) to [size in bytes, mtime in nanoseconds, hash]
+        """
+        return self.current_manifests([mod])[mod.id]
+
+    def current_manifests(self, mods: list[Mod]) -> dict[int, dict[str, list]]:
+        """
+        current_manifest for many installed mod directories, hashing the files which need it across
+        verify_workers threads
+        :param mods: - LIST, the installed mods
+        :return:
+            Dict of mod ID to its current manifest
+        """
+        manifests = {}
+        # absolute path -> the manifest entry awaiting its hash
+        unhashed = {}
+        for mod in mods:
+            recorded = mod.manifest.files if mod.manifest else {}
+            files, _ = self._scan_tree_(mod.local_path)
+            for relative_path, entry in files.items():
+                known = recorded.get(relative_path)
+                if known is not None and known[:2] == entry:
+                    entry.append(known[2])
+                else:
+                    unhashed[os.path.join(mod.local_path, relative_path)] = entry
+            manifests[mod.id] = files
+        hashes = integrity.hash_files(list(unhashed), self.verify_workers)
+        for path, entry in unhashed.items():
+            if hashes[path] is None:
+                raise OSError(f"Unable to read {path}")
+            entry.append(hashes[path])
+        return manifests
+
+    def snapshot_mod(self, mod: Mod) -> ModSnapshot | None:
+        """
+        Backs up the installed copy of a mod directory to the backup directory
+            Files unchanged since the mod's latest snapshot are hardlinked to that snapshot's copy, so only the
+            files which changed are copied. The snapshot is written under a temporary name and renamed into place
+            once complete
+            NOTE: not committed; commit alongside the mod's state change
+        :param mod: - Mod, the installed mod
+        :return:
+            The new snapshot, or None if snapshots are disabled or the mod isn't an installed directory (e.g. a mission)
+        """
+        if not self.backup_dir or self.snapshot_retention < 1:
+            return None
+        if not mod.local_path or not os.path.isdir(mod.local_path):
+            return None
+
+        installed = self.current_manifest(mod)
+        latest = mod.snapshots[-1] if mod.snapshots else None
+        mod_backup_dir = os.path.join(self.backup_dir, os.path.basename(mod.local_path))
+        os.makedirs(mod_backup_dir, exist_ok=True)
+        created_at = datetime.now()
+        path = os.path.join(mod_backup_dir, created_at.strftime("%Y%m%dT%H%M%S%f"))
+        partial = f"{path}.partial"
+        files = {}
+        copied_size = 0
+        try:
+            for relative_path, entry in installed.items():
+                target = os.path.join(partial, relative_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                previous = latest.files.get(relative_path) if latest else None
+                if (
+                    previous is not None
+                    and previous[0] == entry[0]
+                    and previous[2] == entry[2]
+                    and self._link_(os.path.join(latest.path, relative_path), target)
+                ):
+                    # a hardlink has the previous copy's mtime
+                    files[relative_path] = previous
+                    continue
+                shutil.copy2(os.path.join(mod.local_path, relative_path), target)
+                files[relative_path] = entry
+                copied_size += entry[0]
+            os.rename(partial, path)
+        except BaseException:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+
+        snapshot = ModSnapshot(
+            path=path,
+            files=files,
+            file_count=len(files),
+            total_size=sum(entry[0] for entry in files.values()),
+            copied_size=copied_size,
+            mod_last_updated=mod.last_updated,
+            created_at=created_at,
+        )
+        mod.snapshots.append(snapshot)
+        print(
+            f"Snapshotted {mod.local_path} to {path}: {len(files)} files, "
+            f"{copied_size / 1048576:.1f} MiB copied"
+        )
+        return snapshot
+
+    def prune_snapshots(self, mod: Mod) -> int:
+        """
+        Deletes a mod's snapshots beyond the retention limits: all but the newest snapshot_retention, and (if
+        snapshot_max_age_days is set) any but the newest older than that
+            NOTE: not committed; commit alongside the mod's state change
+        :param mod: - Mod, the mod to prune snapshots of
+        :return:
+            The number of snapshots deleted
+        """
+        newest_first = sorted(
+            mod.snapshots, key=lambda snapshot: snapshot.created_at, reverse=True
+        )
+        cutoff = (
+            datetime.now() - timedelta(days=self.snapshot_max_age_days)
+            if self.snapshot_max_age_days
+            else None
+        )
+        expired = [
+            snapshot
+            for age, snapshot in enumerate(newest_first)
+            if age >= self.snapshot_retention
+            or (cutoff is not None and age > 0 and snapshot.created_at < cutoff)
+        ]
+        for snapshot in expired:
+            self._discard_path_(snapshot.path)
+            mod.snapshots.remove(snapshot)
+        return len(expired)
+
+    def stage_snapshot(self, mod: Mod, snapshot: ModSnapshot) -> dict[str, list]:
+        """
+        Stages a snapshot of a mod (see staged_path), so swap_in_staged_mods can roll the mod back to it
+            Only the files which differ from the installed copy are staged, hardlinked from the snapshot where
+            possible. Pass the snapshot's files as the staged manifest when swapping
+        :param mod: - Mod, the installed mod
+        :param snapshot: - ModSnapshot, the snapshot to roll back to
+        :return:
+            The manifest of the installed copy, to pass to swap_in_staged_mods
+        """
+        installed = self.current_manifest(mod)
+        staged = self.staged_path(mod.local_path)
+        self._discard_path_(staged)
+        os.makedirs(staged)
+        for relative_path, entry in snapshot.files.items():
+            current = installed.get(relative_path)
+            if current is not None and current[2] == entry[2]:
+                continue
+            source = os.path.join(snapshot.path, relative_path)
+            target = os.path.join(staged, relative_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if not self._link_(source, target):
+                shutil.copy2(source, target)
+        return installed
+
+    def delete_snapshots(self, mod: Mod) -> None:
+        """
+        Deletes all of a mod's snapshots from disk (their rows go with the mod)
+        :param mod: - Mod, the mod being removed
+        :return:
+            N/A
+        """
+        for snapshot in mod.snapshots:
+            self._discard_path_(snapshot.path)
+        for mod_backup_dir in {os.path.dirname(s.path) for s in mod.snapshots}:
+            if os.path.isdir(mod_backup_dir) and not os.listdir(mod_backup_dir):
+                os.rmdir(mod_backup_dir)
+
+    def dedup_mods(self, mods: list[Mod]) -> dict[str, int]:
+        """
+        Replaces identical read-only files (see DEDUP_EXTENSIONS) across installed mod directories with hardlinks
+        to a single copy, recording each link group
+            Files are matched by size and content hash (files changed since their manifest was recorded are
+            re-hashed, across verify_workers threads). Each duplicate is swapped for a link with a rename, so a
+            file is never missing. Updates replace files by renaming new copies into place, so updating one mod
+            never changes the files of another
+            NOTE: not committed
+        :param mods: - LIST, the installed mods to deduplicate (their existing link groups are rebuilt)
+        :return:
+            Dict with the number of "files_linked", the "bytes_reclaimed" (less than the bytes linked, where a
+            replaced copy is still referenced elsewhere, e.g. by a snapshot) and the number of link "groups"
+        """
+        manifests = self.current_manifests(mods)
+        groups: dict[tuple[int, str], list[tuple[Mod, str]]] = {}
+        for mod in mods:
+            for relative_path, entry in manifests[mod.id].items():
+                extension = os.path.splitext(relative_path)[1].lower()
+                if entry[0] > 0 and extension in self.DEDUP_EXTENSIONS:
+                    groups.setdefault((entry[0], entry[2]), []).append(
+                        (mod, relative_path)
+                    )
+
+        for mod in mods:
+            mod.file_links.clear()
+        outcome = {"files_linked": 0, "bytes_reclaimed": 0, "groups": 0}
+        for (size, content_hash), members in groups.items():
+            if len(members) < 2:
+                continue
+            stats = {
+                member: os.stat(os.path.join(member[0].local_path, member[1]))
+                for member in members
+            }
+            # the copy already shared the most stays; others on its filesystem are linked to it
+            canonical = max(members, key=lambda member: stats[member].st_nlink)
+            canonical_path = os.path.join(canonical[0].local_path, canonical[1])
+            canonical_stat = stats[canonical]
+            linked = []
+            for member in members:
+                stat = stats[member]
+                if stat.st_dev != canonical_stat.st_dev:
+                    continue
+                if stat.st_ino != canonical_stat.st_ino:
+                    path = os.path.join(member[0].local_path, member[1])
+                    temporary = os.path.join(
+                        os.path.dirname(path), f".{os.path.basename(path)}.dedup"
+                    )
+                    os.link(canonical_path, temporary)
+                    try:
+                        os.replace(temporary, path)
+                    except OSError:
+                        os.remove(temporary)
+                        raise
+                    outcome["files_linked"] += 1
+                    if stat.st_nlink == 1:
+                        outcome["bytes_reclaimed"] += size
+                    manifests[member[0].id][member[1]] = [
+                        size,
+                        canonical_stat.st_mtime_ns,
+                        content_hash,
+                    ]
+                linked.append(member)
+            if len(linked) < 2:
+                continue
+            outcome["groups"] += 1
+            for mod, relative_path in linked:
+                mod.file_links.append(
+                    ModFileLink(
+                        path=relative_path, content_hash=content_hash, size=size
+                    )
+                )
+        for mod in mods:
+            self.save_manifest(mod, manifests[mod.id])
+        return outcome
+
+    @staticmethod
+    def get_link_groups() -> dict[str, int]:
+        """
+        Summarises the files shared between mods by deduplication
+        :return:
+            Dict with the number of link "groups" (of two or more files), the "files" in them, and the
+            "bytes_shared" (stored once rather than once per file)
+        """
+        rows = db.session.execute(
+            select(
+                ModFileLink.content_hash,
+                sqlalchemy.func.count(),
+                sqlalchemy.func.max(ModFileLink.size),
+            )
+            .group_by(ModFileLink.content_hash)
+            .having(sqlalchemy.func.count() > 1)
+        ).all()
+        return {
+            "groups": len(rows),
+            "files": sum(count for _, count, _ in rows),
+            "bytes_shared": sum((count - 1) * size for _, count, size in rows),
+        }
+
+    @staticmethod
+    def _link_(src: str, dst: str) -> bool:
+        """
+        Hardlinks dst to src, if possible (i.e. on the same filesystem, and src still exists)
+        """
+        try:
+            os.link(src, dst)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _scan_tree_(root: str) -> tuple[dict[str, list], list[str]]:
+        """
+        Stats every file beneath a directory, in a single scandir pass
+        :return:
+            A tuple of the files, as relative path to [size in bytes, mtime in nanoseconds], and the relative paths
+            of the subdirectories
+        """
+        files = {}
+        directories = []
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            with os.scandir(directory) as scanner:
+                for entry in scanner:
+                    relative_path = os.path.relpath(entry.path, root)
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(relative_path)
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files[relative_path] = [stat.st_size, stat.st_mtime_ns]
+        return files, directories
+
+    def _apply_delta_(
+        self,
+        path: str,
+        staged: str,
+        previous: str,
+        manifest: dict[str, list],
+        journal: list[tuple],
+        new_files: dict[str, list] | None = None,
+    ) -> dict[str, list]:
+        """
+        Updates an installed mod directory to match its staged copy, moving only the files which differ
+            A file is unchanged if its hash matches the manifest AND its size and mtime on disk still match what the
+            manifest recorded (so files changed behind the manifest's back are replaced too). Replaced and removed
+            files are moved to the previous path, so the update can be rolled back.
+        :return:
+            The manifest of the updated directory
+        """
+        if new_files is None:
+            new_files = self.build_manifest(staged)
+        installed, installed_dirs = self._scan_tree_(path)
+        updated = {}
+        changed = []
+        for relative_path, entry in new_files.items():
+            recorded = manifest.get(relative_path)
+            if (
+                recorded is not None
+                and recorded[2] == entry[2]
+                and installed.get(relative_path) == recorded[:2]
+            ):
+                updated[relative_path] = recorded
+            else:
+                changed.append(relative_path)
+                updated[relative_path] = entry
+
+        removed = [
+            relative_path
+            for relative_path in installed
+            if relative_path not in new_files
+        ]
+        for relative_path in removed + [p for p in changed if p in installed]:
+            self._journal_rename_(
+                os.path.join(path, relative_path),
+                os.path.join(previous, relative_path),
+                journal,
+            )
+        # directories which no longer hold any files go too (deepest first), before a file may take their name
+        kept_dirs = {
+            directory
+            for relative_path in new_files
+            for directory in self._ancestors_(os.path.dirname(relative_path))
+        }
+        for directory in sorted(installed_dirs, key=len, reverse=True):
+            full_path = os.path.join(path, directory)
+            if directory not in kept_dirs and not os.listdir(full_path):
+                os.rmdir(full_path)
+                journal.append(("rmdir", full_path))
+        for relative_path in changed:
+            self._journal_rename_(
+                os.path.join(staged, relative_path),
+                os.path.join(path, relative_path),
+                journal,
+            )
+        return updated
+
+    @staticmethod
+    def _ancestors_(relative_path: str) -> list[str]:
+        """
+        Lists a relative path and each of its parents, e.g. a/b/c -> [a/b/c, a/b, a]
+        """
+        ancestors = []
+        while relative_path:
+            ancestors.append(relative_path)
+            relative_path = os.path.dirname(relative_path)
+        return ancestors
+
+    @staticmethod
+    def _journal_rename_(src: str, dst: str, journal: list[tuple]) -> None:
+        """
+        Renames a file or directory (creating the destination's parent directories), recording each step so it
+        can be rolled back
+        """
+        missing = []
+        parent = os.path.dirname(dst)
+        while not os.path.isdir(parent):
+            missing.append(parent)
+            parent = os.path.dirname(parent)
+        for directory in reversed(missing):
+            os.mkdir(directory)
+            journal.append(("mkdir", directory))
+        os.rename(src, dst)
+        journal.append(("rename", src, dst))
+
+    @staticmethod
+    def _rollback_(journal: list[tuple]) -> None:
+        """
+        Undoes the steps recorded by _journal_rename_ (and directory removals), most recent first
+        """
+        for step in reversed(journal):
+            if step[0] == "rename":
+                os.rename(step[2], step[1])
+            elif step[0] == "mkdir":
+                os.rmdir(step[1])
+            elif step[0] == "rmdir":
+                os.mkdir(step[1])
+
+    def discard_staged_mods(self, paths: list[str]) -> None:
+        """
+        Deletes staged updates which won't be swapped in
+        :param paths: - LIST, the installed mod paths whose staged updates should be removed
+        :return:
+            N/A
+        """
+        for path in paths:
+            self._discard_path_(self.staged_path(path))
+
+    @staticmethod
+    def _discard_path_(path: str) -> None:
+        """
+        Deletes a mod directory or mission file, if it exists
+        """
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+    def download_mods(
+        self,
+        mods: list[dict],
+        batch_size: int | None = None,
+        progress_callback: Callable[[dict], None] | None = None,
+    ) -> dict:
+        """
+        Downloads many mods across the pool of steamcmd workers, each fetching up to batch_size of them per
+        invocation (one start-up and login)
+            Each finished item is moved (and lowercased) individually, so one failure doesn't fail the batch
+            Items whose "dst_dir" is the installed copy of a mod with a manifest fail without being downloaded:
+            updates to those go to its staged_path instead
+        :param mods: - LIST, of dicts with the "steam_id" to download, the "dst_dir" to move it to, "is_msn" and
+            optionally its "size" in bytes (used to spread the work evenly across workers)
+        :param batch_size: - INT, items per steamcmd invocation (defaults to the configured download batch size)
+        :param progress_callback: - CALLABLE, receives progress snapshots (see DownloadProgress) parsed from the
+            steamcmd output, at most once per progress interval
+        :return:
+            Dict of steam ID to None (success) or a message explaining why that item failed
+        """
+        batch_size = batch_size or self.download_batch_size
+        # installed copies with a manifest are only ever replaced file by file, from their staged path (see
+        # swap_in_staged_mods), never deleted and downloaded whole
+        installed = self._installed_with_manifest_([mod["dst_dir"] for mod in mods])
+        results = {
+            mod[
+                "steam_id"
+            ]: f"{mod['dst_dir']} is installed; updates must be downloaded to its staged path"
+            for mod in mods
+            if mod["dst_dir"] in installed
+        }
+        mods = [mod for mod in mods if mod["dst_dir"] not in installed]
+        progress = DownloadProgress(
+            {mod["steam_id"]: mod.get("size") for mod in mods},
+            progress_callback,
+            self.progress_interval,
+        )
+        queues = [
+            queue
+            for queue in self._schedule_downloads(mods, self.download_workers)
+            if queue
+        ]
+        if len(queues) <= 1:
+            results.update(
+                self._download_queue(
+                    0, queues[0] if queues else [], batch_size, progress
+                )
+            )
         else:
-            self._move_single_mod_(mod_id, dst_dir)
+            with ThreadPoolExecutor(max_workers=len(queues)) as executor:
+                for worker_results in executor.map(
+                    self._download_queue,
+                    range(len(queues)),
+                    queues,
+                    [batch_size] * len(queues),
+                    [progress] * len(queues),
+                ):
+                    results.update(worker_results)
+        progress.publish(force=True)
+        return results
+
+    @staticmethod
+    def _installed_with_manifest_(paths: list[str]) -> set[str]:
+        """
+        Finds which of the given paths hold the installed copy of a mod with a manifest
+        :param paths: - LIST, mod directories (or mission files)
+        :return:
+            The subset of paths which are installed (or being updated) and have a manifest
+        """
+        if not paths:
+            return set()
+        return set(
+            db.session.scalars(
+                select(Mod.local_path)
+                .join(Mod.manifest)
+                .where(
+                    Mod.status.in_([ModStatus.installed, ModStatus.update_requested]),
+                    Mod.local_path.in_(paths),
+                )
+            )
+        )
+
+    @staticmethod
+    def _schedule_downloads(mods: list[dict], workers: int) -> list[list[dict]]:
+        """
+        Spreads downloads across workers by size: largest first, each to the worker with the fewest bytes queued
+            so one large terrain doesn't hold up every other mod
+        :param mods: - LIST, of download dicts (see download_mods)
+        :param workers: - INT, the number of workers
+        :return:
+            One list of downloads per worker, largest first
+        """
+        queues: list[list[dict]] = [[] for _ in range(max(workers, 1))]
+        # (bytes queued, items queued, worker number) for each worker; item counts spread mods of unknown size
+        loads = [(0, 0, worker) for worker in range(len(queues))]
+        for mod in sorted(mods, key=lambda mod: mod.get("size") or 0, reverse=True):
+            queued, items, worker = heapq.heappop(loads)
+            queues[worker].append(mod)
+            heapq.heappush(loads, (queued + (mod.get("size") or 0), items + 1, worker))
+        return queues
+
+    def worker_staging_dir(self, worker: int) -> str:
+        """
+        Builds the staging directory of a steamcmd worker
+            Every worker downloads into (and keeps its ACF cache in) its own directory, so concurrent workers never
+            clear or move each other's files
+        :param worker: - INT, the worker number
+        :return:
+            The path to the worker's staging directory
+        """
+        return os.path.join(self.staging_dir, f"worker_{worker}")
+
+    def _download_queue(
+        self,
+        worker: int,
+        mods: list[dict],
+        batch_size: int,
+        progress: "DownloadProgress",
+    ) -> dict:
+        """
+        Downloads a worker's share of the mods, batch by batch
+        :param worker: - INT, the worker number
+        :param mods: - LIST, of download dicts (see download_mods)
+        :param batch_size: - INT, items per steamcmd invocation
+        :param progress: - DownloadProgress, the tracker shared by every worker
+        :return:
+            Dict of steam ID to None (success) or a message explaining why that item failed
+        """
+        staging_dir = self.worker_staging_dir(worker)
+        os.makedirs(staging_dir, exist_ok=True)
+        results = {}
+        for start in range(0, len(mods), batch_size):
+            batch = mods[start : start + batch_size]
+            failures = self._run_steam_cmd_downloads(
+                [mod["steam_id"] for mod in batch], staging_dir, worker, progress
+            )
+            for mod in batch:
+                if mod["steam_id"] in failures:
+                    results[mod["steam_id"]] = failures[mod["steam_id"]]
+                    continue
+                try:
+                    if mod["is_msn"]:
+                        stats = self._move_msn_mod_(
+                            mod["steam_id"], mod["dst_dir"], staging_dir
+                        )
+                    else:
+                        stats = self._move_single_mod_(
+                            mod["steam_id"], mod["dst_dir"], staging_dir
+                        )
+                    progress.record_transfer(stats)
+                    results[mod["steam_id"]] = None
+                except Exception as e:
+                    results[mod["steam_id"]] = str(e)
+                    progress.fail(mod["steam_id"])
+        return results
+
+    def _run_steam_cmd_downloads(
+        self,
+        steam_mod_ids: list[int],
+        staging_dir: str,
+        worker: int,
+        progress: "DownloadProgress",
+    ) -> dict[int, str]:
+        """
+        Runs a single steamcmd session downloading every given workshop item, streaming its output into the
+        progress tracker as it's printed
+        :param steam_mod_ids: - LIST, the steam IDs of the mods to download
+        :param staging_dir: - STR, the worker staging directory to download into
+        :param worker: - INT, the worker number
+        :param progress: - DownloadProgress, the tracker to feed
+        :return:
+            Dict of steam ID to failure reason, for items steamcmd reported as failed
+        """
+        self._nuke_steam_cache_(staging_dir)
+        command = [
+            self.steam_cmd_path,
+            f"+force_install_dir {staging_dir}",
+            # TODO: handle first-time login / cached credential problems
+            f"+login {self.steam_cmd_user}",
+        ]
+        for steam_mod_id in steam_mod_ids:
+            command += [
+                f"+workshop_download_item {self.arma3_app_id} {steam_mod_id}",
+                "validate",
+            ]
+        command.append("+quit")
+        # a failed item makes steamcmd exit non-zero, so items are checked individually rather than via the exit code
+        failures = {}
+        with subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1,
+        ) as process:
+            for line in process.stdout:
+                print(line, end="")
+                progress.feed(worker, line)
+                if match := self.STEAM_CMD_FAILURE.search(line):
+                    failures[int(match.group(1))] = (
+                        f"steamcmd failed to download the item: {match.group(2)}"
+                    )
+        return failures
 
-    def _nuke_steam_cache_(self):
+    def _nuke_steam_cache_(self, staging_dir: str):
         """
         Deletes the steamcmd cache of what's been downloaded so it doesn't block downloads but report them as successful
+        :param staging_dir: - STR, the worker staging directory holding the cache
         :return:
         """
         try:
             os.remove(
                 os.path.join(
-                    self.staging_dir,
+                    staging_dir,
                     "steamapps",
                     "workshop",
                     f"appworkshop_{self.arma3_app_id}.acf",
@@ -283,13 +1595,17 @@ class Arma3ModManager:
             # cache may not exist yet, don't care if it fails to delete
             pass
 
-    def _move_msn_mod_(self, mod_id: int, dst_dir: str):
+    def _move_msn_mod_(
+        self, mod_id: int, dst_dir: str, staging_dir: str
+    ) -> transfer.TransferStats:
         """
         Moves a downloaded mission to the mpmissions folder within Arma 3
         :param mod_id: INT, the steam ID of the mod to move
         :param dst_dir: STR, the destination directory to move the downloaded mod to
             for example, /home/tim/arma3_install/mpmissions/<msn_name>
+        :param staging_dir: STR, the worker staging directory the mission was downloaded to
         :return:
+            Throughput metrics for the move
         """
         # extract the mission name from the destination directory
         msn_final_filename = dst_dir.split("/")[-1]
@@ -297,7 +1613,7 @@ class Arma3ModManager:
         msn_dst_dir = dst_dir[0 : dst_dir.rfind("/")]
         # build the path the mission got downloaded to
         src_dir = os.path.join(
-            self.staging_dir,
+            staging_dir,
             "steamapps",
             "workshop",
             "content",
@@ -313,22 +1629,28 @@ class Arma3ModManager:
                 # delete the old version so we can move the updated on there
                 # does not use _delete_mod as it's a file, not a folder
                 os.remove(msn_dst)
-            shutil.move(msn_current_filename, msn_dst)
+            stats = transfer.move(msn_current_filename, msn_dst, self.transfer_workers)
             os.rmdir(src_dir)
+            return stats
         except IndexError as e:
             raise Exception(
                 "Mission does not follow understood mission download format; download failed"
             ) from e
 
-    def _move_single_mod_(self, mod_id: int, dst_dir: str):
+    def _move_single_mod_(
+        self, mod_id: int, dst_dir: str, staging_dir: str
+    ) -> transfer.TransferStats:
         """
         Moves a downloaded mod from the staging directory to the destination directory
+            A rename if both are on the same filesystem, otherwise a reflink or parallel copy (see transfer.move)
         :param mod_id: - INT, the steam ID of the mod to get move
         :param dst_dir: - STR, the destination directory to move the downloaded mod to
+        :param staging_dir: - STR, the worker staging directory the mod was downloaded to
         :return:
+            Throughput metrics for the move
         """
         src_dir = os.path.join(
-            self.staging_dir,
+            staging_dir,
             "steamapps",
             "workshop",
             "content",
@@ -340,43 +1662,92 @@ class Arma3ModManager:
                 "Unable to locate mod: download failed or files deleted (check Celery logs)"
             )
 
+        # lowercased while still in staging, which is usually on the faster disk
+        self._lowercase_mod_(src_dir)
+        # never an installed copy with a manifest (see download_mods): a leftover staged update, or a mod which has
+        # no manifest or isn't installed
         self._delete_mod_(dst_dir)
-        os.rename(
+        return transfer.move(
             src_dir,
             os.path.join(
                 self.dst_dir,
                 dst_dir,
             ),
-        )
-        self._lowercase_mod_(
-            os.path.join(
-                self.dst_dir,
-                dst_dir,
-            )
+            self.transfer_workers,
         )
 
-    @staticmethod
-    def _lowercase_mod_(dst_dir: str):
+    @classmethod
+    def _lowercase_mod_(cls, dst_dir: str) -> list[str]:
         """
-        Lowercases all mod files (for use on *nix)
+        Lowercases all mod files and directories (for use on *nix)
+            Plans every rename in a single scandir pass, skipping names which are already lowercase, then renames
+            deepest first (so planned paths stay valid), with the renames at each depth spread across threads
         :param dst_dir: - STR, the directory to lowercase all files and directories within
         :return:
+            The paths which weren't lowercased, because another entry in the same directory already has (or would
+            get) that lowercase name, or because the rename failed
         """
+        renames, skipped = cls._plan_lowercase_(dst_dir)
 
-        # https://stackoverflow.com/a/3075668
-        def rename_all(root, items):
-            for name in items:
+        def rename_all(batch: list[tuple[str, str, str]]) -> list[str]:
+            failed = []
+            for parent, name, lowercase in batch:
                 try:
                     os.rename(
-                        os.path.join(root, name), os.path.join(root, name.lower())
+                        os.path.join(parent, name), os.path.join(parent, lowercase)
                     )
-                except OSError:
-                    pass  # can't rename it, skip
+                except OSError as e:
+                    failed.append(f"{os.path.join(parent, name)} ({str(e)})")
+            return failed
+
+        with ThreadPoolExecutor(max_workers=cls.LOWERCASE_WORKERS) as executor:
+            for depth in sorted(renames, reverse=True):
+                # one batch per directory, so each thread works through a subtree's entries
+                batches: dict[str, list[tuple[str, str, str]]] = {}
+                for rename in renames[depth]:
+                    batches.setdefault(rename[0], []).append(rename)
+                for failed in executor.map(rename_all, batches.values()):
+                    skipped += failed
+
+        for path in skipped:
+            print(f"Unable to lowercase {path}")
+        return skipped
 
-        # starts from the bottom so paths further up remain valid after renaming
-        for root, dirs, files in os.walk(dst_dir, topdown=False):
-            rename_all(root, dirs)
-            rename_all(root, files)
+    @staticmethod
+    def _plan_lowercase_(
+        dst_dir: str,
+    ) -> tuple[dict[int, list[tuple[str, str, str]]], list[str]]:
+        """
+        Walks a directory once, working out which entries need lowercasing
+        :param dst_dir: - STR, the directory to plan for
+        :return:
+            A tuple of the renames, as (parent, name, lowercase name) grouped by depth, and the entries which can't
+            be renamed because their lowercase name is taken (case-insensitive collisions)
+        """
+        renames: dict[int, list[tuple[str, str, str]]] = {}
+        collisions = []
+        pending = [(dst_dir, 0)]
+        while pending:
+            directory, depth = pending.pop()
+            with os.scandir(directory) as scanner:
+                entries = list(scanner)
+            names = {entry.name for entry in entries}
+            lowercase_names: dict[str, int] = {}
+            for entry in entries:
+                lowercase = entry.name.lower()
+                lowercase_names[lowercase] = lowercase_names.get(lowercase, 0) + 1
+            for entry in entries:
+                # paths are planned with their original names, so children are renamed before their parents
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((entry.path, depth + 1))
+                lowercase = entry.name.lower()
+                if lowercase == entry.name:
+                    continue
+                if lowercase in names or lowercase_names[lowercase] > 1:
+                    collisions.append(entry.path)
+                    continue
+                renames.setdefault(depth, []).append((directory, entry.name, lowercase))
+        return renames, collisions
 
     def _validate_dirs(self):
         """
@@ -384,6 +1755,8 @@ class Arma3ModManager:
         :return:
         """
         directories = [self.staging_dir, self.dst_dir, self.mission_dir]
+        if self.backup_dir:
+            directories.append(self.backup_dir)
 
         for directory in directories:
             if not os.path.exists(directory):
@@ -408,16 +1781,120 @@ class Arma3ModManager:
         if os.path.exists(mod_dir):
             shutil.rmtree(mod_dir)
 
+    def reconcile_installed_mods(self) -> int:
+        """
+        Rescans the mod directories and corrects any installed mods whose files have disappeared
+        :return:
+            The number of mods which were corrected
+        """
+        self.directory_index.rebuild()
+        installed = Mod.query.filter(Mod.status == ModStatus.installed).all()
+        missing = self.directory_index.missing(
+            [mod.local_path for mod in installed if mod.local_path]
+        )
+        corrected = 0
+        for mod in installed:
+            if mod.local_path in missing:
+                mod.local_path = None
+                mod.status = ModStatus.not_installed
+                corrected += 1
+        db.session.commit()
+        return corrected
+
+    @staticmethod
+    def get_all_collections():
+        """
+        Retrieves details about mod collections
+        """
+        results = []
+        for result in Collection.query.all():
+            details = result.to_dict()
+            results.append(details)
+        return results
+
+    def get_changes_since(self, since: str | None = None) -> dict:
+        """
+        Retrieves the mods, collections and collection entries created, changed or deleted since a cursor
+            Rows touched around the cursor time are returned again, so clients may see a row twice but never
+            miss one. A missing or expired cursor (older than the tombstone retention window) yields a full sync
+        :param since: - STR, the "cursor" returned by the previous call (an ISO 8601 timestamp), or None
+        :return:
+            Dict with "mods", "collections", "collection_entries", "deleted" (IDs per table), "cursor" to pass
+            next time, and "full_sync" (true when the client should replace, rather than merge, its state)
+        """
+        # taken from the database before querying so that concurrent writes land at or after the next cursor
+        now = db.session.scalar(select(sqlalchemy.func.now(type_=sqlalchemy.DateTime)))
+        since_time = datetime.fromisoformat(since) if since else None
+        if since_time and since_time.tzinfo:
+            # timestamps are stored as naive UTC
+            since_time = since_time.astimezone(UTC).replace(tzinfo=None)
+        full_sync = since_time is None or since_time < now - timedelta(
+            days=self.tombstone_retention_days
+        )
+        if since_time:
+            # func.now() timestamps only have second resolution (and SQLite compares them as text), so step back
+            # a second rather than risk skipping rows written in the same second as the cursor
+            since_time -= timedelta(seconds=1)
+
+        mod_query = select(Mod, self._image_hash_column()).order_by(Mod.id)
+        collection_query = select(Collection).order_by(Collection.id)
+        entry_query = select(ModCollectionEntry).order_by(ModCollectionEntry.id)
+        deleted = {
+            table: []
+            for table in [
+                Mod.__tablename__,
+                Collection.__tablename__,
+                ModCollectionEntry.__tablename__,
+            ]
+        }
+        if not full_sync:
+            mod_query = mod_query.where(Mod.updated_at >= since_time)
+            collection_query = collection_query.where(
+                Collection.updated_at >= since_time
+            )
+            entry_query = entry_query.where(ModCollectionEntry.updated_at >= since_time)
+            for table_name, record_id in db.session.execute(
+                select(Tombstone.table_name, Tombstone.record_id)
+                .where(Tombstone.deleted_at >= since_time)
+                .order_by(Tombstone.id)
+            ):
+                deleted[table_name].append(record_id)
+
+        collections = []
+        for collection in db.session.scalars(collection_query):
+            details = collection.to_dict()
+            # entries are reported (without mod details) in "collection_entries"
+            details.pop("mods")
+            collections.append(details)
+        return {
+            "mods": self._serialize_mods(mod_query),
+            "collections": collections,
+            "collection_entries": [
+                entry.to_dict(include_mod_details=False)
+                for entry in db.session.scalars(entry_query)
+            ],
+            "deleted": deleted,
+            "cursor": now.isoformat(),
+            "full_sync": full_sync,
+        }
+
     @staticmethod
-    def get_all_collections():
-        """
-        Retrieves details about mod collections
+    def prune_tombstones(max_age_days: int) -> int:
         """
-        results = []
-        for result in Collection.query.all():
-            details = result.to_dict()
-            results.append(details)
-        return results
+        Removes tombstones older than the retention window
+            Clients whose cursor predates the window are sent a full sync instead
+        :param max_age_days: - INT, how long to keep tombstones for
+        :return:
+            The number of tombstones removed
+        """
+        cutoff = db.session.scalar(
+            select(sqlalchemy.func.now(type_=sqlalchemy.DateTime))
+        ) - timedelta(days=max_age_days)
+        removed = db.session.execute(
+            sqlalchemy.delete(Tombstone).where(Tombstone.deleted_at < cutoff)
+        ).rowcount
+        db.session.commit()
+        return removed
 
     @staticmethod
     def get_collection_details(collection_id: int) -> dict[str, str]:
@@ -630,11 +2107,13 @@ class SteamAPI:
     Helper class used to interact with Steam API (that is, the web API, not steamCMD)
     """
 
-    def __init__(self):
+    def __init__(self, details_chunk_size: int = 100):
         self.URLs = {
             "fileDetails": "https://api.steampowered.com/ISteamRemoteStorage/GetPublishedFileDetails/v1/",
             "getCollectionDetails": "https://api.steampowered.com/ISteamRemoteStorage/GetCollectionDetails/v1/",
         }
+        # maximum number of workshop items packed into a single GetPublishedFileDetails request
+        self.details_chunk_size = details_chunk_size
 
     def get_mod_details(self, steam_mod_id):
         """
@@ -655,15 +2134,61 @@ class SteamAPI:
             "title": "<mod name>",
         }
         """
-        payload = {
-            "itemcount": 1,
-            "publishedfileids[0]": steam_mod_id,
-        }
-        reply = httpx.post(
+        return self._classify_mod_type(self._request_file_details([steam_mod_id])[0])
+
+    def get_mods_details(
+        self, steam_mod_ids: list[int], chunk_size: int | None = None
+    ) -> dict[int, dict]:
+        """
+        Retrieves basic information about many mods at once
+            Up to `chunk_size` IDs are packed into each GetPublishedFileDetails request, so N mods cost
+            ceil(N / chunk_size) round trips instead of N
+        :param steam_mod_ids: - LIST of INT, the steam mod IDs to get details for
+        :param chunk_size: - Optional INT, overrides the configured number of IDs sent per request
+        :return:
+            DICT mapping each steam mod ID to its details (see get_mod_details)
+            IDs which Steam could not resolve (e.g., removed from the workshop) are omitted
+        """
+        chunk_size = chunk_size or self.details_chunk_size
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        results = {}
+        for start in range(0, len(steam_mod_ids), chunk_size):
+            chunk = steam_mod_ids[start : start + chunk_size]
+            for details in self._request_file_details(chunk):
+                # Steam reports lookup failures per item with a non-1 result code (and no tags)
+                if details.get("result", 1) != 1:
+                    continue
+                results[int(details["publishedfileid"])] = self._classify_mod_type(
+                    details
+                )
+        return results
+
+    def _request_file_details(self, steam_mod_ids: list[int]) -> list[dict]:
+        """
+        Issues a single GetPublishedFileDetails request for one or more workshop items
+        :param steam_mod_ids: - LIST of INT, the steam mod IDs to include in the request
+        :return:
+            The raw "publishedfiledetails" list returned by Steam
+        """
+        payload = {"itemcount": len(steam_mod_ids)}
+        for index, steam_mod_id in enumerate(steam_mod_ids):
+            payload[f"publishedfileids[{index}]"] = steam_mod_id
+        reply = http_client.post(
             self.URLs["fileDetails"],
             data=payload,
         )
-        details = reply.json()["response"]["publishedfiledetails"][0]
+        return reply.json()["response"]["publishedfiledetails"]
+
+    @staticmethod
+    def _classify_mod_type(details: dict) -> dict:
+        """
+        Determines whether a workshop item is a mod, mission, or map based on its tags
+        :param details: - DICT, the details of a single workshop item as returned by Steam
+        :return:
+            The same details, with "mod_type" set
+        """
         if any(x["tag"] == "Scenario" for x in details["tags"]):
             details["mod_type"] = "mission"
         elif any(x["tag"] == "Terrain" for x in details["tags"]):
@@ -685,7 +2210,7 @@ class SteamAPI:
             "collectioncount": 1,
             "publishedfileids[0]": collection_id,
         }
-        reply = httpx.post(
+        reply = http_client.post(
             self.URLs["getCollectionDetails"],
             data=payload,
         )
@@ -701,6 +2226,282 @@ class SteamAPI:
         return details
 
 
+class ModDirectoryIndex:
+    """
+    Index of what exists directly beneath the mod install directory and mpmissions
+        Filled by a single os.scandir pass per directory, kept in memory per process and persisted in the DB
+        (ModDirectoryEntry) so the Flask and Celery processes share it. Downloads and removals update it
+        incrementally and a periodic reconcile corrects any drift, so request handlers never stat the disk.
+    """
+
+    def __init__(self, roots: list[str], refresh_interval: float = 30.0) -> None:
+        self.roots = [os.path.normpath(root) for root in roots]
+        # how long (in seconds) the in-memory copy is trusted before re-reading the DB
+        self.refresh_interval = refresh_interval
+        self._paths: set[str] = set()
+        self._loaded_at: float | None = None
+
+    def rebuild(self) -> set[str]:
+        """
+        Rescans every indexed root and replaces the persisted index
+        :return:
+            The set of indexed paths
+        """
+        entries = {}
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            entries[root] = True
+            with os.scandir(root) as scanner:
+                for entry in scanner:
+                    entries[os.path.normpath(entry.path)] = entry.is_dir()
+
+        db.session.execute(sqlalchemy.delete(ModDirectoryEntry))
+        db.session.add_all(
+            ModDirectoryEntry(path=path, is_dir=is_dir)
+            for path, is_dir in entries.items()
+        )
+        db.session.commit()
+        self._paths = set(entries)
+        self._loaded_at = time.monotonic()
+        return self._paths
+
+    def add(self, path: str, is_dir: bool = True) -> None:
+        """
+        Records a newly installed mod directory or mission file
+            NOTE: not committed; commit alongside the mod's state change
+        :param path: - STR, the path which now exists
+        :param is_dir: - BOOL, whether the path is a directory
+        :return:
+            N/A
+        """
+        path = os.path.normpath(path)
+        if not db.session.scalar(
+            select(ModDirectoryEntry.id).where(ModDirectoryEntry.path == path)
+        ):
+            db.session.add(ModDirectoryEntry(path=path, is_dir=is_dir))
+        self._paths.add(path)
+
+    def remove(self, path: str) -> None:
+        """
+        Forgets a removed mod directory or mission file
+            NOTE: not committed; commit alongside the mod's state change
+        :param path: - STR, the path which no longer exists
+        :return:
+            N/A
+        """
+        path = os.path.normpath(path)
+        db.session.execute(
+            sqlalchemy.delete(ModDirectoryEntry).where(ModDirectoryEntry.path == path)
+        )
+        self._paths.discard(path)
+
+    def missing(self, paths: list[str]) -> set[str]:
+        """
+        Determines which of the given paths do not exist, without any disk I/O
+            Paths the in-memory copy doesn't know about are double-checked against the DB in one query
+            (another process may have installed them), and paths under a root which hasn't been scanned yet
+            are never reported missing
+        :param paths: - LIST of STR, the paths to check
+        :return:
+            The subset of paths which are known to be missing
+        """
+        self._ensure_loaded()
+        unknown = {
+            path
+            for path in paths
+            if os.path.normpath(path) not in self._paths
+            and os.path.dirname(os.path.normpath(path)) in self._paths
+        }
+        if not unknown:
+            return set()
+        found = set(
+            db.session.scalars(
+                select(ModDirectoryEntry.path).where(
+                    ModDirectoryEntry.path.in_([os.path.normpath(p) for p in unknown])
+                )
+            )
+        )
+        self._paths |= found
+        return {path for path in unknown if os.path.normpath(path) not in found}
+
+    def invalidate(self) -> None:
+        """
+        Forces the next lookup to re-read the index from the DB
+        :return:
+            N/A
+        """
+        self._loaded_at = None
+
+    def _ensure_loaded(self) -> None:
+        """
+        (Re)loads the in-memory copy from the DB when it is missing or older than refresh_interval
+        :return:
+            N/A
+        """
+        if (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.refresh_interval
+        ):
+            return
+        self._paths = set(db.session.scalars(select(ModDirectoryEntry.path)))
+        self._loaded_at = time.monotonic()
+
+
+class DownloadProgress:
+    """
+    Tracks the progress of a set of steamcmd downloads, from their output, and publishes throttled snapshots
+        Byte counts come from steamcmd's progress lines where it prints them, otherwise from each item's known
+        size (credited when the item finishes). Thread-safe, so concurrent download workers can share one tracker.
+    """
+
+    # steamcmd starting on a workshop item, e.g. "Downloading item 463939057 ..."
+    ITEM_STARTED = re.compile(r"Downloading item (\d+)")
+    # steamcmd's periodic progress, e.g. "Update state (0x61) downloading, progress: 12.50 (1024 / 8192)"
+    ITEM_PROGRESS = re.compile(r"progress: [\d.]+ \((\d+) / (\d+)\)")
+    # a finished workshop item, e.g. 'Success. Downloaded item 463939057 to "..." (8192 bytes)'
+    ITEM_FINISHED = re.compile(r"Success\. Downloaded item (\d+) to .* \((\d+) bytes\)")
+
+    def __init__(
+        self,
+        sizes: dict[int, int | None],
+        callback: Callable[[dict], None] | None = None,
+        interval: float = 2.0,
+    ) -> None:
+        """
+        :param sizes: - DICT, steam ID to expected size in bytes (None if unknown) of every item to download
+        :param callback: - CALLABLE, receives each published snapshot
+        :param interval: - FLOAT, minimum seconds between published snapshots
+        """
+        self.callback = callback
+        self.interval = interval
+        self._totals = {steam_id: size or 0 for steam_id, size in sizes.items()}
+        self._downloaded = dict.fromkeys(sizes, 0)
+        self._finished: set[int] = set()
+        self._failed: set[int] = set()
+        # the item each worker is currently downloading
+        self._current: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._output_at = self._started_at
+        self._published_at: float | None = None
+        # bytes copied (not renamed) out of staging, and the time spent copying them
+        self._moved_bytes = 0
+        self._moving_seconds = 0.0
+
+    def feed(self, worker: int, line: str) -> None:
+        """
+        Updates the progress from a line of a worker's steamcmd output, publishing a snapshot if one is due
+        :param worker: - INT, the worker which produced the line
+        :param line: - STR, the output line
+        :return:
+            N/A
+        """
+        with self._lock:
+            self._output_at = time.monotonic()
+            if match := self.ITEM_STARTED.search(line):
+                self._current[worker] = int(match.group(1))
+            elif match := self.ITEM_PROGRESS.search(line):
+                steam_id = self._current.get(worker)
+                if steam_id in self._totals:
+                    self._downloaded[steam_id] = int(match.group(1))
+                    self._totals[steam_id] = int(match.group(2))
+            elif match := self.ITEM_FINISHED.search(line):
+                self._finish(int(match.group(1)), int(match.group(2)))
+            elif match := Arma3ModManager.STEAM_CMD_FAILURE.search(line):
+                self._fail(int(match.group(1)))
+        self.publish()
+
+    def fail(self, steam_id: int) -> None:
+        """
+        Records an item which couldn't be installed, e.g. because moving it out of staging failed
+        :param steam_id: - INT, the item's steam ID
+        :return:
+            N/A
+        """
+        with self._lock:
+            self._fail(steam_id)
+
+    def record_transfer(self, stats: transfer.TransferStats) -> None:
+        """
+        Records an item's move out of staging, for the transfer throughput
+        :param stats: - TransferStats, the move's metrics
+        :return:
+            N/A
+        """
+        if stats.method == "rename":
+            return
+        with self._lock:
+            self._moved_bytes += stats.bytes
+            self._moving_seconds += stats.seconds
+
+    def _fail(self, steam_id: int) -> None:
+        if steam_id in self._totals:
+            self._failed.add(steam_id)
+            self._finished.add(steam_id)
+
+    def _finish(self, steam_id: int, size: int) -> None:
+        if steam_id in self._totals:
+            self._totals[steam_id] = self._downloaded[steam_id] = size
+            self._finished.add(steam_id)
+
+    def snapshot(self) -> dict:
+        """
+        Summarises the progress so far
+        :return:
+            Dict with item and byte counts, percent complete, throughput (bytes/second), ETA (seconds, None if
+            unknown), the seconds since steamcmd last printed anything (a growing value means a stall) and the
+            throughput of copying finished items out of staging (None if they were all renamed)
+        """
+        now = time.monotonic()
+        elapsed = now - self._started_at
+        downloaded = sum(self._downloaded.values())
+        total = sum(self._totals.values())
+        throughput = downloaded / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if total and throughput:
+            eta = round(max(total - downloaded, 0) / throughput, 1)
+        return {
+            "message": f"Downloaded {len(self._finished - self._failed)} of {len(self._totals)} mods",
+            "items_total": len(self._totals),
+            "items_done": len(self._finished),
+            "items_failed": len(self._failed),
+            "bytes_downloaded": downloaded,
+            "bytes_total": total,
+            "percent": round(100 * downloaded / total, 1) if total else None,
+            "bytes_per_second": round(throughput),
+            "eta_seconds": eta,
+            "elapsed_seconds": round(elapsed, 1),
+            "seconds_since_output": round(now - self._output_at, 1),
+            "moved_bytes": self._moved_bytes,
+            "move_bytes_per_second": (
+                round(self._moved_bytes / self._moving_seconds)
+                if self._moving_seconds
+                else None
+            ),
+        }
+
+    def publish(self, force: bool = False) -> None:
+        """
+        Sends a snapshot to the callback, at most once per interval unless forced
+        :param force: - BOOL, publish even if the interval hasn't passed (e.g. when finished)
+        :return:
+            N/A
+        """
+        if self.callback is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if (
+                not force
+                and self._published_at is not None
+                and now - self._published_at < self.interval
+            ):
+                return
+            self._published_at = now
+            self.callback(self.snapshot())
+
+
 class ScheduleHelper:
     @staticmethod
     def get_schedules() -> list[dict[str, str]]:
@@ -923,6 +2724,32 @@ class Arma3ServerHelper:
         active_server = ServerConfig.query.filter(ServerConfig.is_active).first()
         return active_server.to_dict(include_sensitive=True)
 
+    @staticmethod
+    def get_running_server_config() -> ServerConfig | None:
+        """
+        Finds the server configuration the dedicated server is started with
+        :return:
+            The ServerConfig, or None if no server is defined
+        """
+        return ServerConfig.query.first()
+
+    def get_loaded_mod_ids(self) -> set[int]:
+        """
+        Determines which mods the dedicated server (and its headless clients) load, i.e. those in its collection
+        :return:
+            Set of mod IDs
+        """
+        server = self.get_running_server_config()
+        if server is None:
+            return set()
+        return set(
+            db.session.scalars(
+                select(ModCollectionEntry.mod_id).where(
+                    ModCollectionEntry.collection_id == server.collection_id
+                )
+            )
+        )
+
     @staticmethod
     def is_server_running() -> bool:
         """
@@ -989,7 +2816,7 @@ class Arma3ServerHelper:
         :param headless_client:
         :return: - ([command_with_args], working_directory)
         """
-        entry = ServerConfig.query.first()
+        entry = Arma3ServerHelper.get_running_server_config()
         if not entry:
             raise Exception("Unable to start server: no server is defined!")
         server_details = entry.to_dict(include_sensitive=True)
@@ -1032,6 +2859,457 @@ class Arma3ServerHelper:
         return command, os.path.dirname(server_details["server_binary"])
 
 
+class DiskAdmissionHelper:
+    """
+    Admission control for downloads, based on free disk space
+        Each download reserves the space it needs on every filesystem it writes to. It's admitted only if that fits
+        in the free space, less the headroom and the space reserved by downloads in flight or waiting ahead of it
+        (see DownloadQueueHelper for the order they wait in).
+        Otherwise it's deferred until space frees up, or rejected straight away if nothing pending could free any
+        (or once it has waited max_wait_seconds)
+    """
+
+    def __init__(
+        self,
+        headroom_bytes: int = 1073741824,
+        retry_seconds: int = 300,
+        max_wait_seconds: int = 21600,
+    ) -> None:
+        self.headroom_bytes = headroom_bytes
+        self.retry_seconds = retry_seconds
+        self.max_wait_seconds = max_wait_seconds
+
+    @staticmethod
+    def reserve(
+        task_type: str,
+        mod_ids: list[int],
+        space: dict[str, int],
+        reservation_id: int | None = None,
+        priority: int = 0,
+        task_name: str | None = None,
+        args: list | None = None,
+    ) -> DiskReservation:
+        """
+        Gets the reservation of a deferred download (keeping its place in line), or creates one for a new download
+        :param task_type: - STR, the kind of task the space is for, e.g. "mod_download"
+        :param mod_ids: - LIST, the mods being downloaded
+        :param space: - DICT, a directory on each filesystem written to, mapped to the bytes needed there
+        :param reservation_id: - INT, the reservation the download was deferred with, if any
+        :param priority: - INT, how urgent the download is (see DownloadQueueHelper)
+        :param task_name: - STR, the task to dispatch when the download's turn comes
+        :param args: - LIST, the positional arguments to dispatch the task with
+        :return:
+            The (committed) reservation
+        """
+        reservation = (
+            db.session.get(DiskReservation, reservation_id) if reservation_id else None
+        )
+        if reservation is None:
+            reservation = DiskReservation(
+                task_type=task_type, task_name=task_name, args=args, priority=0
+            )
+            db.session.add(reservation)
+        # requests merged into the download may have made it more urgent
+        reservation.priority = max(reservation.priority, priority)
+        # the mods still waiting may have changed (e.g. downloaded by another task) since it was deferred
+        reservation.mod_ids = mod_ids
+        reservation.space = space
+        db.session.commit()
+        return reservation
+
+    def admit(self, reservation: DiskReservation) -> tuple[str, str]:
+        """
+        Decides whether a download may start now
+        :param reservation: - DiskReservation, the download's reservation
+        :return:
+            A tuple of the decision, "admitted" (the reservation is now active), "deferred" (it keeps its place in
+            line) or "rejected" (it's released), and a description of any shortfall
+        """
+        now = db.session.scalar(select(sqlalchemy.func.now(type_=sqlalchemy.DateTime)))
+        self._expire_stale_(now)
+        others = DiskReservation.query.filter(
+            DiskReservation.id != reservation.id
+        ).all()
+        shortfalls = []
+        nothing_pending = True
+        for path, needed in reservation.space.items():
+            device = os.stat(path).st_dev
+            competing = [
+                other.space[other_path]
+                for other in others
+                if other.state == ReservationState.active
+                or DownloadQueueHelper.rank(other)
+                < DownloadQueueHelper.rank(reservation)
+                for other_path in other.space
+                if self._device_(other_path) == device
+            ]
+            free = shutil.disk_usage(path).free - self.headroom_bytes
+            available = free - sum(competing)
+            if needed > available:
+                shortfalls.append(
+                    f"{path} needs {needed / 1048576:.0f} MiB, "
+                    f"{max(available, 0) / 1048576:.0f} MiB available"
+                )
+                nothing_pending = nothing_pending and not competing
+        if not shortfalls:
+            reservation.state = ReservationState.active
+            reservation.attempts += 1
+            db.session.commit()
+            return "admitted", ""
+
+        waited = (now - reservation.created_at).total_seconds()
+        if nothing_pending or waited >= self.max_wait_seconds:
+            self.release(reservation.id)
+            return "rejected", "; ".join(shortfalls)
+        reservation.state = ReservationState.deferred
+        reservation.attempts += 1
+        db.session.commit()
+        return "deferred", "; ".join(shortfalls)
+
+    @staticmethod
+    def release(reservation_id: int) -> None:
+        """
+        Gives up a download's reserved space, once its files are on disk (or it has failed)
+        :param reservation_id: - INT, the reservation to release
+        :return:
+            N/A
+        """
+        db.session.execute(
+            sqlalchemy.delete(DownloadQueueEntry).where(
+                DownloadQueueEntry.reservation_id == reservation_id
+            )
+        )
+        db.session.execute(
+            sqlalchemy.delete(DiskReservation).where(
+                DiskReservation.id == reservation_id
+            )
+        )
+        db.session.commit()
+
+    def get_queue(self, paths: list[str]) -> dict[str, list[dict]]:
+        """
+        Lists the downloads in flight, then those waiting in the order they'll start, and the filesystems they're
+        written to
+        :param paths: - LIST, directories on the filesystems to report (e.g. the staging and install directories)
+        :return:
+            Dict of "reservations" (with their "position" in the queue, see DownloadQueueHelper.get_positions),
+            "depth" (how many downloads are in the queue, how many of them are waiting, and how many mods they
+            cover) and "filesystems" (with their total, free and reserved bytes, and the headroom)
+        """
+        positions = DownloadQueueHelper.get_positions()
+        reservations = sorted(
+            DiskReservation.query.all(),
+            key=lambda reservation: (positions[reservation.id], reservation.id),
+        )
+        filesystems = {}
+        for path in paths:
+            device = self._device_(path)
+            if device is None or device in filesystems:
+                continue
+            usage = shutil.disk_usage(path)
+            filesystems[device] = {
+                "path": path,
+                "total": usage.total,
+                "free": usage.free,
+                "reserved": sum(
+                    size
+                    for reservation in reservations
+                    for reserved_path, size in reservation.space.items()
+                    if self._device_(reserved_path) == device
+                ),
+                "headroom": self.headroom_bytes,
+            }
+        return {
+            "reservations": [
+                reservation.to_dict() | {"position": positions[reservation.id]}
+                for reservation in reservations
+            ],
+            "depth": {
+                "downloads": len(reservations),
+                "waiting": sum(position > 0 for position in positions.values()),
+                "mods": db.session.scalar(
+                    select(sqlalchemy.func.count(DownloadQueueEntry.id))
+                ),
+            },
+            "filesystems": list(filesystems.values()),
+        }
+
+    def expire_stale(self) -> None:
+        """
+        Forgets reservations whose task has gone away without releasing them, see _expire_stale_
+        :return:
+            N/A
+        """
+        self._expire_stale_(
+            db.session.scalar(select(sqlalchemy.func.now(type_=sqlalchemy.DateTime)))
+        )
+        db.session.commit()
+
+    def _expire_stale_(self, now: datetime) -> None:
+        """
+        Forgets reservations whose task has gone away without releasing them (e.g. the worker was killed)
+            Deferred reservations are touched on every retry; any reservation untouched for longer than a download
+            may wait for space is assumed abandoned. Queued ones have no task until their turn comes, so are kept
+        """
+        cutoff = now - timedelta(seconds=self.max_wait_seconds + self.retry_seconds)
+        stale = db.session.scalars(
+            select(DiskReservation.id).where(
+                DiskReservation.updated_at < cutoff,
+                DiskReservation.state != ReservationState.queued,
+            )
+        ).all()
+        if not stale:
+            return
+        db.session.execute(
+            sqlalchemy.delete(DownloadQueueEntry).where(
+                DownloadQueueEntry.reservation_id.in_(stale)
+            )
+        )
+        db.session.execute(
+            sqlalchemy.delete(DiskReservation).where(DiskReservation.id.in_(stale))
+        )
+
+    @staticmethod
+    def _device_(path: str) -> int | None:
+        """
+        The filesystem a path is on, or None if it doesn't exist
+        """
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            return None
+
+
+class DownloadQueueHelper:
+    """
+    Persistent queue of mod downloads (and updates), keyed by mod
+        Each mod is queued under at most one download: asking for a mod already queued or in flight merges the
+        request into that download (raising its priority if the new request is more urgent) instead of racing
+        it. Downloads start in priority order, oldest first within a priority, at most concurrency at a time;
+        when one finishes, the next in line is dispatched (see advance)
+    """
+
+    # manual requests go first, then downloads of mods the server loads, then background (scheduled) updates
+    PRIORITY_MANUAL = 20
+    PRIORITY_ACTIVE_COLLECTION = 10
+    PRIORITY_BACKGROUND = 0
+
+    def __init__(self, concurrency: int = 1) -> None:
+        self.concurrency = concurrency
+
+    @classmethod
+    def priority(
+        cls, mod_ids: list[int], manual: bool, active_mod_ids: set[int]
+    ) -> int:
+        """
+        Works out how urgent a download is
+        :param mod_ids: - LIST, the mods being downloaded
+        :param manual: - BOOL, whether a user asked for it (rather than a schedule)
+        :param active_mod_ids: - SET, the mods in the server's collection
+        :return:
+            The priority; higher priorities start first
+        """
+        priority = cls.PRIORITY_MANUAL if manual else cls.PRIORITY_BACKGROUND
+        if active_mod_ids.intersection(mod_ids):
+            priority += cls.PRIORITY_ACTIVE_COLLECTION
+        return priority
+
+    @staticmethod
+    def rank(reservation: DiskReservation) -> tuple[int, int]:
+        """
+        Sort key putting downloads in the order they start: most urgent first, then oldest first
+        """
+        return -reservation.priority, reservation.id
+
+    @staticmethod
+    def enqueue(
+        reservation: DiskReservation, mod_ids: list[int]
+    ) -> tuple[list[int], dict[int, int]]:
+        """
+        Queues mods under a download, merging those already queued (or in flight) under another into that one
+        :param reservation: - DiskReservation, the download's reservation
+        :param mod_ids: - LIST, the mods the download wants
+        :return:
+            A tuple of the mod IDs queued under this download, and the merged mod IDs mapped to the reservation
+            they're queued under
+        """
+        entries = {
+            entry.mod_id: entry
+            for entry in DownloadQueueEntry.query.filter(
+                DownloadQueueEntry.mod_id.in_(mod_ids)
+            )
+        }
+        queued, merged = [], {}
+        for mod_id in mod_ids:
+            entry = entries.get(mod_id)
+            if entry is None:
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(
+                            DownloadQueueEntry(
+                                mod_id=mod_id, reservation_id=reservation.id
+                            )
+                        )
+                    queued.append(mod_id)
+                    continue
+                except sqlalchemy.exc.IntegrityError:
+                    # another request queued it in the meantime
+                    entry = DownloadQueueEntry.query.filter_by(mod_id=mod_id).first()
+                    if entry is None:
+                        continue
+            if entry.reservation_id == reservation.id:
+                queued.append(mod_id)
+            else:
+                merged[mod_id] = entry.reservation_id
+        if merged:
+            # the download a request is merged into is at least as urgent as the request
+            db.session.execute(
+                sqlalchemy.update(DiskReservation)
+                .where(
+                    DiskReservation.id.in_(set(merged.values())),
+                    DiskReservation.priority < reservation.priority,
+                )
+                .values(priority=reservation.priority)
+            )
+        # forget mods the download no longer wants, e.g. downloaded by another task since it was deferred
+        db.session.execute(
+            sqlalchemy.delete(DownloadQueueEntry).where(
+                DownloadQueueEntry.reservation_id == reservation.id,
+                DownloadQueueEntry.mod_id.not_in(mod_ids),
+            )
+        )
+        db.session.commit()
+        return queued, merged
+
+    def is_turn(self, reservation: DiskReservation) -> bool:
+        """
+        Checks whether a download may start now, i.e. fewer than concurrency downloads are in flight or waiting
+        ahead of it
+        :param reservation: - DiskReservation, the download's reservation
+        :return:
+            True if it may start
+        """
+        ahead = [
+            other
+            for other in DiskReservation.query.filter(
+                DiskReservation.id != reservation.id
+            )
+            if other.state == ReservationState.active
+            or self.rank(other) < self.rank(reservation)
+        ]
+        return len(ahead) < self.concurrency
+
+    @staticmethod
+    def wait(reservation: DiskReservation) -> None:
+        """
+        Leaves a download waiting in line, to be dispatched by advance once its turn comes
+        :param reservation: - DiskReservation, the download's reservation
+        :return:
+            N/A
+        """
+        reservation.state = ReservationState.queued
+        reservation.attempts += 1
+        db.session.commit()
+
+    def advance(self) -> list[int]:
+        """
+        Dispatches the downloads next in line into any free slots
+            Downloads deferred for space take their slot too, but retry by themselves
+        :return:
+            The IDs of the reservations dispatched
+        """
+        reservations = sorted(DiskReservation.query.all(), key=self.rank)
+        slots = self.concurrency - sum(
+            reservation.state == ReservationState.active for reservation in reservations
+        )
+        dispatched = []
+        for reservation in reservations:
+            if slots <= 0:
+                break
+            if reservation.state == ReservationState.active:
+                continue
+            slots -= 1
+            if (
+                reservation.state != ReservationState.queued
+                or not reservation.task_name
+            ):
+                continue
+            # claim it first, so concurrent callers never dispatch it twice
+            claimed = db.session.execute(
+                sqlalchemy.update(DiskReservation)
+                .where(
+                    DiskReservation.id == reservation.id,
+                    DiskReservation.state == ReservationState.queued,
+                )
+                .values(state=ReservationState.deferred)
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                continue
+            try:
+                celery.send_task(
+                    f"app.tasks.background.{reservation.task_name}",
+                    args=reservation.args,
+                    kwargs={"reservation_id": reservation.id},
+                )
+                dispatched.append(reservation.id)
+            except Exception as e:
+                print(f"Failed to dispatch queued download {reservation.id}: {e}")
+        return dispatched
+
+    @classmethod
+    def get_positions(cls) -> dict[int, int]:
+        """
+        Works out each download's place in the queue: 0 once it's in flight, otherwise 1, 2, ... in the order the
+        waiting ones will start
+        :return:
+            Dict of reservation ID to position
+        """
+        reservations = DiskReservation.query.all()
+        waiting = sorted(
+            (
+                reservation
+                for reservation in reservations
+                if reservation.state != ReservationState.active
+            ),
+            key=cls.rank,
+        )
+        positions = {
+            reservation.id: 0
+            for reservation in reservations
+            if reservation.state == ReservationState.active
+        }
+        positions.update(
+            {
+                reservation.id: position
+                for position, reservation in enumerate(waiting, 1)
+            }
+        )
+        return positions
+
+    @classmethod
+    def get_mod_position(cls, mod_id: int) -> dict[str, Any] | None:
+        """
+        Looks up where a mod is in the download queue
+        :param mod_id: - INT, the mod to look up
+        :return:
+            Dict of the "reservation" the mod is queued under (with its "position") and the queue "depth" (the
+            number of downloads in it), or None if the mod isn't queued
+        """
+        entry = DownloadQueueEntry.query.filter_by(mod_id=mod_id).first()
+        if entry is None:
+            return None
+        positions = cls.get_positions()
+        return {
+            "mod_id": mod_id,
+            "reservation": db.session.get(
+                DiskReservation, entry.reservation_id
+            ).to_dict()
+            | {"position": positions[entry.reservation_id]},
+            "depth": len(positions),
+        }
+
+
 class TaskStatus(enum.StrEnum):
     """
     Helper class for the possible states a task can be updated to
@@ -1041,9 +3319,30 @@ class TaskStatus(enum.StrEnum):
     failed = "FAILED"  # Task encountered an unrecoverable exception
     running = "RUNNING"  # Task is currently being executed
     aborted = "ABORTED"  # Task precondition failed and it did not attempt to run
+    progress = "PROGRESS"  # Task is running and has published progress details
 
 
 class TaskHelper:
+    def progress_reporter(self, current_task) -> Callable[[dict], None] | None:  # type: ignore
+        """
+        Builds a callback which publishes progress details as the task's state (see DownloadProgress)
+            The task and its ID are resolved up front, as Celery tracks the current task per thread and progress
+            may be reported from download worker threads
+        :param current_task:
+            The current task being executed
+        :return:
+            The callback, or None when not running as a Celery task (e.g. called directly)
+        """
+        if not current_task or not current_task.request.id:
+            return None
+        task = current_task._get_current_object()
+        task_id = current_task.request.id
+
+        def report(meta: dict) -> None:
+            task.update_state(task_id=task_id, state=TaskStatus.progress, meta=meta)
+
+        return report
+
     def update_task_state(
         self,
         current_task,  # type: ignore
@@ -1142,7 +3441,7 @@ class TaskHelper:
             return
         for notification in notifications:
             try:
-                httpx.post(
+                http_client.post(
                     notification.URL,
                     json={
                         "content": f"Task {task_type} has finished with outcome {task_outcome}",
@@ -0,0 +1,128 @@
+"""Shared, pooled HTTP client for outbound requests (Steam web API, Steam CDN, webhooks)."""
+
+import os
+import threading
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # type: ignore[import-not-found]  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    # httpx only speaks HTTP/2 when the optional "h2" package is installed
+    HTTP2_AVAILABLE = False
+
+DEFAULT_SETTINGS: dict[str, Any] = {
+    "HTTP2": True,
+    "MAX_CONNECTIONS": 20,
+    "MAX_KEEPALIVE_CONNECTIONS": 10,
+    "KEEPALIVE_EXPIRY": 30.0,
+    "TIMEOUT": 10.0,
+    # per-host overrides of TIMEOUT, e.g. {"steamuserimages-a.akamaihd.net": 30.0}
+    "HOST_TIMEOUTS": {},
+}
+
+_settings: dict[str, Any] = dict(DEFAULT_SETTINGS)
+_client: httpx.Client | None = None
+_client_pid: int | None = None
+_lock = threading.Lock()
+
+
+def configure_http_client(settings: dict[str, Any]) -> None:
+    """
+    Applies client settings (usually Config.HTTP_CLIENT)
+        Any existing client is closed so the next request picks up the new settings
+    :param settings: - DICT, overrides for DEFAULT_SETTINGS
+    :return:
+        N/A
+    """
+    global _settings
+    with _lock:
+        _settings = {**DEFAULT_SETTINGS, **settings}
+    close_http_client()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Returns the process-wide HTTP client, creating it on first use
+        The client is owned by the process that created it; a forked child (the Celery worker or Flask
+        process started by main.py) never reuses its parent's pooled connections
+    :return:
+        The shared httpx.Client
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _lock:
+        if _client is None or _client_pid != pid:
+            _client = httpx.Client(
+                http2=_settings["HTTP2"] and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=_settings["MAX_CONNECTIONS"],
+                    max_keepalive_connections=_settings["MAX_KEEPALIVE_CONNECTIONS"],
+                    keepalive_expiry=_settings["KEEPALIVE_EXPIRY"],
+                ),
+                timeout=_settings["TIMEOUT"],
+            )
+            _client_pid = pid
+    return _client
+
+
+def close_http_client() -> None:
+    """
+    Closes the shared client (if this process owns one)
+    :return:
+        N/A
+    """
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def timeout_for(url: str) -> float:
+    """
+    Looks up the timeout to use for a given URL based on its host
+    :param url: - STR, the URL about to be requested
+    :return:
+        The timeout, in seconds
+    """
+    host = urlsplit(url).hostname or ""
+    return _settings["HOST_TIMEOUTS"].get(host, _settings["TIMEOUT"])
+
+
+def get(url: str, **kwargs: Any) -> httpx.Response:
+    """
+    Issues a GET through the shared client, applying the per-host timeout
+    """
+    kwargs.setdefault("timeout", timeout_for(url))
+    return get_http_client().get(url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> httpx.Response:
+    """
+    Issues a POST through the shared client, applying the per-host timeout
+    """
+    kwargs.setdefault("timeout", timeout_for(url))
+    return get_http_client().post(url, **kwargs)
+
+
+def _reset_after_fork() -> None:
+    """
+    Drops the inherited client in a forked child without closing it
+        Closing would tear down sockets (and TLS sessions) which still belong to the parent
+    """
+    global _client, _client_pid, _lock
+    _client = None
+    _client_pid = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
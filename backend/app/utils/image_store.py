@@ -0,0 +1,189 @@
+"""Pluggable storage for mod preview images."""
+
+import hashlib
+import io
+import os
+import tempfile
+
+try:
+    from PIL import Image  # type: ignore[import-not-found]
+
+    THUMBNAILS_AVAILABLE = True
+except ImportError:
+    # thumbnails are only generated when the optional "pillow" package is installed
+    THUMBNAILS_AVAILABLE = False
+
+
+class ImageStore:
+    """
+    Where the bytes of a ModImage live
+        ModImage.storage records the name of the store which holds each image
+    """
+
+    name = ""
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        """
+        Hashes image bytes; the hash identifies the image in every store
+        :param data: - BYTES, the image
+        :return:
+            The SHA-256 hex digest of the image
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    def put(self, data: bytes) -> str:
+        """
+        Stores an image (if it isn't stored already)
+        :param data: - BYTES, the image
+        :return:
+            The image's content hash
+        """
+        raise NotImplementedError
+
+    def path(self, content_hash: str, size: int | None = None) -> str | None:
+        """
+        Locates an image (or one of its thumbnails) on disk
+        :param content_hash: - STR, the image's content hash
+        :param size: - INT, the thumbnail size wanted, or None for the original
+        :return:
+            The path to the file, or None if this store doesn't have it on disk
+        """
+        return None
+
+    def release(self, content_hash: str) -> None:
+        """
+        Removes an image which is no longer referenced by any ModImage
+        :param content_hash: - STR, the image's content hash
+        :return:
+            N/A
+        """
+
+
+class DatabaseImageStore(ImageStore):
+    """
+    Keeps image bytes in ModImage.image_data, inside the main database (no thumbnails)
+    """
+
+    name = "database"
+
+    def put(self, data: bytes) -> str:
+        return self.content_hash(data)
+
+
+class FilesystemImageStore(ImageStore):
+    """
+    Writes each distinct image once, to a file named after its content hash, alongside fixed-size thumbnails
+        e.g. <root>/3f/3fa9...e1 is the original, <root>/3f/3fa9...e1_64.jpg its 64 pixel thumbnail
+        Mods sharing a preview image share its files
+    """
+
+    name = "filesystem"
+
+    def __init__(self, root: str, thumbnail_sizes: list[int] | None = None) -> None:
+        self.root = root
+        self.thumbnail_sizes = sorted(thumbnail_sizes or [])
+        os.makedirs(self.root, exist_ok=True)
+
+    def put(self, data: bytes) -> str:
+        content_hash = self.content_hash(data)
+        original = self._original_path(content_hash)
+        if not os.path.exists(original):
+            self._write(original, data)
+        if THUMBNAILS_AVAILABLE and self.thumbnail_sizes:
+            missing = [
+                size
+                for size in self.thumbnail_sizes
+                if self.path(content_hash, size) is None
+            ]
+            if missing:
+                self._write_thumbnails(content_hash, data, missing)
+        return content_hash
+
+    def path(self, content_hash: str, size: int | None = None) -> str | None:
+        if size is None:
+            candidates = [self._original_path(content_hash)]
+        else:
+            candidates = [
+                self._thumbnail_path(content_hash, size, extension)
+                for extension in ["jpg", "png"]
+            ]
+        for candidate in candidates:
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def release(self, content_hash: str) -> None:
+        directory = os.path.dirname(self._original_path(content_hash))
+        if not os.path.isdir(directory):
+            return
+        for entry in os.scandir(directory):
+            if entry.name == content_hash or entry.name.startswith(f"{content_hash}_"):
+                os.remove(entry.path)
+
+    def _original_path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash)
+
+    def _thumbnail_path(self, content_hash: str, size: int, extension: str) -> str:
+        return os.path.join(
+            self.root, content_hash[:2], f"{content_hash}_{size}.{extension}"
+        )
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        """
+        Writes a file atomically, so a concurrent reader never sees a partial image
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _write_thumbnails(
+        self, content_hash: str, data: bytes, sizes: list[int]
+    ) -> None:
+        """
+        Renders thumbnails which fit within size x size pixels
+            JPEG, unless the image has transparency (PNG)
+        """
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.load()
+                has_alpha = image.mode in ("RGBA", "LA") or (
+                    "transparency" in image.info
+                )
+                image = image.convert("RGBA" if has_alpha else "RGB")
+                for size in sizes:
+                    thumbnail = image.copy()
+                    thumbnail.thumbnail((size, size))
+                    buffer = io.BytesIO()
+                    if has_alpha:
+                        thumbnail.save(buffer, "PNG", optimize=True)
+                        extension = "png"
+                    else:
+                        thumbnail.save(buffer, "JPEG", quality=85, optimize=True)
+                        extension = "jpg"
+                    self._write(
+                        self._thumbnail_path(content_hash, size, extension),
+                        buffer.getvalue(),
+                    )
+        except (OSError, ValueError) as e:
+            # not something Pillow can read; the original is still served
+            print(f"Unable to create thumbnails for image {content_hash}: {str(e)}")
+
+
+def build_image_store(settings: dict) -> ImageStore:
+    """
+    Creates the image store selected in the configuration (usually Config.IMAGE_STORE)
+    :param settings: - DICT, with "BACKEND" ("filesystem" or "database"), "DIR" and "THUMBNAIL_SIZES"
+    :return:
+        The image store
+    """
+    if settings.get("BACKEND", "filesystem") == DatabaseImageStore.name:
+        return DatabaseImageStore()
+    return FilesystemImageStore(settings["DIR"], settings.get("THUMBNAIL_SIZES"))
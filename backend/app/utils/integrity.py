@@ -0,0 +1,58 @@
+"""Hashing installed mod files, across worker threads when verifying many mods at once."""
+
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# files at least this large (i.e. most PBOs) are hashed through a memory map rather than read into buffers
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """
+    Hashes a file's contents with BLAKE2b (the hash recorded in mod manifests)
+        Large files are memory-mapped, letting the hash read straight from the page cache without copying
+    :param path: - STR, the file to hash
+    :return:
+        The hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as mod_file:
+        size = os.fstat(mod_file.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(mod_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, "madvise"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                digest.update(mapped)
+        else:
+            digest = hashlib.file_digest(
+                mod_file, lambda: hashlib.blake2b(digest_size=16)
+            )
+    return digest.hexdigest()
+
+
+def _hash_or_none(path: str) -> str | None:
+    """
+    Hashes a file, or returns None if it can't be read (e.g. deleted since it was listed)
+    """
+    try:
+        return hash_file(path)
+    except OSError:
+        return None
+
+
+def hash_files(paths: list[str], workers: int) -> dict[str, str | None]:
+    """
+    Hashes many files across a pool of threads (so hashing isn't limited to one core)
+        hashlib releases the GIL while hashing, so threads hash in parallel without forking the Celery worker,
+        which may itself be running tasks in threads
+    :param paths: - LIST, the files to hash
+    :param workers: - INT, threads to hash with; 1 hashes in this thread
+    :return:
+        Dict of path to hex digest, or None for files which couldn't be read
+    """
+    if workers <= 1 or len(paths) <= 1:
+        return {path: _hash_or_none(path) for path in paths}
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        return dict(zip(paths, executor.map(_hash_or_none, paths), strict=True))
@@ -0,0 +1,252 @@
+"""Moving downloaded mods between filesystems (e.g. staging on NVMe, mods on a large array)."""
+
+import errno
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+
+    REFLINK_AVAILABLE = True
+except ImportError:
+    # fcntl is unavailable on Windows, where files are always byte-copied
+    REFLINK_AVAILABLE = False
+
+# ioctl request cloning one file's extents into another (Linux, on btrfs/XFS and other copy-on-write filesystems)
+FICLONE = 0x40049409
+# size of the pieces large files are split into, so a single big file is copied by several threads
+CHUNK_SIZE = 8 * 1024 * 1024
+# reflink/copy_file_range errors meaning "not supported here", rather than an actual I/O failure
+UNSUPPORTED = {errno.EXDEV, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY, errno.ENOSYS}
+
+
+class TransferStats:
+    """
+    Throughput metrics for a move
+        method is "rename" (same filesystem), "reflink" (copy-on-write clone) or "copy" (byte copy); a copy
+        which reflinked some files and byte-copied others reports "copy"
+    """
+
+    def __init__(self) -> None:
+        self.method = "rename"
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, size: int) -> None:
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "files": self.files,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "bytes_per_second": round(self.bytes_per_second),
+        }
+
+
+def move(src: str, dst: str, workers: int = 4) -> TransferStats:
+    """
+    Moves a file or directory to dst, which must not exist yet
+        On the same filesystem this is a rename. Otherwise the files are cloned with reflinks where the filesystem
+        supports it, or else copied in parallel chunks, fsynced, and the copy renamed into place in one step (so dst
+        never holds a partial mod), before src is deleted
+    :param src: - STR, the file or directory to move
+    :param dst: - STR, where to move it to
+    :param workers: - INT, threads copying chunks when a byte copy is needed
+    :return:
+        TransferStats for the move (printed, unless it was a rename)
+    """
+    stats = TransferStats()
+    started = time.monotonic()
+    if _same_device(src, os.path.dirname(dst)):
+        try:
+            # nothing is copied, so there are no file or byte counts to report
+            os.rename(src, dst)
+            stats.seconds = time.monotonic() - started
+            return stats
+        except OSError as e:
+            # e.g. bind mounts of one filesystem; fall back to copying
+            if e.errno != errno.EXDEV:
+                raise
+
+    partial = os.path.join(
+        os.path.dirname(dst), f".{os.path.basename(dst)}.partial{os.getpid()}"
+    )
+    try:
+        stats.method = _copy(src, partial, workers, stats)
+        os.rename(partial, dst)
+    except BaseException:
+        if os.path.isdir(partial):
+            shutil.rmtree(partial, ignore_errors=True)
+        elif os.path.lexists(partial):
+            os.remove(partial)
+        raise
+    # dst is in place from here on, so there's nothing to roll back
+    _fsync_dir(os.path.dirname(dst))
+    if os.path.isdir(src):
+        shutil.rmtree(src)
+    else:
+        os.remove(src)
+    stats.seconds = time.monotonic() - started
+    print(
+        f"Moved {src} to {dst} by {stats.method}: {stats.files} files, "
+        f"{stats.bytes / 1048576:.1f} MiB in {stats.seconds:.2f}s "
+        f"({stats.bytes_per_second / 1048576:.1f} MiB/s)"
+    )
+    return stats
+
+
+def _same_device(src: str, dst_dir: str) -> bool:
+    """
+    Checks whether a rename from src into dst_dir can work (both on one filesystem)
+    """
+    return os.stat(src).st_dev == os.stat(dst_dir).st_dev
+
+
+def _copy(src: str, dst: str, workers: int, stats: TransferStats) -> str:
+    """
+    Copies a file or directory tree to dst, reflinking each file if possible and otherwise copying it in chunks
+    :return:
+        The method used: "reflink" if every file was cloned, otherwise "copy"
+    """
+    if os.path.isdir(src):
+        files = []
+        for root, _, names in os.walk(src):
+            target_root = os.path.join(dst, os.path.relpath(root, src))
+            os.makedirs(target_root, exist_ok=True)
+            files += [
+                (os.path.join(root, name), os.path.join(target_root, name))
+                for name in names
+            ]
+    else:
+        files = [(src, dst)]
+
+    reflinked = _reflink_all(files, stats) if REFLINK_AVAILABLE else set()
+    pending = [pair for pair in files if pair[0] not in reflinked]
+    if pending:
+        _chunked_copy(pending, workers, stats)
+    if os.path.isdir(src):
+        for root, dirs, _ in os.walk(dst, topdown=False):
+            _fsync_dir(root)
+            for name in dirs:
+                shutil.copystat(
+                    os.path.join(src, os.path.relpath(root, dst), name),
+                    os.path.join(root, name),
+                )
+        shutil.copystat(src, dst)
+    return "copy" if pending else "reflink"
+
+
+def _reflink_all(files: list[tuple[str, str]], stats: TransferStats) -> set[str]:
+    """
+    Clones as many files as possible, giving up at the first sign the filesystem doesn't support it
+    :return:
+        The source paths which were cloned
+    """
+    cloned = set()
+    for src, dst in files:
+        with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+            try:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            except OSError as e:
+                if e.errno in UNSUPPORTED:
+                    break
+                raise
+            os.fsync(dst_file.fileno())
+        shutil.copystat(src, dst)
+        stats.add(os.path.getsize(dst))
+        cloned.add(src)
+    return cloned
+
+
+def _chunked_copy(
+    files: list[tuple[str, str]], workers: int, stats: TransferStats
+) -> None:
+    """
+    Copies files by splitting them into CHUNK_SIZE pieces which are copied concurrently (in-kernel with
+    copy_file_range where possible), then fsyncs each file
+    """
+    sizes = {src: os.path.getsize(src) for src, _ in files}
+    for src, dst in files:
+        with open(dst, "wb") as dst_file:
+            dst_file.truncate(sizes[src])
+    chunks = [
+        (src, dst, offset, min(CHUNK_SIZE, sizes[src] - offset))
+        for src, dst in files
+        for offset in range(0, sizes[src], CHUNK_SIZE)
+    ]
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        list(executor.map(lambda chunk: _copy_chunk(*chunk), chunks))
+
+    for src, dst in files:
+        fd = os.open(dst, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        shutil.copystat(src, dst)
+        stats.add(sizes[src])
+
+
+def _copy_chunk(src: str, dst: str, offset: int, length: int) -> None:
+    """
+    Copies length bytes at offset from src to the same place in dst
+    """
+    src_fd = os.open(src, os.O_RDONLY)
+    dst_fd = os.open(dst, os.O_WRONLY)
+    try:
+        copied = 0
+        use_kernel_copy = hasattr(os, "copy_file_range")
+        while copied < length:
+            position = offset + copied
+            if use_kernel_copy:
+                try:
+                    written = os.copy_file_range(
+                        src_fd, dst_fd, length - copied, position, position
+                    )
+                except OSError as e:
+                    if e.errno not in UNSUPPORTED:
+                        raise
+                    use_kernel_copy = False
+                    continue
+            else:
+                data = os.pread(src_fd, min(length - copied, 1048576), position)
+                written = os.pwrite(dst_fd, data, position) if data else 0
+            if written == 0:
+                raise OSError(errno.EIO, f"Unexpected end of file copying {src}")
+            copied += written
+    finally:
+        os.close(src_fd)
+        os.close(dst_fd)
+
+
+def _fsync_dir(path: str) -> None:
+    """
+    Flushes a directory's entries to disk, so a rename into it survives a crash
+        Best effort: directories can't be opened (and needn't be flushed) on Windows, and a filesystem refusing
+        the flush doesn't make the files written to it any less complete
+    """
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
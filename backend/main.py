@@ -3,7 +3,7 @@
 import multiprocessing
 import platform
 
-from app import celery, create_app, db
+from app import celery, create_app, db, upgrade_database
 
 app = create_app()
 
@@ -14,23 +14,30 @@ def make_shell_context() -> dict[str, object]:
     return {"db": db}
 
 
-def _run_celery():
-    celery.worker_main(
-        [
-            "worker",
-            "--beat",
-            "--loglevel=info",
-            "--pool=solo",
-            "--concurrency=1",
-        ]
-    )
+def _run_celery(queue: str, concurrency: int):
+    """Consume one Celery queue; the control queue's worker also runs the beat scheduler."""
+    args = [
+        "worker",
+        "--loglevel=info",
+        f"--queues={queue}",
+        f"--hostname={queue}@%h",
+        # the solo pool runs a single task in the worker process itself; threads run more side by side
+        "--pool=solo" if concurrency == 1 else "--pool=threads",
+        f"--concurrency={concurrency}",
+    ]
+    if queue == "control":
+        args.append("--beat")
+    celery.worker_main(args)
 
 
 def _run_app():
     with app.app_context():
-        db.create_all()
+        upgrade_database()
         app.config["A3_SERVER_HELPER"].create_basic_server()
         app.config["MOD_MANAGERS"]["ARMA3"].empty_mod_staging_dir()
+        app.config["MOD_MANAGERS"]["ARMA3"].reconcile_installed_mods()
+        # move any preview images still stored in the database into the image store
+        app.config["MOD_MANAGERS"]["ARMA3"].migrate_images_to_store()
 
     debug_mode = app.config.get("DEBUG", False)
     # Disable reloader on Windows when running in multiprocessing context
@@ -46,18 +53,27 @@ if __name__ == "__main__":
         multiprocessing.freeze_support()
 
     app_process = multiprocessing.Process(target=_run_app, name="app")
-    celery_process = multiprocessing.Process(target=_run_celery, name="celery")
+    # one worker per queue, so control actions never wait behind bulk transfers
+    celery_processes = [
+        multiprocessing.Process(
+            target=_run_celery, args=(queue, concurrency), name=f"celery-{queue}"
+        )
+        for queue, concurrency in app.config["CELERY_WORKERS"].items()
+    ]
 
     app_process.start()
-    celery_process.start()
+    for celery_process in celery_processes:
+        celery_process.start()
 
-    print("Server and Celery worker started. Press Ctrl+C to stop both.")
+    print("Server and Celery workers started. Press Ctrl+C to stop them all.")
 
     try:
-        # Wait for both processes
+        # Wait for all processes
         app_process.join()
-        celery_process.join()
+        for celery_process in celery_processes:
+            celery_process.join()
     except KeyboardInterrupt:
         print("\nShutting down...")
         app_process.terminate()
-        celery_process.terminate()
+        for celery_process in celery_processes:
+            celery_process.terminate()
@@ -0,0 +1,35 @@
+"""mod preview image columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 01:16:02.850786
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("mods", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("preview_url", sa.String(length=500), nullable=True)
+        )
+        # existing mods already have their image (or none); the backfill sweep picks up any missing
+        batch_op.add_column(
+            sa.Column(
+                "image_pending", sa.Boolean(), nullable=False, server_default=sa.false()
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("mods", schema=None) as batch_op:
+        batch_op.drop_column("image_pending")
+        batch_op.drop_column("preview_url")
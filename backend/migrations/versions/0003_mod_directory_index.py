@@ -0,0 +1,38 @@
+"""mod directory index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 01:16:08.262048
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "mod_directory_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("path", sa.String(length=1000), nullable=False),
+        sa.Column("is_dir", sa.Boolean(), nullable=False),
+        sa.Column("scanned_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("mod_directory_entries", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_mod_directory_entries_path"), ["path"], unique=True
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("mod_directory_entries", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_mod_directory_entries_path"))
+
+    op.drop_table("mod_directory_entries")
@@ -0,0 +1,31 @@
+"""mod listing filter indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 01:16:11.142546
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("mods", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_mods_mod_type"), ["mod_type"], unique=False
+        )
+        batch_op.create_index("ix_mods_name_id", ["name", "id"], unique=False)
+        batch_op.create_index(batch_op.f("ix_mods_status"), ["status"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("mods", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_mods_status"))
+        batch_op.drop_index("ix_mods_name_id")
+        batch_op.drop_index(batch_op.f("ix_mods_mod_type"))
@@ -0,0 +1,69 @@
+"""change feed timestamps and tombstones
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 01:16:14.517218
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("table_name", sa.String(length=64), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("tombstones", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_tombstones_deleted_at"), ["deleted_at"], unique=False
+        )
+
+    with op.batch_alter_table("collections", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_collections_updated_at"), ["updated_at"], unique=False
+        )
+
+    # SQLite can't add a column defaulting to the current time, so the column is added empty, filled in (existing
+    # rows count as changed now, so clients holding an older change token fetch them again) and then made NOT NULL
+    for table in ["mod_collection_entries", "mods"]:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute(
+            sa.table(table, sa.column("updated_at", sa.DateTime()))
+            .update()
+            .values(updated_at=sa.func.current_timestamp())
+        )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(
+                "updated_at", existing_type=sa.DateTime(), nullable=False
+            )
+            batch_op.create_index(
+                batch_op.f(f"ix_{table}_updated_at"), ["updated_at"], unique=False
+            )
+
+
+def downgrade():
+    for table in ["mods", "mod_collection_entries"]:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f"ix_{table}_updated_at"))
+            batch_op.drop_column("updated_at")
+
+    with op.batch_alter_table("collections", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_collections_updated_at"))
+
+    with op.batch_alter_table("tombstones", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_tombstones_deleted_at"))
+
+    op.drop_table("tombstones")
@@ -0,0 +1,28 @@
+"""mod image content hash
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 01:16:20.295228
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("mod_images", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("content_hash", sa.String(length=64), nullable=True)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("mod_images", schema=None) as batch_op:
+        batch_op.drop_column("content_hash")
@@ -0,0 +1,50 @@
+"""mod image store
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 01:16:23.287585
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("mod_images", schema=None) as batch_op:
+        # every existing image is a blob in the database; migrate_images_to_store moves them out afterwards
+        batch_op.add_column(
+            sa.Column(
+                "storage",
+                sa.String(length=20),
+                nullable=False,
+                server_default="database",
+            )
+        )
+        batch_op.alter_column(
+            "image_data", existing_type=sa.LargeBinary(), nullable=True
+        )
+        batch_op.create_index(
+            batch_op.f("ix_mod_images_content_hash"), ["content_hash"], unique=False
+        )
+
+
+def downgrade():
+    # images moved into the filesystem store have no blob to restore
+    op.execute(
+        sa.table("mod_images", sa.column("image_data", sa.LargeBinary()))
+        .delete()
+        .where(sa.column("image_data").is_(None))
+    )
+    with op.batch_alter_table("mod_images", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_mod_images_content_hash"))
+        batch_op.alter_column(
+            "image_data", existing_type=sa.LargeBinary(), nullable=False
+        )
+        batch_op.drop_column("storage")
@@ -0,0 +1,41 @@
+"""mod manifests
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 01:16:26.324761
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "mod_manifests",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("mod_id", sa.Integer(), nullable=False),
+        sa.Column("files", sa.JSON(), nullable=False),
+        sa.Column("file_count", sa.Integer(), nullable=False),
+        sa.Column("total_size", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["mod_id"], ["mods.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("mod_manifests", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_mod_manifests_mod_id"), ["mod_id"], unique=True
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("mod_manifests", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_mod_manifests_mod_id"))
+
+    op.drop_table("mod_manifests")
@@ -0,0 +1,28 @@
+"""corrupt mod status and verify schedule
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 01:16:29.104412
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # elsewhere enums are plain string columns, long enough for the new values already
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE modstatus ADD VALUE IF NOT EXISTS 'corrupt'")
+            op.execute("ALTER TYPE scheduleaction ADD VALUE IF NOT EXISTS 'mod_verify'")
+
+
+def downgrade():
+    # PostgreSQL can't drop values from an enum type; rows using them must be changed by hand
+    pass
@@ -0,0 +1,44 @@
+"""mod snapshots
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 01:16:32.348454
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "mod_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("mod_id", sa.Integer(), nullable=False),
+        sa.Column("path", sa.String(length=500), nullable=False),
+        sa.Column("files", sa.JSON(), nullable=False),
+        sa.Column("file_count", sa.Integer(), nullable=False),
+        sa.Column("total_size", sa.Integer(), nullable=False),
+        sa.Column("copied_size", sa.Integer(), nullable=False),
+        sa.Column("mod_last_updated", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["mod_id"], ["mods.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("mod_snapshots", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_mod_snapshots_mod_id"), ["mod_id"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("mod_snapshots", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_mod_snapshots_mod_id"))
+
+    op.drop_table("mod_snapshots")
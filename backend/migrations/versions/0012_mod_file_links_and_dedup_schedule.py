@@ -0,0 +1,49 @@
+"""mod file links and dedup schedule
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 01:16:35.251958
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # elsewhere enums are plain string columns, long enough for the new value already
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE scheduleaction ADD VALUE IF NOT EXISTS 'mod_dedup'")
+
+    op.create_table(
+        "mod_file_links",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("mod_id", sa.Integer(), nullable=False),
+        sa.Column("path", sa.String(length=500), nullable=False),
+        sa.Column("content_hash", sa.String(length=32), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["mod_id"], ["mods.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("mod_file_links", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_mod_file_links_content_hash"), ["content_hash"], unique=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_mod_file_links_mod_id"), ["mod_id"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("mod_file_links", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_mod_file_links_mod_id"))
+        batch_op.drop_index(batch_op.f("ix_mod_file_links_content_hash"))
+
+    op.drop_table("mod_file_links")
@@ -0,0 +1,39 @@
+"""disk reservations
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17 01:16:38.289309
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "disk_reservations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("task_type", sa.String(length=50), nullable=False),
+        sa.Column("mod_ids", sa.JSON(), nullable=False),
+        sa.Column("space", sa.JSON(), nullable=False),
+        sa.Column(
+            "state",
+            sa.Enum("deferred", "active", name="reservationstate"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("disk_reservations")
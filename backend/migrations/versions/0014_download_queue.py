@@ -0,0 +1,64 @@
+"""download queue
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17 01:16:41.662402
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # elsewhere enums are plain string columns, long enough for the new value already
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE reservationstate ADD VALUE IF NOT EXISTS 'queued'")
+
+    op.create_table(
+        "download_queue",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("mod_id", sa.Integer(), nullable=False),
+        sa.Column("reservation_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["mod_id"], ["mods.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["reservation_id"], ["disk_reservations.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("mod_id"),
+    )
+    with op.batch_alter_table("download_queue", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_download_queue_reservation_id"),
+            ["reservation_id"],
+            unique=False,
+        )
+
+    with op.batch_alter_table("disk_reservations", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("task_name", sa.String(length=100), nullable=True)
+        )
+        batch_op.add_column(sa.Column("args", sa.JSON(), nullable=True))
+        batch_op.add_column(
+            sa.Column("priority", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("disk_reservations", schema=None) as batch_op:
+        batch_op.drop_column("priority")
+        batch_op.drop_column("args")
+        batch_op.drop_column("task_name")
+
+    with op.batch_alter_table("download_queue", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_download_queue_reservation_id"))
+
+    op.drop_table("download_queue")
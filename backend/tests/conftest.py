@@ -1,21 +1,132 @@
 """Pytest configuration and fixtures."""
 
+import json
+import os
+import sys
+import threading
 from collections.abc import Generator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
 
 import pytest
 from flask import Flask
 from flask.testing import FlaskClient
+from sqlalchemy import event
 
-from app import create_app, db
+from app import celery, create_app, db
+from app.utils.image_store import FilesystemImageStore
+
+
+class SteamStub:
+    """Local stand-in for the Steam web API.
+
+    Serves GetPublishedFileDetails for any workshop ID registered via `add_item`,
+    plus preview images, and records every request it receives so tests can
+    assert on round trips.
+    """
+
+    def __init__(self) -> None:
+        self.items: dict[int, dict] = {}
+        self.requests: list[tuple[str, dict[str, list[str]]]] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                stub.requests.append((self.path, form))
+                ids = [
+                    int(value[0])
+                    for key, value in form.items()
+                    if key.startswith("publishedfileids[")
+                ]
+                details = [
+                    stub.items.get(
+                        steam_id, {"publishedfileid": str(steam_id), "result": 9}
+                    )
+                    for steam_id in ids
+                ]
+                body = {"response": {"publishedfiledetails": details}}
+                self._reply(200, "application/json", json.dumps(body).encode())
+
+            def do_GET(self) -> None:  # noqa: N802
+                stub.requests.append((self.path, {}))
+                if self.path.startswith("/preview/"):
+                    self._reply(200, "image/png", b"\x89PNG" + self.path.encode())
+                else:
+                    self._reply(404, "text/plain", b"not found")
+
+            def _reply(self, code: int, content_type: str, body: bytes) -> None:
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def requests_to(self, path_prefix: str) -> list[tuple[str, dict[str, list[str]]]]:
+        return [
+            request for request in self.requests if request[0].startswith(path_prefix)
+        ]
+
+    @property
+    def details_url(self) -> str:
+        return f"{self.base_url}/ISteamRemoteStorage/GetPublishedFileDetails/v1/"
+
+    def add_item(self, steam_id: int, **overrides: object) -> None:
+        self.items[steam_id] = {
+            "publishedfileid": str(steam_id),
+            "result": 1,
+            "title": f"Mod {steam_id}",
+            "filename": "",
+            "file_size": 1024,
+            "preview_url": f"{self.base_url}/preview/{steam_id}.png",
+            "time_updated": 1754197938,
+            "tags": [{"tag": "Mod"}],
+            **overrides,
+        }
+
+
+@contextmanager
+def capture_queries() -> Generator[list[str], None, None]:
+    """Collect every SQL statement executed on the app's engine."""
+    statements: list[str] = []
+
+    def before_cursor_execute(*args: object) -> None:
+        statements.append(str(args[2]))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
 
 
 @pytest.fixture
-def app() -> Generator[Flask, None, None]:
+def app(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Generator[Flask, None, None]:
     """Create and configure a test Flask application."""
     app = create_app("testing")
+    mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+    # keep preview images written during a test inside that test's temporary directory
+    monkeypatch.setattr(
+        mod_manager,
+        "image_store",
+        FilesystemImageStore(str(tmp_path_factory.mktemp("images")), [64]),
+    )
 
     with app.app_context():
         db.create_all()
+        mod_manager.directory_index.invalidate()
         yield app
         db.drop_all()
 
@@ -24,3 +135,111 @@ def app() -> Generator[Flask, None, None]:
 def client(app: Flask) -> FlaskClient:
     """Create a test client for the Flask application."""
     return app.test_client()
+
+
+@pytest.fixture
+def steam_stub(app: Flask) -> Generator[SteamStub, None, None]:
+    """Point every SteamAPI instance used by the app at a local stand-in endpoint."""
+    stub = SteamStub()
+    stub.thread.start()
+    steam_apis = [
+        app.config["STEAM_API_HELPER"],
+        app.config["MOD_MANAGERS"]["ARMA3"].steam_api,
+    ]
+    original_urls = [dict(steam_api.URLs) for steam_api in steam_apis]
+    for steam_api in steam_apis:
+        steam_api.URLs["fileDetails"] = stub.details_url
+    yield stub
+    for steam_api, urls in zip(steam_apis, original_urls, strict=True):
+        steam_api.URLs = urls
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def sent_tasks(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, list]]:
+    """Record tasks sent by name instead of publishing them to the broker."""
+    sent: list[tuple[str, list]] = []
+
+    def send_task(name: str, args: list | None = None, **kwargs: object) -> object:
+        sent.append((name, list(args or [])))
+        return type("FakeAsyncResult", (), {"id": f"fake-{len(sent)}"})()
+
+    monkeypatch.setattr(celery, "send_task", send_task)
+    return sent
+
+
+FAKE_STEAMCMD = """#!{python}
+import json, os, sys
+
+args = sys.argv[1:]
+install_dir = next(a.split(" ", 1)[1] for a in args if a.startswith("+force_install_dir"))
+items = [int(a.split()[2]) for a in args if a.startswith("+workshop_download_item")]
+with open({log!r}, "a") as log:
+    log.write(json.dumps(items) + "\\n")
+failing = {failing!r}
+for item in items:
+    if item in failing:
+        print(f"ERROR! Download item {{item}} failed (Failure).")
+        continue
+    print(f"Downloading item {{item}} ...")
+    print(" Update state (0x61) downloading, progress: 50.00 (512 / 1024)")
+    content = os.path.join(install_dir, "steamapps", "workshop", "content", "107410", str(item))
+    os.makedirs(os.path.join(content, "Addons"), exist_ok=True)
+    with open(os.path.join(content, "Addons", f"MOD_{{item}}.PBO"), "w") as pbo:
+        pbo.write("x" * 1024)
+    print(f"Success. Downloaded item {{item}} to \\"{{content}}\\" (1024 bytes)")
+sys.exit(1 if failing & set(items) else 0)
+"""
+
+
+class FakeSteamCmd:
+    """Stand-in steamcmd binary.
+
+    Downloads each requested workshop item as a small mod folder in the
+    staging directory (or reports it as failed, for IDs in `failing`) and logs
+    the items requested by every invocation.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.path = str(directory / "steamcmd")
+        self.log = str(directory / "steamcmd.log")
+        self.failing: set[int] = set()
+        self.write()
+
+    def write(self) -> None:
+        """(Re)write the script, e.g. after changing `failing`."""
+        with open(self.path, "w") as script:
+            script.write(
+                FAKE_STEAMCMD.format(
+                    python=sys.executable, log=self.log, failing=self.failing
+                )
+            )
+        os.chmod(self.path, 0o755)
+
+    @property
+    def invocations(self) -> list[list[int]]:
+        """Workshop items requested by each steamcmd run, in order."""
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as log:
+            return [json.loads(line) for line in log]
+
+
+@pytest.fixture
+def fake_steamcmd(
+    app: Flask, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> FakeSteamCmd:
+    """Point the mod manager at a fake steamcmd and temporary staging/install directories."""
+    fake = FakeSteamCmd(tmp_path)
+    mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+    monkeypatch.setattr(mod_manager, "steam_cmd_path", fake.path)
+    monkeypatch.setattr(mod_manager, "staging_dir", str(tmp_path / "staging"))
+    monkeypatch.setattr(mod_manager, "dst_dir", str(tmp_path / "mods"))
+    monkeypatch.setattr(
+        mod_manager, "mission_dir", str(tmp_path / "mods" / "mpmissions")
+    )
+    monkeypatch.setattr(mod_manager, "backup_dir", str(tmp_path / "backups"))
+    for directory in ["staging", "mods", "mods/mpmissions", "backups"]:
+        (tmp_path / directory).mkdir(parents=True, exist_ok=True)
+    return fake
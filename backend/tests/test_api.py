@@ -1,20 +1,27 @@
 """API endpoint tests."""
 
+import hashlib
 import json
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
 from http import HTTPStatus
 
 import pytest
+from flask import Flask
 from flask.testing import FlaskClient
+from sqlalchemy import update
 
 from app import db
 from app.models import ModCollectionEntry
 from app.models.collection import Collection
-from app.models.mod import Mod
+from app.models.mod import Mod, ModStatus, ModType
 from app.models.mod_image import ModImage
+from app.models.mod_manifest import ModManifest
 from app.models.notification import Notification
 from app.models.schedule import Schedule
 from app.models.server_config import ServerConfig
+from app.utils.helpers import Arma3ModManager
+from tests.conftest import SteamStub, capture_queries
 
 
 @pytest.fixture
@@ -204,6 +211,55 @@ class TestArma3API:
         assert reply.status_code == HTTPStatus.OK
         assert reply.json["results"]["mod_type"] == "map"
 
+    def test_bulk_subscribe_reports_per_item_results(
+        self,
+        client: FlaskClient,
+        add_cba_to_db: None,
+        steam_stub: SteamStub,
+        sent_tasks: list[tuple[str, list]],
+    ) -> None:
+        add_cba_to_db  # noqa: B018
+        steam_ids = list(range(2000, 2150))
+        for steam_id in steam_ids:
+            steam_stub.add_item(steam_id)
+        reply = client.post(
+            "/api/arma3/mod/subscription",
+            json={
+                "mods": [{"steam_id": steam_id} for steam_id in steam_ids]
+                + [
+                    {"steam_id": 450814997},  # CBA, already subscribed
+                    {"steam_id": 1},  # unknown to Steam
+                    {"steam_id": 2000},  # duplicate within the request
+                ],
+            },
+        )
+        assert reply.status_code == HTTPStatus.OK
+        assert len(reply.json["ids"]) == len(steam_ids)
+        statuses = [result["status"] for result in reply.json["results"]]
+        assert statuses == ["subscribed"] * len(steam_ids) + ["failed"] * 3
+        assert len(Mod.query.all()) == len(steam_ids) + 1
+        # details for every new mod came from a couple of batched calls
+        assert len(steam_stub.requests_to("/ISteamRemoteStorage")) == 2
+        # preview images are left to the background queue
+        assert steam_stub.requests_to("/preview") == []
+        assert Mod.query.filter(Mod.image_pending).count() == len(steam_ids)
+        assert len(sent_tasks) == len(steam_ids)
+        assert {name for name, _ in sent_tasks} == {
+            "app.tasks.background.fetch_mod_preview_image"
+        }
+
+    def test_bulk_subscribe_fails_when_nothing_subscribed(
+        self, client: FlaskClient, add_cba_to_db: None, steam_stub: SteamStub
+    ) -> None:
+        add_cba_to_db  # noqa: B018
+        reply = client.post(
+            "/api/arma3/mod/subscription",
+            json={"mods": [{"steam_id": 450814997}]},
+        )
+        assert reply.status_code == HTTPStatus.BAD_REQUEST
+        assert reply.json["message"] == "This mod is already subscribed"
+        assert reply.json["ids"] == []
+
     def test_unscribe_from_mod(self, client: FlaskClient, add_cba_to_db: None) -> None:
         # populate the database with an entry so we can remove it
         add_cba_to_db  # noqa: B018
@@ -246,6 +302,174 @@ class TestArma3API:
         assert reply.json["results"][1]["steam_id"] == 463939057
         assert reply.json["results"][1]["steam_last_updated"] == "2025-08-03T05:12:18"
 
+    def test_get_mods_query_count_is_constant(
+        self, app: Flask, client: FlaskClient
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+
+        def add_mods(start: int, count: int) -> None:
+            for index in range(start, start + count):
+                db.session.add(
+                    Mod(
+                        steam_id=9000 + index,
+                        filename=f"@mod{index}",
+                        name=f"mod{index}",
+                        local_path=os.path.join(mod_manager.dst_dir, f"@mod{index}"),
+                        status=ModStatus.installed,
+                    )
+                )
+            db.session.commit()
+            for index in range(start, start + count, 2):
+                db.session.add(
+                    ModImage(
+                        mod_id=index + 1,
+                        image_data=b"x" * 1024,
+                        content_type="image/png",
+                    )
+                )
+            db.session.commit()
+
+        add_mods(0, 5)
+        mod_manager.directory_index.rebuild()
+        with capture_queries() as small_library:
+            reply = client.get("/api/arma3/mod/subscriptions")
+        assert reply.status_code == HTTPStatus.OK
+
+        add_mods(5, 40)
+        with capture_queries() as large_library:
+            reply = client.get("/api/arma3/mod/subscriptions")
+        assert reply.status_code == HTTPStatus.OK
+
+        # listing, directory index check, ETag version read, plus the batched correction and its version bump
+        assert len(large_library) == len(small_library) <= 5
+        # image blobs are never selected when listing
+        assert not any("image_data" in statement for statement in large_library)
+        results = reply.json["results"]
+        assert [result["image_available"] for result in results[:4]] == [
+            True,
+            False,
+            True,
+            False,
+        ]
+        # missing install dirs were corrected (in a single batch)
+        assert all(result["status"] == "not_installed" for result in results)
+        assert Mod.query.filter(Mod.status == ModStatus.installed).count() == 0
+
+    def test_get_mods_paginated(self, client: FlaskClient) -> None:
+        for index in range(7):
+            db.session.add(
+                Mod(
+                    steam_id=8000 + index,
+                    filename=f"@paged{index}",
+                    name=f"Paged {chr(ord('g') - index)}",
+                    mod_type=ModType.map if index % 2 else ModType.mod,
+                )
+            )
+        db.session.commit()
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 3, "sort": "name"}
+            if cursor:
+                params["cursor"] = cursor
+            reply = client.get("/api/arma3/mod/subscriptions", query_string=params)
+            assert reply.status_code == HTTPStatus.OK
+            assert len(reply.json["results"]) <= 3
+            seen.extend(result["name"] for result in reply.json["results"])
+            cursor = reply.json["next_cursor"]
+            if not cursor:
+                break
+        assert seen == sorted(f"Paged {chr(ord('g') - index)}" for index in range(7))
+
+        reply = client.get(
+            "/api/arma3/mod/subscriptions",
+            query_string={"mod_type": "map", "order": "desc"},
+        )
+        assert [result["id"] for result in reply.json["results"]] == [6, 4, 2]
+        assert reply.json["next_cursor"] is None
+
+        reply = client.get(
+            "/api/arma3/mod/subscriptions", query_string={"search": "paged B"}
+        )
+        assert [result["steam_id"] for result in reply.json["results"]] == [8005]
+        reply = client.get(
+            "/api/arma3/mod/subscriptions", query_string={"search": "8003"}
+        )
+        assert [result["name"] for result in reply.json["results"]] == ["Paged d"]
+
+        reply = client.get(
+            "/api/arma3/mod/subscriptions", query_string={"sort": "size"}
+        )
+        assert reply.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_get_mods_conditional(
+        self, client: FlaskClient, add_cba_to_db: None
+    ) -> None:
+        add_cba_to_db  # noqa: B018
+        reply = client.get("/api/arma3/mod/subscriptions")
+        assert reply.status_code == HTTPStatus.OK
+        etag = reply.headers["ETag"]
+        assert not etag.startswith("W/")
+
+        with capture_queries() as statements:
+            reply = client.get(
+                "/api/arma3/mod/subscriptions", headers={"If-None-Match": etag}
+            )
+        assert reply.status_code == HTTPStatus.NOT_MODIFIED
+        assert reply.data == b""
+        # only the version counter is read
+        assert len(statements) == 1
+        assert "resource_versions" in statements[0]
+
+        # unrelated resources don't invalidate the mod listing
+        client.post(
+            "/api/notification",
+            json={"URL": "http://127.0.0.1/hook", "send_server": True},
+        )
+        reply = client.get(
+            "/api/arma3/mod/subscriptions", headers={"If-None-Match": etag}
+        )
+        assert reply.status_code == HTTPStatus.NOT_MODIFIED
+
+        # nor do writes to models the listing doesn't include
+        mod = Mod.query.get(1)
+        mod.manifest = ModManifest(files={})
+        db.session.commit()
+        reply = client.get(
+            "/api/arma3/mod/subscriptions", headers={"If-None-Match": etag}
+        )
+        assert reply.status_code == HTTPStatus.NOT_MODIFIED
+
+        # the listing includes each mod's image hash
+        mod.images.append(
+            ModImage(image_data=b"png", content_type="image/png", content_hash="png")
+        )
+        db.session.commit()
+        reply = client.get(
+            "/api/arma3/mod/subscriptions", headers={"If-None-Match": etag}
+        )
+        assert reply.status_code == HTTPStatus.OK
+        assert reply.headers["ETag"] != etag
+        etag = reply.headers["ETag"]
+
+        client.patch("/api/arma3/mod/subscription/1", json={"name": "CBA"})
+        reply = client.get(
+            "/api/arma3/mod/subscriptions", headers={"If-None-Match": etag}
+        )
+        assert reply.status_code == HTTPStatus.OK
+        assert reply.headers["ETag"] != etag
+        etag = reply.headers["ETag"]
+
+        # bulk statements bypass the flush but still bump the version
+        db.session.execute(update(Mod), [{"id": 1, "should_update": False}])
+        db.session.commit()
+        reply = client.get(
+            "/api/arma3/mod/subscription/1", headers={"If-None-Match": etag}
+        )
+        assert reply.status_code == HTTPStatus.OK
+        assert reply.json["results"]["should_update"] is False
+
     def test_patch_subscribed_mod(
         self, client: FlaskClient, add_cba_to_db: None
     ) -> None:
@@ -272,6 +496,53 @@ class TestArma3API:
         )
         assert reply.status_code == HTTPStatus.OK
 
+    def test_mod_image_caching(
+        self,
+        client: FlaskClient,
+        add_cba_to_db: None,
+        add_ace_to_db: None,
+    ) -> None:
+        add_cba_to_db  # noqa: B018
+        add_ace_to_db  # noqa: B018
+        png = b"\x89PNG ace"
+        # image IDs don't line up with mod IDs
+        db.session.add(ModImage(mod_id=2, image_data=png, content_type="image/png"))
+        db.session.commit()
+
+        # stored before hashing: hashed on first request
+        reply = client.get("/api/arma3/mod/subscription/2/image")
+        assert reply.status_code == HTTPStatus.OK
+        assert reply.data == png
+        content_hash = hashlib.sha256(png).hexdigest()
+        assert reply.headers["ETag"] == f'"{content_hash}"'
+        assert reply.headers["Cache-Control"] == "no-cache"
+        assert reply.headers["Last-Modified"]
+
+        mods = client.get("/api/arma3/mod/subscriptions").json["results"]
+        assert mods[1]["image_hash"] == content_hash
+
+        url = f"/api/arma3/mod/subscription/2/image?v={content_hash}"
+        reply = client.get(url)
+        assert "immutable" in reply.headers["Cache-Control"]
+        assert "max-age=31536000" in reply.headers["Cache-Control"]
+
+        with capture_queries() as statements:
+            reply = client.get(url, headers={"If-None-Match": f'"{content_hash}"'})
+            head = client.head("/api/arma3/mod/subscription/2/image")
+        assert reply.status_code == HTTPStatus.NOT_MODIFIED
+        assert reply.data == b""
+        assert head.status_code == HTTPStatus.OK
+        assert head.data == b""
+        assert head.headers["Content-Length"] == str(len(png))
+        # neither request reads the image bytes
+        assert not any(
+            statement.startswith("SELECT mod_images.image_data")
+            for statement in statements
+        )
+
+        reply = client.get("/api/arma3/mod/subscription/3/image")
+        assert reply.status_code == HTTPStatus.NOT_FOUND
+
     def test_mod_download(self) -> None:
         """
         I'm skipping mod download tests. this is bad, but testing with celery is a pain, and I don't think it's worth it
@@ -279,6 +550,32 @@ class TestArma3API:
         """
         pass
 
+    def test_download_queue(
+        self, app: Flask, client: FlaskClient, add_cba_to_db: None
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        reservation = app.config["DISK_ADMISSION_HELPER"].reserve(
+            "mod_download", [1], {mod_manager.dst_dir: 2048}
+        )
+        app.config["DOWNLOAD_QUEUE_HELPER"].enqueue(reservation, [1])
+        reply = client.get("/api/arma3/mods/download/queue")
+        assert reply.status_code == HTTPStatus.OK
+        [reservation] = reply.json["results"]["reservations"]
+        assert (reservation["state"], reservation["mod_ids"]) == ("deferred", [1])
+        assert reservation["position"] == 1
+        assert reply.json["results"]["depth"] == {
+            "downloads": 1,
+            "waiting": 1,
+            "mods": 1,
+        }
+        assert reply.json["results"]["filesystems"][0]["reserved"] == 2048
+
+        reply = client.get("/api/arma3/mod/1/download/queue")
+        assert reply.status_code == HTTPStatus.OK
+        assert reply.json["results"]["reservation"]["position"] == 1
+        reply = client.get("/api/arma3/mod/2/download/queue")
+        assert reply.status_code == HTTPStatus.NOT_FOUND
+
     def test_schedule_create(self, client: FlaskClient) -> None:
         assert len(Schedule.query.all()) == 0
         reply = client.post(
@@ -459,6 +756,63 @@ class TestArma3API:
         assert reply.status_code == HTTPStatus.OK
         assert len(Collection.query.all()) == 0
 
+    def test_mod_changes_since_cursor(
+        self,
+        client: FlaskClient,
+        add_collection_to_db: None,
+        add_cba_to_db: None,
+        add_ace_to_db: None,
+    ) -> None:
+        add_collection_to_db  # noqa: B018
+        add_cba_to_db  # noqa: B018
+        add_ace_to_db  # noqa: B018
+        for mod_id in [1, 2]:
+            Arma3ModManager.add_mod_to_collection(1, mod_id)
+        db.session.commit()
+
+        reply = client.get("/api/arma3/mod/changes")
+        assert reply.status_code == HTTPStatus.OK
+        assert reply.json["full_sync"]
+        assert len(reply.json["results"]["mods"]) == 2
+        assert len(reply.json["results"]["collection_entries"]) == 2
+        assert "mods" not in reply.json["results"]["collections"][0]
+
+        # age the existing rows so only the changes below are newer than the cursor
+        an_hour_ago = datetime.utcnow() - timedelta(hours=1)
+        for model in [Mod, Collection, ModCollectionEntry]:
+            db.session.execute(update(model).values(updated_at=an_hour_ago))
+        db.session.commit()
+        reply = client.get(
+            "/api/arma3/mod/changes",
+            query_string={"since": reply.json["cursor"]},
+        )
+        assert not reply.json["full_sync"]
+        assert reply.json["results"]["mods"] == []
+        cursor = reply.json["cursor"]
+
+        reply = client.patch("/api/arma3/mod/subscription/2", json={"name": "ACE3"})
+        assert reply.status_code == HTTPStatus.OK
+        reply = client.delete("/api/arma3/mod/collection/1/mods/1")
+        assert reply.status_code == HTTPStatus.OK
+
+        reply = client.get("/api/arma3/mod/changes", query_string={"since": cursor})
+        assert reply.status_code == HTTPStatus.OK
+        results = reply.json["results"]
+        assert [mod["name"] for mod in results["mods"]] == ["ACE3"]
+        assert results["collections"] == []
+        # the remaining entry moved up in the load order
+        assert [entry["mod_id"] for entry in results["collection_entries"]] == [2]
+        assert results["deleted"] == {
+            "mods": [],
+            "collections": [],
+            "mod_collection_entries": [1],
+        }
+
+        reply = client.get(
+            "/api/arma3/mod/changes", query_string={"since": "2000-01-01T00:00:00"}
+        )
+        assert reply.json["full_sync"]
+
     def test_collection_reorder_mods(self, client: FlaskClient) -> None:
         add_collection_to_db  # noqa: B018
         add_cba_to_db  # noqa: B018
@@ -666,3 +1020,24 @@ class TestArma3API:
         )
         assert reply.status_code == HTTPStatus.OK
         assert len(Notification.query.all()) == 0
+
+    def test_async_status_reports_progress(
+        self, client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        progress = {"message": "Downloaded 1 of 2 mods", "eta_seconds": 12.5}
+
+        class ProgressResult:
+            state = status = "PROGRESS"
+            info = result = progress
+
+            def __init__(self, job_id: str) -> None:
+                pass
+
+        monkeypatch.setattr("app.routes.api.AsyncResult", ProgressResult)
+        reply = client.get("/api/async/some-job")
+        assert reply.status_code == HTTPStatus.OK
+        assert reply.json == {
+            "status": "PROGRESS",
+            "message": "Downloaded 1 of 2 mods",
+            "progress": progress,
+        }
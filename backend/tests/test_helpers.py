@@ -0,0 +1,489 @@
+"""Helper class tests."""
+
+import errno
+import io
+import os
+import threading
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+from app import db
+from app.models.mod import Mod, ModStatus
+from app.models.mod_directory_entry import ModDirectoryEntry
+from app.models.mod_image import ModImage
+from app.utils import integrity, transfer
+from app.utils.helpers import Arma3ModManager, DownloadProgress, ModDirectoryIndex
+from app.utils.image_store import FilesystemImageStore
+
+
+class TestModDirectoryIndex:
+    """
+    Tests the filesystem state index used to answer "is this mod installed?"
+    """
+
+    def test_rebuild_and_incremental_updates(self, app: Flask, tmp_path: Path) -> None:
+        (tmp_path / "@CBA_A3").mkdir()
+        (tmp_path / "mpmissions").mkdir()
+        (tmp_path / "mpmissions" / "coop.Altis.pbo").write_bytes(b"")
+        index = ModDirectoryIndex([str(tmp_path), str(tmp_path / "mpmissions")])
+
+        index.rebuild()
+        assert ModDirectoryEntry.query.count() == 4
+        cba, ace = str(tmp_path / "@CBA_A3"), str(tmp_path / "@ACE3")
+        assert index.missing([cba, ace]) == {ace}
+
+        index.add(ace)
+        index.remove(cba)
+        db.session.commit()
+        assert index.missing([cba, ace]) == {cba}
+
+        # another process (fresh in-memory copy) sees the same state via the DB
+        other_process = ModDirectoryIndex([str(tmp_path)])
+        assert other_process.missing([cba, ace]) == {cba}
+
+    def test_unscanned_roots_are_never_reported_missing(
+        self, app: Flask, tmp_path: Path
+    ) -> None:
+        index = ModDirectoryIndex([str(tmp_path)])
+        assert index.missing([str(tmp_path / "@CBA_A3")]) == set()
+
+    def test_listing_does_no_disk_io(
+        self, app: Flask, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        installed = os.path.join(mod_manager.dst_dir, "@installed")
+        os.makedirs(installed, exist_ok=True)
+        try:
+            mod_manager.directory_index.rebuild()
+        finally:
+            os.rmdir(installed)
+        db.session.add_all(
+            [
+                Mod(
+                    steam_id=1,
+                    filename="@installed",
+                    name="installed",
+                    local_path=installed,
+                    status=ModStatus.installed,
+                ),
+                Mod(
+                    steam_id=2,
+                    filename="@deleted",
+                    name="deleted",
+                    local_path=os.path.join(mod_manager.dst_dir, "@deleted"),
+                    status=ModStatus.installed,
+                ),
+            ]
+        )
+        db.session.commit()
+
+        def no_disk_io(*args: object, **kwargs: object) -> None:
+            raise AssertionError("request handlers must not touch the disk")
+
+        monkeypatch.setattr(os.path, "exists", no_disk_io)
+        monkeypatch.setattr(os, "scandir", no_disk_io)
+        monkeypatch.setattr(os, "stat", no_disk_io)
+
+        results = mod_manager.get_subscribed_mods()
+        # the index still lists @installed even though it was removed after the scan
+        assert [result["status"] for result in results] == [
+            "installed",
+            "not_installed",
+        ]
+
+    def test_reconcile_corrects_drift(self, app: Flask) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        mod_manager.directory_index.rebuild()
+        db.session.add(
+            Mod(
+                steam_id=1,
+                filename="@gone",
+                name="gone",
+                local_path=os.path.join(mod_manager.dst_dir, "@gone"),
+                status=ModStatus.installed,
+            )
+        )
+        db.session.commit()
+        assert mod_manager.reconcile_installed_mods() == 1
+        assert Mod.query.get(1).status == ModStatus.not_installed
+
+
+class TestImageStore:
+    """
+    Tests the content-addressed, on-disk preview image store
+    """
+
+    def test_identical_images_share_one_file(self, tmp_path: Path) -> None:
+        store = FilesystemImageStore(str(tmp_path))
+        first = store.put(b"\x89PNG shared")
+        assert store.put(b"\x89PNG shared") == first
+        assert store.path(first) is not None
+        assert len(list(tmp_path.rglob("*"))) == 2  # one directory, one file
+        # no thumbnail of that size, so callers fall back to the original
+        assert store.path(first, 64) is None
+
+        store.release(first)
+        assert store.path(first) is None
+
+    def test_thumbnails_created_at_ingest(self, tmp_path: Path) -> None:
+        image_module = pytest.importorskip("PIL.Image")
+        buffer = io.BytesIO()
+        image_module.new("RGB", (640, 360), "red").save(buffer, "JPEG")
+
+        store = FilesystemImageStore(str(tmp_path), [64])
+        content_hash = store.put(buffer.getvalue())
+        with image_module.open(store.path(content_hash, 64)) as thumbnail:
+            assert thumbnail.size == (64, 36)
+
+    def test_migrate_blobs_out_of_database(self, app: Flask) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        for steam_id in [1, 2]:
+            db.session.add(Mod(steam_id=steam_id, filename="@m", name="m"))
+        db.session.commit()
+        for mod_id in [1, 2]:
+            db.session.add(
+                ModImage(mod_id=mod_id, image_data=b"same", content_type="image/png")
+            )
+        db.session.commit()
+
+        assert mod_manager.migrate_images_to_store(batch_size=1) == 2
+        assert mod_manager.migrate_images_to_store() == 0
+        images = ModImage.query.all()
+        assert {image.storage for image in images} == {"filesystem"}
+        assert {image.image_data for image in images} == {None}
+        assert images[0].content_hash == images[1].content_hash
+
+        reply = app.test_client().get("/api/arma3/mod/subscription/2/image")
+        assert reply.data == b"same"
+        assert reply.headers["ETag"] == f'"{images[0].content_hash}"'
+
+        # the shared file is only removed along with its last user
+        mod_manager.remove_subscribed_mod(1)
+        assert mod_manager.image_store.path(images[1].content_hash) is not None
+        mod_manager.remove_subscribed_mod(2)
+        assert mod_manager.image_store.path(images[1].content_hash) is None
+
+
+class TestDownloadScheduling:
+    """
+    Tests spreading downloads across steamcmd workers
+    """
+
+    def test_largest_first_to_least_loaded_worker(self) -> None:
+        sizes = {1: 20_000, 2: 500, 3: 9_000, 4: 8_000, 5: 700}
+        mods = [
+            {"steam_id": steam_id, "dst_dir": "", "is_msn": False, "size": size}
+            for steam_id, size in sizes.items()
+        ]
+
+        queues = Arma3ModManager._schedule_downloads(mods, 2)
+
+        assert [[mod["steam_id"] for mod in queue] for queue in queues] == [
+            [1],
+            [3, 4, 5, 2],
+        ]
+
+    def test_unknown_sizes_still_scheduled(self) -> None:
+        mods = [{"steam_id": steam_id, "size": None} for steam_id in range(4)]
+        queues = Arma3ModManager._schedule_downloads(mods, 3)
+        assert sorted(len(queue) for queue in queues) == [1, 1, 2]
+
+
+class TestDownloadProgress:
+    """
+    Tests parsing steamcmd output into download progress
+    """
+
+    def test_parses_progress_and_finished_items(self) -> None:
+        progress = DownloadProgress({1: 1000, 2: None, 3: 500})
+
+        progress.feed(0, "Downloading item 1 ...")
+        progress.feed(
+            0, " Update state (0x61) downloading, progress: 25.00 (250 / 1000)"
+        )
+        snapshot = progress.snapshot()
+        assert snapshot["bytes_downloaded"] == 250
+        assert snapshot["bytes_total"] == 1500
+        assert snapshot["items_done"] == 0
+
+        progress.feed(0, 'Success. Downloaded item 1 to "/staging/1" (1000 bytes)')
+        progress.feed(1, 'Success. Downloaded item 2 to "/staging/2" (300 bytes)')
+        progress.feed(0, "ERROR! Download item 3 failed (Timeout).")
+        snapshot = progress.snapshot()
+        assert snapshot["items_done"] == 3
+        assert snapshot["items_failed"] == 1
+        assert snapshot["bytes_downloaded"] == 1300
+        assert snapshot["message"] == "Downloaded 2 of 3 mods"
+        assert snapshot["bytes_per_second"] > 0
+
+    def test_publishing_is_throttled(self) -> None:
+        published: list[dict] = []
+        progress = DownloadProgress({1: 1000}, published.append, interval=3600)
+
+        for _ in range(10):
+            progress.feed(0, "Downloading item 1 ...")
+        progress.publish(force=True)
+
+        assert len(published) == 2
+
+
+class TestStagedSwap:
+    """
+    Tests swapping staged mod updates into place
+    """
+
+    def test_failed_swap_rolls_back(self, app: Flask, tmp_path: Path) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        paths = []
+        for name in ["@one", "@two"]:
+            path = tmp_path / name
+            path.mkdir()
+            (path / "old.pbo").touch()
+            paths.append(str(path))
+        # only the first mod has a staged update, so the second swap fails
+        staged = Path(mod_manager.staged_path(paths[0]))
+        staged.mkdir()
+        (staged / "new.pbo").touch()
+
+        with pytest.raises(Exception, match="rolled back"):
+            mod_manager.swap_in_staged_mods(paths)
+
+        assert sorted(os.listdir(tmp_path)) == [".@one.staged", "@one", "@two"]
+        assert os.listdir(paths[0]) == ["old.pbo"]
+        assert os.listdir(staged) == ["new.pbo"]
+
+        (tmp_path / ".@two.staged").mkdir()
+        mod_manager.swap_in_staged_mods(paths)
+        assert sorted(os.listdir(tmp_path)) == ["@one", "@two"]
+        assert os.listdir(paths[0]) == ["new.pbo"]
+
+
+class TestLowercaseMod:
+    """
+    Tests lowercasing downloaded mod files
+    """
+
+    def test_lowercases_tree_and_reports_collisions(self, tmp_path: Path) -> None:
+        (tmp_path / "Addons" / "Sub").mkdir(parents=True)
+        (tmp_path / "Addons" / "Sub" / "File.PBO").write_text("data")
+        (tmp_path / "Addons" / "already.pbo").touch()
+        (tmp_path / "Keys").mkdir()
+        (tmp_path / "keys").mkdir()
+        (tmp_path / "Keys" / "A.bikey").touch()
+        (tmp_path / "Mod.CPP").touch()
+
+        skipped = Arma3ModManager._lowercase_mod_(str(tmp_path))
+
+        assert skipped == [str(tmp_path / "Keys")]
+        assert sorted(os.listdir(tmp_path)) == ["Keys", "addons", "keys", "mod.cpp"]
+        assert sorted(os.listdir(tmp_path / "addons")) == ["already.pbo", "sub"]
+        assert (tmp_path / "addons" / "sub" / "file.pbo").read_text() == "data"
+        # collisions keep their own contents lowercased
+        assert os.listdir(tmp_path / "Keys") == ["a.bikey"]
+
+    def test_plan_skips_lowercase_names(self, tmp_path: Path) -> None:
+        (tmp_path / "addons").mkdir()
+        (tmp_path / "addons" / "a.pbo").touch()
+        (tmp_path / "addons" / "B.pbo").touch()
+
+        renames, collisions = Arma3ModManager._plan_lowercase_(str(tmp_path))
+
+        assert renames == {1: [(str(tmp_path / "addons"), "B.pbo", "b.pbo")]}
+        assert collisions == []
+
+    def test_delta_swap_moves_only_changed_files(
+        self, app: Flask, tmp_path: Path
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        installed = tmp_path / "@mod"
+        staged = Path(mod_manager.staged_path(str(installed)))
+        for root, files in [
+            (installed, {"same.pbo": "same", "changed.pbo": "old", "gone.pbo": "x"}),
+            (staged, {"same.pbo": "same", "changed.pbo": "new", "new/added.pbo": "+"}),
+        ]:
+            for name, content in files.items():
+                (root / name).parent.mkdir(parents=True, exist_ok=True)
+                (root / name).write_text(content)
+        (installed / "old_dir").mkdir()
+        (installed / "old_dir" / "file.pbo").touch()
+        manifest = mod_manager.build_manifest(str(installed))
+        same_inode = (installed / "same.pbo").stat().st_ino
+
+        new_manifests = mod_manager.swap_in_staged_mods(
+            [str(installed)], {str(installed): manifest}
+        )
+
+        assert sorted(os.listdir(tmp_path)) == ["@mod"]
+        assert sorted(os.listdir(installed)) == ["changed.pbo", "new", "same.pbo"]
+        assert (installed / "changed.pbo").read_text() == "new"
+        assert (installed / "new" / "added.pbo").read_text() == "+"
+        # unchanged files are left where they are
+        assert (installed / "same.pbo").stat().st_ino == same_inode
+        assert new_manifests == {
+            str(installed): mod_manager.build_manifest(str(installed))
+        }
+
+    def test_failed_delta_swap_rolls_back(self, app: Flask, tmp_path: Path) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        installed = tmp_path / "@mod"
+        staged = Path(mod_manager.staged_path(str(installed)))
+        (installed / "sub").mkdir(parents=True)
+        (installed / "sub" / "gone.pbo").write_text("old")
+        (installed / "changed.pbo").write_text("old")
+        staged.mkdir()
+        (staged / "changed.pbo").write_text("new")
+        manifest = mod_manager.build_manifest(str(installed))
+        # the second mod has no staged update, so its swap fails
+        (tmp_path / "@other").mkdir()
+
+        with pytest.raises(Exception, match="rolled back"):
+            mod_manager.swap_in_staged_mods(
+                [str(installed), str(tmp_path / "@other")],
+                {str(installed): manifest},
+            )
+
+        assert mod_manager.build_manifest(str(installed)) == manifest
+        assert os.listdir(staged) == ["changed.pbo"]
+        assert sorted(os.listdir(tmp_path)) == [".@mod.staged", "@mod", "@other"]
+
+
+class TestTransfer:
+    """
+    Tests moving mods between filesystems
+    """
+
+    def test_cross_device_move_copies_in_chunks(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(transfer, "_same_device", lambda src, dst_dir: False)
+        monkeypatch.setattr(transfer, "CHUNK_SIZE", 1000)
+        src = tmp_path / "staging" / "123"
+        (src / "addons").mkdir(parents=True)
+        big = os.urandom(4500)
+        (src / "addons" / "big.pbo").write_bytes(big)
+        (src / "mod.cpp").write_text("name = x;")
+        (src / "empty").touch()
+        (tmp_path / "mods").mkdir()
+        dst = tmp_path / "mods" / "@mod"
+
+        stats = transfer.move(str(src), str(dst), workers=3)
+
+        assert not src.exists()
+        assert sorted(os.listdir(tmp_path / "mods")) == ["@mod"]
+        assert (dst / "addons" / "big.pbo").read_bytes() == big
+        assert (dst / "mod.cpp").read_text() == "name = x;"
+        assert stats.method in ("copy", "reflink")
+        assert (stats.files, stats.bytes) == (3, 4500 + 9)
+
+    def test_cross_device_move_without_directory_fsync(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(transfer, "_same_device", lambda src, dst_dir: False)
+        open_file = os.open
+
+        # as on Windows, where directories can't be opened; shutil.rmtree's dir_fd opens are left alone, as it
+        # doesn't use them on Windows
+        def open_files_only(path: str, flags: int, *args: int, **kwargs: int) -> int:
+            if os.path.isdir(path) and "dir_fd" not in kwargs:
+                raise PermissionError(errno.EACCES, "Permission denied", path)
+            return open_file(path, flags, *args, **kwargs)
+
+        monkeypatch.setattr(os, "open", open_files_only)
+        src = tmp_path / "staging" / "123"
+        (src / "addons").mkdir(parents=True)
+        (src / "addons" / "mod.pbo").write_bytes(b"pbo")
+        (tmp_path / "mods").mkdir()
+        dst = tmp_path / "mods" / "@mod"
+
+        stats = transfer.move(str(src), str(dst))
+
+        assert not src.exists()
+        assert sorted(os.listdir(tmp_path / "mods")) == ["@mod"]
+        assert (dst / "addons" / "mod.pbo").read_bytes() == b"pbo"
+        assert stats.files == 1
+
+    def test_same_device_move_renames(self, tmp_path: Path) -> None:
+        (tmp_path / "mission.pbo").write_text("msn")
+        stats = transfer.move(
+            str(tmp_path / "mission.pbo"), str(tmp_path / "renamed.pbo")
+        )
+        assert stats.method == "rename"
+        assert os.listdir(tmp_path) == ["renamed.pbo"]
+
+
+class TestIntegrity:
+    """
+    Tests hashing mod files for verification
+    """
+
+    def test_memory_mapped_hash_matches_buffered_hash(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        pbo = tmp_path / "big.pbo"
+        pbo.write_bytes(os.urandom(5000))
+        buffered = integrity.hash_file(str(pbo))
+        monkeypatch.setattr(integrity, "MMAP_THRESHOLD", 1000)
+        assert integrity.hash_file(str(pbo)) == buffered
+
+    def test_hash_files_across_threads(self, tmp_path: Path) -> None:
+        paths = []
+        for index in range(5):
+            (tmp_path / f"{index}.pbo").write_bytes(bytes([index]) * 100)
+            paths.append(str(tmp_path / f"{index}.pbo"))
+        paths.append(str(tmp_path / "deleted.pbo"))
+
+        hashes = integrity.hash_files(paths, workers=2)
+
+        assert hashes == {
+            **{path: integrity.hash_file(path) for path in paths[:-1]},
+            paths[-1]: None,
+        }
+
+    def test_verify_mods_hashes_across_threads(
+        self, app: Flask, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        monkeypatch.setattr(mod_manager, "verify_workers", 4)
+        for steam_id in [701, 702]:
+            path = tmp_path / f"@mod{steam_id}"
+            (path / "addons").mkdir(parents=True)
+            for index in range(4):
+                (path / "addons" / f"{index}.pbo").write_bytes(bytes([index]) * 100)
+            mod = Mod(
+                steam_id=steam_id,
+                filename=f"@mod{steam_id}",
+                name=f"mod{steam_id}",
+                status=ModStatus.installed,
+                local_path=str(path),
+            )
+            db.session.add(mod)
+            mod_manager.save_manifest(mod, mod_manager.build_manifest(str(path)))
+        db.session.commit()
+        # same size, different contents
+        (tmp_path / "@mod702" / "addons" / "3.pbo").write_bytes(b"x" * 100)
+        hashed_on = set()
+        hash_file = integrity.hash_file
+
+        def record_thread(path: str) -> str:
+            hashed_on.add(threading.get_ident())
+            return hash_file(path)
+
+        monkeypatch.setattr(integrity, "hash_file", record_thread)
+        results = {}
+
+        # as a Celery worker running tasks in threads (--pool=threads) would
+        def verify() -> None:
+            with app.app_context():
+                results.update(
+                    mod_manager.verify_mods(Mod.query.order_by(Mod.id).all())
+                )
+
+        worker = threading.Thread(target=verify)
+        worker.start()
+        worker.join()
+
+        assert results == {1: None, 2: "corrupt: 1 files don't match their manifest"}
+        assert len(hashed_on) > 1
+        assert worker.ident not in hashed_on
@@ -0,0 +1,54 @@
+"""Shared HTTP client tests."""
+
+import os
+from collections.abc import Generator
+
+import pytest
+
+from app.utils import http_client
+
+
+@pytest.fixture
+def http_settings() -> Generator[None, None, None]:
+    """Restore the default client settings after each test."""
+    yield
+    http_client.configure_http_client({})
+
+
+class TestHttpClient:
+    """
+    Tests the process-wide pooled HTTP client
+    """
+
+    def test_client_is_reused(self, http_settings: None) -> None:
+        assert http_client.get_http_client() is http_client.get_http_client()
+
+    def test_configure_replaces_client(self, http_settings: None) -> None:
+        first = http_client.get_http_client()
+        http_client.configure_http_client({"MAX_CONNECTIONS": 5})
+        second = http_client.get_http_client()
+        assert first is not second
+        assert first.is_closed
+
+    def test_per_host_timeouts(self, http_settings: None) -> None:
+        http_client.configure_http_client(
+            {"TIMEOUT": 7.0, "HOST_TIMEOUTS": {"api.steampowered.com": 15.0}}
+        )
+        assert http_client.timeout_for("https://api.steampowered.com/x") == 15.0
+        assert http_client.timeout_for("https://discord.com/api/webhooks/1") == 7.0
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_forked_child_gets_its_own_client(self, http_settings: None) -> None:
+        parent_client = http_client.get_http_client()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # child: must not see the parent's pooled client
+            fresh = http_client.get_http_client() is not parent_client
+            os.write(write_fd, b"1" if fresh else b"0")
+            os._exit(0)
+        os.close(write_fd)
+        os.waitpid(pid, 0)
+        assert os.read(read_fd, 1) == b"1"
+        os.close(read_fd)
+        assert not parent_client.is_closed
@@ -0,0 +1,70 @@
+"""Schema migration tests."""
+
+from collections.abc import Generator
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask import Flask
+from flask_migrate import upgrade
+from sqlalchemy import text
+
+from app import BASELINE_REVISION, db, upgrade_database
+from app.models.mod import Mod
+from app.models.mod_image import ModImage
+
+
+class TestMigrations:
+    """
+    Tests building and upgrading the schema with the migrations rather than db.create_all()
+    """
+
+    @pytest.fixture
+    def empty_db(self, app: Flask) -> Generator[None, None, None]:
+        """Starts from a database without any tables."""
+        db.drop_all()
+        yield
+        db.session.remove()
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+    def test_migrations_match_models(self, empty_db: None) -> None:
+        upgrade()
+
+        with db.engine.connect() as connection:
+            assert (
+                compare_metadata(MigrationContext.configure(connection), db.metadata)
+                == []
+            )
+
+    def test_upgrades_database_created_before_migrations(
+        self, app: Flask, empty_db: None
+    ) -> None:
+        # the schema (and data) of an install from before migrations, which has no migration history
+        upgrade(revision=BASELINE_REVISION)
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP TABLE alembic_version"))
+            connection.execute(
+                text(
+                    "INSERT INTO mods (id, steam_id, filename, name, mod_type, server_mod, should_update, status) "
+                    "VALUES (1, 450814997, '@CBA_A3', 'CBA_A3', 'mod', 0, 1, 'installed')"
+                )
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO mod_images (mod_id, image_data, content_type, created_at) "
+                    "VALUES (1, :image, 'image/png', CURRENT_TIMESTAMP)"
+                ),
+                {"image": b"png bytes"},
+            )
+
+        upgrade_database()
+
+        mod = db.session.get(Mod, 1)
+        assert (mod.status.value, mod.image_pending) == ("installed", False)
+        assert mod.updated_at is not None
+        assert ModImage.query.one().storage == "database"
+        # the blobs can only be moved out once the schema is up to date
+        assert app.config["MOD_MANAGERS"]["ARMA3"].migrate_images_to_store() == 1
+        image = ModImage.query.one()
+        assert (image.storage, image.image_data) == ("filesystem", None)
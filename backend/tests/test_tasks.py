@@ -0,0 +1,859 @@
+"""Background task tests."""
+
+import math
+import os
+import shutil
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy import update
+
+from app import celery, db
+from app.models.collection import Collection
+from app.models.disk_reservation import DiskReservation
+from app.models.mod import Mod, ModStatus
+from app.models.mod_collection_entry import ModCollectionEntry
+from app.models.mod_image import ModImage
+from app.models.server_config import ServerConfig
+from app.tasks import background
+from app.tasks.background import (
+    backfill_mod_preview_images,
+    download_arma3_mods,
+    fetch_mod_preview_image,
+    mod_update,
+    update_mod_steam_updated_time,
+    verify_arma3_mods,
+)
+from tests.conftest import FakeSteamCmd, SteamStub
+
+
+@pytest.fixture
+def quiet_task_helper(app: Flask, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Skip task state, schedule logging and webhooks when running task bodies directly."""
+    monkeypatch.setattr(
+        app.config["TASK_HELPER"], "update_task_state", lambda **kwargs: None
+    )
+
+
+class TestSteamMetadataRefresh:
+    """
+    Tests the hourly Steam metadata refresh
+    """
+
+    def test_get_mods_details_is_chunked(
+        self, app: Flask, steam_stub: SteamStub
+    ) -> None:
+        steam_ids = list(range(1000, 1250))
+        for steam_id in steam_ids:
+            steam_stub.add_item(steam_id)
+        steam_api = app.config["STEAM_API_HELPER"]
+
+        details = steam_api.get_mods_details(steam_ids, chunk_size=100)
+
+        assert len(steam_stub.requests) == math.ceil(len(steam_ids) / 100)
+        assert sorted(details) == steam_ids
+        assert details[1000]["mod_type"] == "mod"
+
+    def test_get_mods_details_skips_unknown_items(
+        self, app: Flask, steam_stub: SteamStub
+    ) -> None:
+        steam_stub.add_item(1, tags=[{"tag": "Terrain"}])
+        details = app.config["STEAM_API_HELPER"].get_mods_details([1, 2])
+        assert list(details) == [1]
+        assert details[1]["mod_type"] == "map"
+
+    def test_refresh_updates_all_mods_in_few_requests(
+        self,
+        app: Flask,
+        steam_stub: SteamStub,
+        quiet_task_helper: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        mod_count = 45
+        for index in range(mod_count):
+            steam_id = 5000 + index
+            steam_stub.add_item(steam_id, time_updated=1754197938 + index)
+            db.session.add(
+                Mod(
+                    steam_id=steam_id,
+                    filename=f"@mod{index}",
+                    name=f"mod{index}",
+                    should_update=True,
+                )
+            )
+        db.session.commit()
+        monkeypatch.setattr(app.config["STEAM_API_HELPER"], "details_chunk_size", 20)
+
+        update_mod_steam_updated_time.run()
+
+        assert len(steam_stub.requests) == math.ceil(mod_count / 20)
+        db.session.expire_all()
+        for mod in Mod.query.all():
+            assert mod.steam_last_updated == datetime.utcfromtimestamp(
+                1754197938 + mod.steam_id - 5000
+            )
+
+
+class TestPreviewImages:
+    """
+    Tests background preview image ingestion
+    """
+
+    def test_fetch_stores_image_and_clears_pending(
+        self, app: Flask, steam_stub: SteamStub
+    ) -> None:
+        steam_stub.add_item(10)
+        db.session.add(
+            Mod(
+                steam_id=10,
+                filename="@mod10",
+                name="mod10",
+                preview_url=steam_stub.items[10]["preview_url"],
+                image_pending=True,
+            )
+        )
+        db.session.commit()
+
+        fetch_mod_preview_image.run(1)
+
+        image = ModImage.query.filter(ModImage.mod_id == 1).one()
+        assert image.content_type == "image/png"
+        # bytes go to the image store, not the database
+        assert image.storage == "filesystem"
+        assert image.image_data is None
+        image_store = app.config["MOD_MANAGERS"]["ARMA3"].image_store
+        with open(image_store.path(image.content_hash), "rb") as image_file:
+            assert image_file.read().startswith(b"\x89PNG")
+        assert not Mod.query.get(1).image_pending
+
+    def test_backfill_queues_only_missing_images(
+        self,
+        app: Flask,
+        steam_stub: SteamStub,
+        quiet_task_helper: None,
+        sent_tasks: list[tuple[str, list]],
+    ) -> None:
+        steam_stub.add_item(20)
+        db.session.add(Mod(steam_id=20, filename="@mod20", name="mod20"))
+        db.session.add(Mod(steam_id=21, filename="@mod21", name="mod21"))
+        db.session.commit()
+        db.session.add(ModImage(mod_id=2, image_data=b"", content_type="image/png"))
+        db.session.commit()
+
+        backfill_mod_preview_images.run()
+
+        assert sent_tasks == [("app.tasks.background.fetch_mod_preview_image", [1])]
+        mod = Mod.query.get(1)
+        assert mod.image_pending
+        assert mod.preview_url == steam_stub.items[20]["preview_url"]
+
+
+class TestBatchedDownloads:
+    """
+    Tests downloading several mods per steamcmd session
+    """
+
+    def test_download_batches_and_reports_each_mod(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        monkeypatch.setattr(mod_manager, "download_batch_size", 2)
+        fake_steamcmd.failing = {302}
+        fake_steamcmd.write()
+        for steam_id in [301, 302, 303]:
+            db.session.add(
+                Mod(
+                    steam_id=steam_id, filename=f"@Mod{steam_id}", name=f"mod{steam_id}"
+                )
+            )
+        db.session.commit()
+
+        outcome = download_arma3_mods.run([1, 2, 3])
+
+        assert fake_steamcmd.invocations == [[301, 302], [303]]
+        assert outcome == {"succeeded": [1, 3], "failed": [2]}
+        statuses = {mod.steam_id: mod.status for mod in Mod.query.all()}
+        assert statuses == {
+            301: ModStatus.installed,
+            302: ModStatus.install_failed,
+            303: ModStatus.installed,
+        }
+        installed = os.path.join(mod_manager.dst_dir, "@Mod301")
+        assert Mod.query.get(1).local_path == installed
+        # files are lowercased as each item is moved into place
+        assert os.listdir(installed) == ["addons"]
+        assert os.listdir(os.path.join(installed, "addons")) == ["mod_301.pbo"]
+
+    def test_download_skips_installed_mods(
+        self, app: Flask, fake_steamcmd: FakeSteamCmd, quiet_task_helper: None
+    ) -> None:
+        db.session.add(Mod(steam_id=311, filename="@mod311", name="mod311"))
+        db.session.add(
+            Mod(
+                steam_id=312,
+                filename="@mod312",
+                name="mod312",
+                status=ModStatus.installed,
+            )
+        )
+        db.session.commit()
+
+        outcome = download_arma3_mods.run([1, 2])
+
+        assert fake_steamcmd.invocations == [[311]]
+        assert outcome == {"succeeded": [1], "failed": []}
+
+    def test_download_spreads_mods_across_workers(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        monkeypatch.setattr(mod_manager, "download_workers", 2)
+        for steam_id, size in [(321, 20_000_000_000), (322, 10), (323, 20)]:
+            db.session.add(
+                Mod(
+                    steam_id=steam_id,
+                    filename=f"@mod{steam_id}",
+                    name=f"mod{steam_id}",
+                    size_bytes=size,
+                )
+            )
+        db.session.commit()
+
+        outcome = download_arma3_mods.run([1, 2, 3])
+
+        # the large terrain gets a worker to itself
+        assert sorted(fake_steamcmd.invocations) == [[321], [323, 322]]
+        assert outcome == {"succeeded": [1, 2, 3], "failed": []}
+        assert sorted(os.listdir(mod_manager.staging_dir)) == ["worker_0", "worker_1"]
+
+    def test_download_reports_progress(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        monkeypatch.setattr(mod_manager, "progress_interval", 3600)
+        snapshots: list[dict] = []
+
+        errors = mod_manager.download_mods(
+            [
+                {
+                    "steam_id": steam_id,
+                    "dst_dir": os.path.join(mod_manager.dst_dir, f"@mod{steam_id}"),
+                    "is_msn": False,
+                    "size": 1024,
+                }
+                for steam_id in [331, 332]
+            ],
+            progress_callback=snapshots.append,
+        )
+
+        assert errors == {331: None, 332: None}
+        # the first line is published straight away, the rest are throttled until the end
+        assert len(snapshots) == 2
+        assert snapshots[-1]["items_done"] == 2
+        assert snapshots[-1]["bytes_downloaded"] == snapshots[-1]["bytes_total"] == 2048
+        assert snapshots[-1]["percent"] == 100.0
+
+
+class TestStagedModUpdates:
+    """
+    Tests updating mods by staging the downloads, then swapping them in while the server is stopped
+    """
+
+    @pytest.fixture
+    def outdated_mods(self, app: Flask) -> None:
+        """Installs @mod401 (loaded by the server), @mod402 and @mod403 (not loaded), all with updates."""
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        for steam_id in [401, 402, 403]:
+            path = os.path.join(mod_manager.dst_dir, f"@mod{steam_id}")
+            os.makedirs(os.path.join(path, "addons"))
+            open(os.path.join(path, "addons", "old.pbo"), "w").close()
+            db.session.add(
+                Mod(
+                    steam_id=steam_id,
+                    filename=f"@mod{steam_id}",
+                    name=f"mod{steam_id}",
+                    status=ModStatus.installed,
+                    local_path=path,
+                    last_updated=datetime(2025, 1, 1),
+                    steam_last_updated=datetime(2025, 6, 1),
+                )
+            )
+        db.session.add(Collection(name="running", description=""))
+        db.session.add(Collection(name="unused", description=""))
+        db.session.commit()
+        db.session.add(ModCollectionEntry(collection_id=1, mod_id=1, load_order=1))
+        db.session.add(ModCollectionEntry(collection_id=2, mod_id=2, load_order=1))
+        db.session.add(
+            ServerConfig(
+                name="server",
+                server_name="server",
+                admin_password="admin",
+                server_binary="/arma3/arma3server_x64",
+                collection_id=1,
+            )
+        )
+        db.session.commit()
+
+    @pytest.fixture
+    def server_events(
+        self, app: Flask, monkeypatch: pytest.MonkeyPatch
+    ) -> list[tuple[str, list[str]]]:
+        """Pretends the server is running, recording the mod directory contents at each stop/start."""
+        dst_dir = app.config["MOD_MANAGERS"]["ARMA3"].dst_dir
+        events: list[tuple[str, list[str]]] = []
+        monkeypatch.setattr(
+            app.config["A3_SERVER_HELPER"], "is_server_running", lambda: True
+        )
+        for event in ["stop", "start"]:
+            monkeypatch.setattr(
+                background,
+                f"server_{event}",
+                lambda event=event: events.append((event, sorted(os.listdir(dst_dir)))),
+            )
+        return events
+
+    def test_update_stages_before_stopping_server(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        outdated_mods: None,
+        server_events: list[tuple[str, list[str]]],
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        fake_steamcmd.failing = {402}
+        fake_steamcmd.write()
+
+        mod_update.run()
+
+        # the update was downloaded before the server was stopped, and the unloaded mod swapped in already
+        assert server_events == [
+            (
+                "stop",
+                [".@mod401.staged", "@mod401", "@mod402", "@mod403", "mpmissions"],
+            ),
+            ("start", ["@mod401", "@mod402", "@mod403", "mpmissions"]),
+        ]
+        for name, files in [
+            ("@mod401", ["mod_401.pbo"]),
+            # a failed download leaves the installed version in place
+            ("@mod402", ["old.pbo"]),
+            ("@mod403", ["mod_403.pbo"]),
+        ]:
+            assert (
+                os.listdir(os.path.join(mod_manager.dst_dir, name, "addons")) == files
+            )
+        mods = Mod.query.order_by(Mod.id).all()
+        assert {mod.status for mod in mods} == {ModStatus.installed}
+        assert [mod.last_updated > datetime(2025, 6, 1) for mod in mods] == [
+            True,
+            False,
+            True,
+        ]
+        # manifests of the new copies let the next update replace only changed files
+        assert [mod.manifest.file_count if mod.manifest else None for mod in mods] == [
+            1,
+            None,
+            1,
+        ]
+
+    def test_unloaded_mods_update_without_restart(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        outdated_mods: None,
+        server_events: list[tuple[str, list[str]]],
+    ) -> None:
+        db.session.execute(update(Mod).where(Mod.id == 1).values(should_update=False))
+        db.session.commit()
+
+        mod_update.run()
+
+        assert server_events == []
+        assert fake_steamcmd.invocations == [[402, 403]]
+        assert Mod.query.get(3).last_updated > datetime(2025, 6, 1)
+
+    def test_single_mod_update_applies_delta(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        outdated_mods: None,
+        server_events: list[tuple[str, list[str]]],
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        path = os.path.join(mod_manager.dst_dir, "@mod401")
+        mod = Mod.query.get(1)
+        mod_manager.save_manifest(mod, mod_manager.build_manifest(path))
+        db.session.commit()
+        inode = os.stat(path).st_ino
+
+        # an installed copy with a manifest is never downloaded over
+        assert (
+            "staged path"
+            in mod_manager.download_mods(
+                [{"steam_id": 401, "dst_dir": path, "is_msn": False}]
+            )[401]
+        )
+        assert fake_steamcmd.invocations == []
+
+        background.update_arma3_mod.run(1)
+
+        assert server_events == [
+            (
+                "stop",
+                [".@mod401.staged", "@mod401", "@mod402", "@mod403", "mpmissions"],
+            ),
+            ("start", ["@mod401", "@mod402", "@mod403", "mpmissions"]),
+        ]
+        # the changed files were replaced within the installed directory
+        assert os.stat(path).st_ino == inode
+        assert os.listdir(os.path.join(path, "addons")) == ["mod_401.pbo"]
+        mod = Mod.query.get(1)
+        assert mod.status == ModStatus.installed
+        assert mod.last_updated > datetime(2025, 6, 1)
+        assert mod.manifest.file_count == 1
+
+    def test_failed_single_mod_update_keeps_installed_version(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        outdated_mods: None,
+        server_events: list[tuple[str, list[str]]],
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        fake_steamcmd.failing = {402}
+        fake_steamcmd.write()
+
+        background.update_arma3_mod.run(2)
+
+        assert server_events == []
+        assert sorted(os.listdir(mod_manager.dst_dir)) == [
+            "@mod401",
+            "@mod402",
+            "@mod403",
+            "mpmissions",
+        ]
+        assert os.listdir(os.path.join(mod_manager.dst_dir, "@mod402", "addons")) == [
+            "old.pbo"
+        ]
+        mod = Mod.query.get(2)
+        assert mod.status == ModStatus.installed
+        assert mod.last_updated == datetime(2025, 1, 1)
+
+
+class TestVerifyInstalledMods:
+    """
+    Tests verifying installed mods against their manifests
+    """
+
+    def test_verify_flags_damaged_mods_and_redownloads_them(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        monkeypatch.setattr(mod_manager, "verify_workers", 2)
+        for steam_id in [501, 502, 503]:
+            db.session.add(
+                Mod(
+                    steam_id=steam_id, filename=f"@mod{steam_id}", name=f"mod{steam_id}"
+                )
+            )
+        db.session.commit()
+        download_arma3_mods.run([1, 2, 3])
+        # same size, different contents
+        with open(
+            os.path.join(mod_manager.dst_dir, "@mod501/addons/mod_501.pbo"), "r+"
+        ) as pbo:
+            pbo.write("y")
+        os.remove(os.path.join(mod_manager.dst_dir, "@mod502/addons/mod_502.pbo"))
+        queued = []
+        monkeypatch.setattr(
+            background.download_arma3_mods, "delay", lambda *args: queued.append(args)
+        )
+
+        outcome = verify_arma3_mods.run(redownload=True)
+
+        assert outcome["verified"] == [1, 2, 3]
+        assert sorted(outcome["corrupt"]) == [1, 2]
+        assert [mod.status for mod in Mod.query.order_by(Mod.id)] == [
+            ModStatus.corrupt,
+            ModStatus.corrupt,
+            ModStatus.installed,
+        ]
+        assert queued == [([1, 2], 0)]
+
+        download_arma3_mods.run([1, 2])
+        assert verify_arma3_mods.run()["corrupt"] == {}
+        assert {mod.status for mod in Mod.query.all()} == {ModStatus.installed}
+
+    def test_verify_without_manifest_compares_steam_size(
+        self, app: Flask, fake_steamcmd: FakeSteamCmd, quiet_task_helper: None
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        for steam_id, size_bytes in [(511, 100), (512, 4096)]:
+            path = os.path.join(mod_manager.dst_dir, f"@mod{steam_id}")
+            os.makedirs(path)
+            with open(os.path.join(path, "mod.pbo"), "w") as pbo:
+                pbo.write("x" * 1024)
+            db.session.add(
+                Mod(
+                    steam_id=steam_id,
+                    filename=f"@mod{steam_id}",
+                    name=f"mod{steam_id}",
+                    status=ModStatus.installed,
+                    local_path=path,
+                    size_bytes=size_bytes,
+                )
+            )
+        db.session.commit()
+
+        outcome = verify_arma3_mods.run(mod_ids=[1, 2])
+
+        assert outcome["corrupt"] == {2: "partial: 1024 of 4096 bytes on disk"}
+
+
+class TestModSnapshots:
+    """
+    Tests snapshotting mods' previous versions on update, and rolling back to them
+    """
+
+    @pytest.fixture
+    def installed_mod(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> str:
+        """Installs @mod601 plus a file its updates no longer ship, returning its path."""
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        monkeypatch.setattr(
+            app.config["A3_SERVER_HELPER"], "is_server_running", lambda: False
+        )
+        db.session.add(Mod(steam_id=601, filename="@mod601", name="mod601"))
+        db.session.commit()
+        download_arma3_mods.run([1])
+        path = os.path.join(mod_manager.dst_dir, "@mod601")
+        with open(os.path.join(path, "addons", "keep.pbo"), "w") as pbo:
+            pbo.write("k" * 10)
+        mod = Mod.query.get(1)
+        mod_manager.save_manifest(mod, mod_manager.build_manifest(path))
+        # every update leaves it out of date again
+        mod.steam_last_updated = datetime(2100, 1, 1)
+        db.session.commit()
+        return path
+
+    def test_updates_snapshot_previous_versions_with_hardlinks(
+        self, app: Flask, installed_mod: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        monkeypatch.setattr(mod_manager, "snapshot_retention", 2)
+
+        mod_update.run()
+        mod_update.run()
+
+        first, second = Mod.query.get(1).snapshots
+        assert sorted(first.files) == ["addons/keep.pbo", "addons/mod_601.pbo"]
+        assert (first.copied_size, second.copied_size) == (1034, 0)
+        # the unchanged file is shared rather than copied again
+        assert (
+            os.stat(os.path.join(first.path, "addons/mod_601.pbo")).st_ino
+            == os.stat(os.path.join(second.path, "addons/mod_601.pbo")).st_ino
+        )
+
+        mod_update.run()
+
+        snapshots = Mod.query.get(1).snapshots
+        assert [snapshot.id for snapshot in snapshots] == [second.id, second.id + 1]
+        assert not os.path.exists(first.path)
+
+    def test_rollback_restores_snapshot(self, app: Flask, installed_mod: str) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        mod_update.run()
+        assert os.listdir(os.path.join(installed_mod, "addons")) == ["mod_601.pbo"]
+        snapshot = Mod.query.get(1).snapshots[0]
+
+        background.rollback_arma3_mod.run(1, snapshot.id)
+
+        mod = Mod.query.get(1)
+        assert sorted(os.listdir(os.path.join(installed_mod, "addons"))) == [
+            "keep.pbo",
+            "mod_601.pbo",
+        ]
+        assert sorted(os.listdir(mod_manager.dst_dir)) == ["@mod601", "mpmissions"]
+        assert mod.status == ModStatus.installed
+        assert not mod.should_update
+        assert mod.last_updated == snapshot.mod_last_updated
+        assert mod.manifest.file_count == 2
+        assert mod_manager.verify_mods([mod]) == {1: None}
+
+
+class TestModDedup:
+    """
+    Tests sharing identical files between mods as hardlinks
+    """
+
+    def test_dedup_links_identical_files_and_updates_detach_them(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        monkeypatch.setattr(
+            app.config["A3_SERVER_HELPER"], "is_server_running", lambda: False
+        )
+        for steam_id in [701, 702]:
+            path = os.path.join(mod_manager.dst_dir, f"@mod{steam_id}")
+            for name, content in [
+                ("addons/cba_main.pbo", "c" * 4096),
+                ("keys/cba.bikey", "key"),
+                # editable, so never shared
+                ("userconfig/settings.hpp", "x = 1;"),
+                ("addons/own.pbo", str(steam_id)),
+            ]:
+                os.makedirs(os.path.dirname(os.path.join(path, name)), exist_ok=True)
+                with open(os.path.join(path, name), "w") as mod_file:
+                    mod_file.write(content)
+            db.session.add(
+                Mod(
+                    steam_id=steam_id,
+                    filename=f"@mod{steam_id}",
+                    name=f"mod{steam_id}",
+                    status=ModStatus.installed,
+                    local_path=path,
+                    last_updated=datetime(2025, 1, 1),
+                )
+            )
+        db.session.commit()
+        first, second = (
+            os.path.join(mod_manager.dst_dir, "@mod701"),
+            os.path.join(mod_manager.dst_dir, "@mod702"),
+        )
+
+        outcome = background.dedup_arma3_mods.run()
+
+        assert outcome == {"files_linked": 2, "bytes_reclaimed": 4099, "groups": 2}
+        for name, shared in [
+            ("addons/cba_main.pbo", True),
+            ("keys/cba.bikey", True),
+            ("userconfig/settings.hpp", False),
+        ]:
+            assert (
+                os.stat(os.path.join(first, name)).st_ino
+                == os.stat(os.path.join(second, name)).st_ino
+            ) is shared
+        assert mod_manager.get_link_groups() == {
+            "groups": 2,
+            "files": 4,
+            "bytes_shared": 4099,
+        }
+        # nothing left to link on a second pass
+        assert background.dedup_arma3_mods.run()["files_linked"] == 0
+        assert mod_manager.verify_mods(Mod.query.all()) == {1: None, 2: None}
+
+        Mod.query.get(1).steam_last_updated = datetime(2025, 6, 1)
+        db.session.commit()
+        mod_update.run()
+
+        assert os.listdir(os.path.join(first, "addons")) == ["mod_701.pbo"]
+        with open(os.path.join(second, "addons", "cba_main.pbo")) as pbo:
+            assert pbo.read() == "c" * 4096
+        assert mod_manager.get_link_groups()["groups"] == 0
+
+
+class TestDiskAdmission:
+    """
+    Tests holding downloads back until the disk space they need is free
+    """
+
+    @pytest.fixture
+    def free_space(self, app: Flask, monkeypatch: pytest.MonkeyPatch) -> dict:
+        """Pretends every filesystem has the given bytes free (and no headroom is kept)."""
+        disk = {"free": 0}
+        monkeypatch.setattr(
+            shutil,
+            "disk_usage",
+            lambda path: shutil._ntuple_diskusage(
+                10**9, 10**9 - disk["free"], disk["free"]
+            ),
+        )
+        monkeypatch.setattr(app.config["DISK_ADMISSION_HELPER"], "headroom_bytes", 0)
+        return disk
+
+    def test_download_waits_for_space_held_by_another(
+        self,
+        app: Flask,
+        monkeypatch: pytest.MonkeyPatch,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        free_space: dict,
+        sent_tasks: list[tuple[str, list]],
+    ) -> None:
+        admission = app.config["DISK_ADMISSION_HELPER"]
+        mod_manager = app.config["MOD_MANAGERS"]["ARMA3"]
+        # room for both downloads in the queue, so only the space holds this one back
+        monkeypatch.setattr(app.config["DOWNLOAD_QUEUE_HELPER"], "concurrency", 2)
+        free_space["free"] = 3000
+        db.session.add(
+            Mod(steam_id=801, filename="@mod801", name="mod801", size_bytes=2048)
+        )
+        db.session.commit()
+        in_flight = admission.reserve("mod_download", [], {mod_manager.dst_dir: 2000})
+        assert admission.admit(in_flight) == ("admitted", "")
+
+        assert download_arma3_mods.run([1]) == {}
+
+        assert fake_steamcmd.invocations == []
+        assert Mod.query.get(1).status == ModStatus.not_installed
+        assert sent_tasks == [("app.tasks.background.download_arma3_mods", [[1], 0])]
+        queue = admission.get_queue([mod_manager.staging_dir, mod_manager.dst_dir])
+        assert [r["state"] for r in queue["reservations"]] == ["active", "deferred"]
+        assert queue["filesystems"][0]["reserved"] == 4048
+
+        admission.release(in_flight.id)
+        outcome = download_arma3_mods.run(
+            [1], reservation_id=queue["reservations"][1]["id"]
+        )
+
+        assert outcome == {"succeeded": [1], "failed": []}
+        assert admission.get_queue([])["reservations"] == []
+
+    def test_download_fails_fast_when_nothing_can_free_space(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        free_space: dict,
+        sent_tasks: list[tuple[str, list]],
+    ) -> None:
+        free_space["free"] = 1000
+        db.session.add(
+            Mod(steam_id=802, filename="@mod802", name="mod802", size_bytes=2048)
+        )
+        db.session.commit()
+
+        assert download_arma3_mods.run([1]) == {"succeeded": [], "failed": [1]}
+
+        assert fake_steamcmd.invocations == []
+        assert sent_tasks == []
+        assert Mod.query.get(1).status == ModStatus.install_failed
+        assert app.config["DISK_ADMISSION_HELPER"].get_queue([])["reservations"] == []
+
+
+class TestDownloadQueue:
+    """
+    Tests queueing downloads by mod, merging duplicate requests and starting them by priority
+    """
+
+    @pytest.fixture
+    def busy(self, app: Flask, monkeypatch: pytest.MonkeyPatch) -> DiskReservation:
+        """Fills the only download slot with a download in flight."""
+        admission = app.config["DISK_ADMISSION_HELPER"]
+        monkeypatch.setattr(admission, "headroom_bytes", 0)
+        reservation = admission.reserve("mod_download", [], {})
+        assert admission.admit(reservation) == ("admitted", "")
+        return reservation
+
+    def test_duplicate_requests_merge_into_queued_download(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        busy: DiskReservation,
+        sent_tasks: list[tuple[str, list]],
+    ) -> None:
+        db.session.add(
+            Mod(steam_id=811, filename="@mod811", name="mod811", size_bytes=64)
+        )
+        db.session.commit()
+
+        assert download_arma3_mods.run([1]) == {}
+        assert download_arma3_mods.run([1]) == {}
+
+        queue = app.config["DISK_ADMISSION_HELPER"].get_queue([])
+        assert [r["state"] for r in queue["reservations"]] == ["active", "queued"]
+        assert queue["depth"] == {"downloads": 2, "waiting": 1, "mods": 1}
+        assert fake_steamcmd.invocations == []
+        assert sent_tasks == []
+
+    def test_downloads_start_by_priority(
+        self,
+        app: Flask,
+        fake_steamcmd: FakeSteamCmd,
+        quiet_task_helper: None,
+        busy: DiskReservation,
+        sent_tasks: list[tuple[str, list]],
+    ) -> None:
+        queue = app.config["DOWNLOAD_QUEUE_HELPER"]
+        for steam_id in (812, 813):
+            db.session.add(
+                Mod(
+                    steam_id=steam_id,
+                    filename=f"@mod{steam_id}",
+                    name=f"mod{steam_id}",
+                    size_bytes=64,
+                )
+            )
+        db.session.commit()
+
+        download_arma3_mods.run([1], schedule_id=7)
+        download_arma3_mods.run([2])
+        # the manual request goes ahead of the scheduled one
+        assert queue.get_mod_position(1)["reservation"]["position"] == 2
+        assert queue.get_mod_position(2)["reservation"]["position"] == 1
+
+        # until a manual request for the same mod is merged into it, and makes it as urgent (and it's older)
+        assert download_arma3_mods.run([1]) == {}
+        assert queue.get_mod_position(1)["reservation"]["position"] == 1
+
+        background._release_download(busy.id)
+        assert sent_tasks == [("app.tasks.background.download_arma3_mods", [[1], 7])]
+
+        reservation_id = queue.get_mod_position(1)["reservation"]["id"]
+        assert download_arma3_mods.run([1], 7, reservation_id) == {
+            "succeeded": [1],
+            "failed": [],
+        }
+        assert queue.get_mod_position(1) is None
+        assert sent_tasks[1:] == [
+            ("app.tasks.background.download_arma3_mods", [[2], 0])
+        ]
+
+
+class TestTaskRouting:
+    """
+    Tests that tasks land on queues main.py starts workers for
+    """
+
+    def test_every_task_has_a_worker(self, app: Flask) -> None:
+        queues = {
+            name: celery.amqp.router.route({}, name)["queue"].name
+            for name in celery.tasks
+            if name.startswith("app.tasks.")
+        }
+
+        assert set(queues.values()) <= set(app.config["CELERY_WORKERS"])
+        assert queues["app.tasks.background.server_stop"] == "control"
+        assert queues["app.tasks.background.check_for_server_death"] == "control"
+        assert queues["app.tasks.background.download_arma3_mods"] == "bulk"
+        assert queues["app.tasks.background.mod_update"] == "bulk"
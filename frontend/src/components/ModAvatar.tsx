@@ -4,27 +4,34 @@ import { Avatar, AvatarFallback } from '@/components/ui/avatar'
 import { mods } from '@/services'
 import { blobUrlCache } from '@/lib/helpers/blobUrlCache'
 
+// avatars are at most 40px wide, so a 64px thumbnail covers high-DPI screens
+const AVATAR_THUMBNAIL_SIZE = 64
+
 interface ModAvatarProps {
   modId: number
   name: string
   imageAvailable: boolean
+  imageHash?: string | null
   className?: string
 }
 
-export function ModAvatar({ modId, name, _imageAvailable, className }: ModAvatarProps) {
+export function ModAvatar({ modId, name, _imageAvailable, imageHash, className }: ModAvatarProps) {
   const [imageUrl, setImageUrl] = useState<string | null>(null)
   const [imageLoaded, setImageLoaded] = useState(false)
   const imgRef = useRef<HTMLImageElement | null>(null)
   const loadedModIdRef = useRef<number | null>(null)
-  const cacheKey = `mod-${modId}`
+  const cacheKey = `mod-${modId}-${imageHash ?? ''}-${AVATAR_THUMBNAIL_SIZE}`
 
   // Memoize queryFn to prevent new function reference on every render
-  const imageQueryFn = useMemo(() => () => mods.getModSubscriptionImage(modId), [modId])
+  const imageQueryFn = useMemo(
+    () => () => mods.getModSubscriptionImage(modId, imageHash, AVATAR_THUMBNAIL_SIZE),
+    [modId, imageHash]
+  )
 
   // Fetch image - we always try to load it, even if imageAvailable is false
   // The backend will return an error if the image isn't available, which we handle gracefully
   const { data: imageBlob } = useQuery({
-    queryKey: ['mod-image', modId],
+    queryKey: ['mod-image', modId, imageHash ?? null, AVATAR_THUMBNAIL_SIZE],
     queryFn: imageQueryFn,
     enabled: true, // Always try to load images
     staleTime: Infinity, // Images don't change frequently
@@ -66,17 +66,17 @@ export function ModDetailSidebar({
   const [imageLoaded, setImageLoaded] = useState(false)
   const imgRef = useRef<HTMLImageElement | null>(null)
   const loadedModIdRef = useRef<number | null>(null)
-  const cacheKey = mod ? `mod-${mod.id}` : null
+  const cacheKey = mod ? `mod-${mod.id}-${mod.imageHash ?? ''}` : null
 
   // Memoize queryFn to prevent new function reference on every render
   const imageQueryFn = useMemo(
-    () => () => (mod ? mods.getModSubscriptionImage(mod.id) : Promise.reject()),
+    () => () => (mod ? mods.getModSubscriptionImage(mod.id, mod.imageHash) : Promise.reject()),
     [mod]
   )
 
   // Fetch mod image with caching
   const { data: imageBlob, isFetching: isImageFetching } = useQuery({
-    queryKey: ['mod-image', mod?.id],
+    queryKey: ['mod-image', mod?.id, mod?.imageHash ?? null],
     queryFn: imageQueryFn,
     enabled: !!mod?.imageAvailable && open,
     staleTime: Infinity, // Images don't change frequently
@@ -270,7 +270,12 @@ export function ModDetailSidebar({
             <div>
               <p className="text-xs text-muted-foreground mb-0.5">Download Status</p>
               <div className="flex items-center gap-1.5">
-                {mod.localPath ? (
+                {mod.localPath && mod.status === 'corrupt' ? (
+                  <>
+                    <IconAlertCircle className="h-3.5 w-3.5 text-red-600" />
+                    <span className="font-medium text-sm text-red-600">Corrupt</span>
+                  </>
+                ) : mod.localPath ? (
                   mod.shouldUpdate &&
                   mod.steamLastUpdated &&
                   mod.lastUpdated &&
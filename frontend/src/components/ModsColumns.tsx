@@ -38,6 +38,7 @@ export const getColumns = (): ColumnDef<ModSubscription>[] => [
           modId={mod.id}
           name={mod.name}
           imageAvailable={mod.imageAvailable}
+          imageHash={mod.imageHash}
           className="h-10 w-10"
         />
       )
@@ -88,6 +89,14 @@ export const getColumns = (): ColumnDef<ModSubscription>[] => [
           </div>
         )
       }
+      if (status === 'corrupt') {
+        return (
+          <div className="flex items-center gap-1.5">
+            <div className="h-1.5 w-1.5 rounded-full bg-red-500" />
+            <span className="text-sm text-muted-foreground">Corrupt</span>
+          </div>
+        )
+      }
       if (status === 'install_failed') {
         return (
           <div className="flex items-center gap-1.5">
@@ -34,6 +34,8 @@ const actionOptions = [
   { value: 'server_start', label: 'Start Server' },
   { value: 'server_stop', label: 'Stop Server' },
   { value: 'mod_update', label: 'Update Mods' },
+  { value: 'mod_verify', label: 'Verify Mods' },
+  { value: 'mod_dedup', label: 'Deduplicate Mod Files' },
 ] as const
 
 const celeryScheduleOptions = [
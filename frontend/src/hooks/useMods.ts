@@ -22,6 +22,7 @@ const transformApiMods = (response: ModSubscriptionResponse[]): ModSubscription[
     steamLastUpdated: mod.steam_last_updated,
     shouldUpdate: mod.should_update,
     imageAvailable: mod.image_available || false,
+    imageHash: mod.image_hash ?? null,
     // eslint-disable-next-line @typescript-eslint/no-explicit-any
     status: (mod as any).status,
   }))
@@ -9,6 +9,7 @@ export type ModStatusType =
   | 'not-downloaded'
   | 'downloading'
   | 'download-failed'
+  | 'corrupt'
 
 export interface ModStatusInfo {
   type: ModStatusType
@@ -34,6 +35,16 @@ export function getModStatus(mod: ModSubscription): ModStatusInfo {
       }
     }
 
+    // Verification found missing or damaged files
+    if (mod.status === 'corrupt') {
+      return {
+        type: 'corrupt',
+        label: 'Corrupt',
+        icon: IconAlertCircle,
+        iconClassName: 'h-3.5 w-3.5 text-red-600',
+      }
+    }
+
     const hasNewerSteamUpdate =
       !!mod.shouldUpdate &&
       !!mod.steamLastUpdated &&
@@ -7,7 +7,13 @@ import type { TaskLogEntry } from '@/types/server'
 /**
  * Schedule action types
  */
-export type ScheduleAction = 'server_restart' | 'server_start' | 'server_stop' | 'mod_update'
+export type ScheduleAction =
+  | 'server_restart'
+  | 'server_start'
+  | 'server_stop'
+  | 'mod_update'
+  | 'mod_verify'
+  | 'mod_dedup'
 
 /**
  * Mapping of schedule action types to human-readable labels
@@ -17,6 +23,8 @@ export const actionLabels = {
   server_start: 'Start Server',
   server_stop: 'Stop Server',
   mod_update: 'Update Mods',
+  mod_verify: 'Verify Mods',
+  mod_dedup: 'Deduplicate Mod Files',
 } as const satisfies Record<ScheduleAction, string>
 
 /**
@@ -10,13 +10,47 @@ export interface AsyncJobStatus {
     | 'RETRY'
     | 'REVOKED'
     | 'RUNNING'
+    | 'PROGRESS'
     | 'ABORTED'
   message: string
+  progress?: AsyncJobProgress
+}
+
+/**
+ * Progress published by long-running jobs (e.g. mod downloads) while in the PROGRESS state
+ */
+export interface AsyncJobProgress {
+  message: string
+  items_total: number
+  items_done: number
+  items_failed: number
+  bytes_downloaded: number
+  bytes_total: number
+  percent: number | null
+  bytes_per_second: number
+  eta_seconds: number | null
+  elapsed_seconds: number
+  seconds_since_output: number
+  moved_bytes: number
+  move_bytes_per_second: number | null
 }
 
 export interface AsyncJobResponse {
   status: string
   message: string
+  progress?: AsyncJobProgress
+}
+
+/**
+ * Whether a job has made progress since the previous poll
+ */
+function progressAdvanced(previous?: AsyncJobProgress, current?: AsyncJobProgress): boolean {
+  if (!current) return false
+  if (!previous) return true
+  return (
+    current.bytes_downloaded > previous.bytes_downloaded ||
+    current.items_done > previous.items_done
+  )
 }
 
 /**
@@ -26,6 +60,8 @@ export interface AsyncJobResponse {
  * @param onComplete - Callback when job completes (success or failure)
  * @param pollInterval - How often to poll in milliseconds (default: 2000)
  * @param maxAttempts - Maximum number of polling attempts (default: 60 = 2 minutes)
+ *   Attempts are only counted while the job makes no progress, so long downloads which keep
+ *   advancing are not timed out
  */
 export async function pollAsyncJob(
   jobId: string,
@@ -35,6 +71,7 @@ export async function pollAsyncJob(
   maxAttempts: number = 60
 ): Promise<AsyncJobStatus> {
   let attempts = 0
+  let lastProgress: AsyncJobProgress | undefined
 
   const poll = async (): Promise<AsyncJobStatus> => {
     try {
@@ -48,6 +85,7 @@ export async function pollAsyncJob(
       const status: AsyncJobStatus = {
         status: data.status as AsyncJobStatus['status'],
         message: data.message,
+        progress: data.progress,
       }
 
       // Notify of status change
@@ -60,7 +98,11 @@ export async function pollAsyncJob(
         return status
       }
 
-      // Check if we've exceeded max attempts
+      // Check if we've exceeded max attempts (without progress)
+      if (progressAdvanced(lastProgress, status.progress)) {
+        attempts = 0
+        lastProgress = status.progress
+      }
       attempts++
       if (attempts >= maxAttempts) {
         const timeoutStatus: AsyncJobStatus = {
@@ -103,6 +145,7 @@ export async function getAsyncJobStatus(jobId: string): Promise<AsyncJobStatus>
     return {
       status: data.status as AsyncJobStatus['status'],
       message: data.message,
+      progress: data.progress,
     }
   } catch (error) {
     return {
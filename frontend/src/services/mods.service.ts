@@ -68,10 +68,17 @@ export const modService = {
 
   // Get mod subscription image (returns binary data)
   // Images are cached by React Query with staleTime: Infinity
-  // Browser also caches based on server's Cache-Control headers (set to 1 hour)
-  getModSubscriptionImage: async (modId: number): Promise<Blob> => {
+  // Passing the image hash from the mod listing makes the browser cache the image indefinitely;
+  // without it the browser revalidates with the image's ETag.
+  // Passing a size requests a server-side thumbnail (falls back to the original if there is none)
+  getModSubscriptionImage: async (
+    modId: number,
+    imageHash?: string | null,
+    size?: number
+  ): Promise<Blob> => {
     const response = await api.get<Blob>(`/arma3/mod/subscription/${modId}/image`, {
       responseType: 'blob',
+      params: { v: imageHash || undefined, size },
     })
     return response.data
   },
@@ -31,11 +31,15 @@ export interface ModSubscriptionResponse {
   readonly steam_last_updated: string | null
   readonly should_update: boolean
   readonly image_available?: boolean
+  // content hash of the preview image; pass as "v" to get an immutably-cached image URL
+  readonly image_hash?: string | null
 }
 
 export interface ModSubscriptionsResponse {
   results: ModSubscriptionResponse[]
   message: string
+  // only present when the request was paginated (limit, cursor or a filter was passed)
+  next_cursor?: string | null
 }
 
 export interface AddModSubscriptionRequest {
@@ -44,9 +48,17 @@ export interface AddModSubscriptionRequest {
   }>
 }
 
+export interface AddModSubscriptionResult {
+  steam_id: number
+  id: number | null
+  status: 'subscribed' | 'failed'
+  message?: string
+}
+
 export interface AddModSubscriptionResponse {
   message: string
   ids: number[]
+  results?: AddModSubscriptionResult[]
 }
 
 export interface ModSubscriptionDetailsResponse {
@@ -93,6 +105,8 @@ export interface ModCollectionEntryResponse {
   readonly collection_id: number
   readonly mod_id: number
   readonly added_at: string
+  readonly updated_at: string
+  readonly load_order: number
   readonly mod?: ModSubscriptionResponse
 }
 
@@ -106,6 +120,24 @@ export interface CollectionResponse {
   readonly updated_at: string
 }
 
+export interface ModChangesResponse {
+  readonly results: {
+    readonly mods: ModSubscriptionResponse[]
+    readonly collections: Omit<CollectionResponse, 'mods'>[]
+    readonly collection_entries: ModCollectionEntryResponse[]
+    readonly deleted: {
+      readonly mods: number[]
+      readonly collections: number[]
+      readonly mod_collection_entries: number[]
+    }
+  }
+  // pass back as "since" on the next request
+  readonly cursor: string
+  // when true the results are a full snapshot and replace local state
+  readonly full_sync: boolean
+  readonly message: string
+}
+
 export interface CollectionsListResponse {
   readonly results: CollectionResponse[]
   readonly message: string
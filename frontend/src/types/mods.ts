@@ -13,6 +13,7 @@ export interface ModSubscription {
   readonly steamLastUpdated: string | null
   readonly shouldUpdate: boolean
   readonly imageAvailable: boolean
+  readonly imageHash?: string | null
   readonly status?:
     | 'not_installed'
     | 'install_requested'
@@ -21,6 +22,7 @@ export interface ModSubscription {
     | 'uninstall_requested'
     | 'uninstall_failed'
     | 'update_requested'
+    | 'corrupt'
 }
 
 // Extended shape used by UI tables (optional fields for display/filtering)
@@ -5,13 +5,14 @@ a = Analysis(
     ['backend/main.py'],
     pathex=[],
     binaries=[],
-    datas=[("backend/app/assets", "app/assets")],
+    datas=[("backend/app/assets", "app/assets"), ("backend/migrations", "migrations")],
     hiddenimports=[
         "celery",
         "celery.fixups",
         "celery.fixups.django",
         "celery.loaders.app",
         "celery.concurrency.solo",
+        "celery.concurrency.thread",
         "celery.apps.worker",
         "celery.app.log",
         "celery.app.amqp",